@@ -10,9 +10,25 @@ from .hydrological_simulator import (
     INDIA_RIVERS,
     generate_all_river_datasets
 )
+from .forecast_kernel import (
+    hourly_forecast,
+    run_forecast,
+    simulate_levels
+)
+from .gauge_stream import (
+    GaugeFeatureStream,
+    iter_history,
+    reservoir_sample
+)
 
 __all__ = [
     "HydrologicalSimulator",
     "INDIA_RIVERS", 
-    "generate_all_river_datasets"
+    "generate_all_river_datasets",
+    "hourly_forecast",
+    "run_forecast",
+    "simulate_levels",
+    "GaugeFeatureStream",
+    "iter_history",
+    "reservoir_sample"
 ]
@@ -0,0 +1,241 @@
+"""
+Out-of-Core Gauge History Streaming
+===================================
+Reads gauge history CSVs in fixed-size chunks so training never holds the
+whole history in memory: peak memory depends on the chunk size (and the
+RF sample size), not on how many years / stations the file covers.
+
+Two file layouts are understood:
+
+- Raw gauge timeseries (date, rainfall_mm, river_level_m, is_flood, ...),
+  like HydrologicalSimulator's *_timeseries.csv. Features are computed
+  incrementally with the same definitions as
+  HydrologicalSimulator.extract_features; the 7-day window, the last heavy
+  rain day and the one-row target lookahead are carried across chunk
+  boundaries, so the rows are identical to extracting the whole file at once.
+- Pre-extracted feature rows (FEATURE_NAMES + target_level, target_flood),
+  like *_train.csv / *_test.csv.
+
+On top of the chunk iterators:
+
+- reservoir_sample draws a uniform fixed-size sample in one pass (for the
+  Random Forest, which needs its training rows in memory).
+- running_moments computes column means / standard deviations in one pass
+  (for the LSTM's normalisation before it streams minibatches).
+"""
+
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Same order as HydrologicalSimulator.extract_features
+FEATURE_NAMES = [
+    "rainfall_today",
+    "rainfall_2day_sum",
+    "rainfall_3day_sum",
+    "rainfall_week_avg",
+    "rainfall_week_max",
+    "prev_river_level",
+    "level_change_rate",
+    "soil_saturation_proxy",
+    "days_since_heavy_rain",
+]
+TIMESERIES_COLUMNS = ["rainfall_mm", "river_level_m", "is_flood"]
+TARGET_COLUMNS = ["target_level", "target_flood"]
+
+LOOKBACK_DAYS = 7
+HEAVY_RAIN_MM = 50.0
+DEFAULT_CHUNK_ROWS = 100_000
+
+
+class FeatureChunk(NamedTuple):
+    """Feature rows with their next-day targets."""
+    X: np.ndarray  # (rows, len(FEATURE_NAMES))
+    y_level: np.ndarray  # next-day river level
+    y_flood: np.ndarray  # next-day flood flag
+
+
+class GaugeFeatureStream:
+    """
+    Incremental HydrologicalSimulator.extract_features.
+
+    push() consecutive slices of one gauge's timeseries; each call returns
+    the feature rows that became complete. A row needs the 6 previous days
+    and the next day (its target), so the last LOOKBACK_DAYS days are kept
+    for the following call.
+    """
+
+    def __init__(self):
+        self._tail = np.empty((0, 3))
+        self._offset = 0  # day index of _tail[0]
+        self._last_heavy = -1  # day index of the latest heavy rain seen
+
+    def push(self, rainfall: np.ndarray, level: np.ndarray, is_flood: np.ndarray) -> FeatureChunk:
+        """Add the next days of the timeseries and return the rows completed by them."""
+        buffer = np.vstack([self._tail, np.column_stack([rainfall, level, is_flood]).astype(float)])
+        first = max(LOOKBACK_DAYS - self._offset, LOOKBACK_DAYS - 1)  # buffer position of the first new row
+        last = len(buffer) - 1  # exclusive: the final day has no target yet
+        days = self._offset + np.arange(len(buffer))
+
+        rain, river = buffer[:, 0], buffer[:, 1]
+        heavy = np.where(rain >= HEAVY_RAIN_MM, days, -1)
+        last_heavy = np.maximum.accumulate(np.maximum(heavy, self._last_heavy))
+
+        if last > first:
+            rows = np.arange(first, last)
+            week = np.lib.stride_tricks.sliding_window_view(rain, LOOKBACK_DAYS)[rows - LOOKBACK_DAYS + 1]
+            week_sum = week.sum(axis=1)
+            X = np.column_stack([
+                rain[rows],
+                rain[rows - 1] + rain[rows],
+                rain[rows - 2] + rain[rows - 1] + rain[rows],
+                week.mean(axis=1),
+                week.max(axis=1),
+                river[rows],
+                river[rows] - river[rows - 1],
+                week_sum / LOOKBACK_DAYS,
+                np.where(last_heavy[rows] >= 0, days[rows] - last_heavy[rows], days[rows] + 1),
+            ])
+            chunk = FeatureChunk(X, river[rows + 1], buffer[rows + 1, 2].astype(int))
+        else:
+            chunk = FeatureChunk(np.empty((0, len(FEATURE_NAMES))), np.empty(0), np.empty(0, dtype=int))
+
+        keep = min(len(buffer), LOOKBACK_DAYS)
+        self._tail = buffer[len(buffer) - keep:]
+        self._offset += len(buffer) - keep
+        self._last_heavy = int(last_heavy[-1])
+        return chunk
+
+
+def is_timeseries_file(path: str) -> bool:
+    """True for raw gauge timeseries, False for pre-extracted feature rows."""
+    header = pd.read_csv(path, nrows=0).columns
+    return all(column in header for column in TIMESERIES_COLUMNS)
+
+
+def iter_timeseries_features(path: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[FeatureChunk]:
+    """Stream feature rows from a raw gauge timeseries CSV (oldest day first)."""
+    stream = GaugeFeatureStream()
+    for frame in pd.read_csv(path, usecols=TIMESERIES_COLUMNS, chunksize=chunk_rows):
+        chunk = stream.push(
+            frame["rainfall_mm"].to_numpy(float),
+            frame["river_level_m"].to_numpy(float),
+            frame["is_flood"].to_numpy(int)
+        )
+        if len(chunk.X):
+            yield chunk
+
+
+def iter_feature_rows(path: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[FeatureChunk]:
+    """Stream rows from a pre-extracted feature CSV (FEATURE_NAMES + targets)."""
+    for frame in pd.read_csv(path, usecols=FEATURE_NAMES + TARGET_COLUMNS, chunksize=chunk_rows):
+        yield FeatureChunk(
+            frame[FEATURE_NAMES].to_numpy(float),
+            frame["target_level"].to_numpy(float),
+            frame["target_flood"].to_numpy(int)
+        )
+
+
+def iter_history(path: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[FeatureChunk]:
+    """Stream feature rows from either file layout (detected from the header)."""
+    if is_timeseries_file(path):
+        return iter_timeseries_features(path, chunk_rows)
+    return iter_feature_rows(path, chunk_rows)
+
+
+def reservoir_sample(
+    chunks: Iterable[FeatureChunk],
+    size: int,
+    random_state: Optional[int] = 42
+) -> Tuple[FeatureChunk, int]:
+    """
+    Uniform sample of at most size rows from a stream, in one pass.
+
+    Reservoir sampling (Algorithm R), vectorized per chunk: row t (0-based)
+    replaces reservoir slot j ~ U[0, t] when j < size.
+
+    Returns:
+        Tuple of (sampled rows in stream order, rows seen)
+    """
+    rng = np.random.default_rng(random_state)
+    reservoir: Optional[FeatureChunk] = None
+    order = np.empty(0, dtype=np.int64)  # stream position of each reservoir row
+    seen = 0
+    for chunk in chunks:
+        n = len(chunk.X)
+        if reservoir is None:
+            reservoir = FeatureChunk(
+                np.empty((0, chunk.X.shape[1])), np.empty(0), np.empty(0, dtype=chunk.y_flood.dtype)
+            )
+        # Fill phase: the first rows go straight in
+        fill = min(max(size - len(order), 0), n)
+        if fill:
+            reservoir = FeatureChunk(*(
+                np.concatenate([kept, new[:fill]]) for kept, new in zip(reservoir, chunk)
+            ))
+            order = np.concatenate([order, seen + np.arange(fill)])
+        # Replacement phase
+        positions = seen + np.arange(fill, n)
+        slots = (rng.random(len(positions)) * (positions + 1)).astype(np.int64)
+        hit = slots < size
+        if hit.any():
+            slots, rows = slots[hit], np.arange(fill, n)[hit]
+            # A slot hit twice in one chunk keeps the later row
+            _, last = np.unique(slots[::-1], return_index=True)
+            slots, rows = slots[::-1][last], rows[::-1][last]
+            for kept, new in zip(reservoir, chunk):
+                kept[slots] = new[rows]
+            order[slots] = seen + rows
+        seen += n
+
+    if reservoir is None:
+        raise ValueError("History stream is empty")
+    by_time = np.argsort(order, kind="stable")
+    return FeatureChunk(*(array[by_time] for array in reservoir)), seen
+
+
+def running_moments(
+    chunks: Iterable[Tuple[np.ndarray, np.ndarray]]
+) -> Tuple[int, np.ndarray, np.ndarray, float, float]:
+    """
+    Row count plus population mean / std of X columns and of y, in one pass.
+
+    Chunks are merged with Chan et al.'s parallel update, which stays
+    accurate where the naive sum-of-squares formula cancels.
+
+    Returns:
+        Tuple of (rows, X mean, X std, y mean, y std)
+    """
+    n = 0
+    mean = m2 = None
+    for X, y in chunks:
+        block = np.column_stack([X, y]).astype(float)
+        if not len(block):
+            continue
+        b_n, b_mean = len(block), block.mean(axis=0)
+        b_m2 = ((block - b_mean) ** 2).sum(axis=0)
+        if mean is None:
+            n, mean, m2 = b_n, b_mean, b_m2
+            continue
+        delta = b_mean - mean
+        total = n + b_n
+        mean = mean + delta * b_n / total
+        m2 = m2 + b_m2 + delta ** 2 * n * b_n / total
+        n = total
+    if mean is None:
+        raise ValueError("History stream is empty")
+    std = np.sqrt(m2 / n)
+    return n, mean[:-1], std[:-1], float(mean[-1]), float(std[-1])
+
+
+def level_target(chunks: Iterable[FeatureChunk]) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """(X, river level) pairs, the LSTM's inputs / target (as in train_lstm_predictor)."""
+    level = FEATURE_NAMES.index("prev_river_level")
+    for chunk in chunks:
+        yield chunk.X, chunk.X[:, level]
+
+
+def history_source(path: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Callable[[], Iterator[Tuple[np.ndarray, np.ndarray]]]:
+    """Re-iterable LSTM source for a history file: each call opens a fresh stream."""
+    return lambda: level_target(iter_history(path, chunk_rows))
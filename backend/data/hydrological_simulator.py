@@ -337,20 +337,21 @@ class HydrologicalSimulator:
             sequence_length: Number of time steps in each sequence
             
         Returns:
-            Tuple of (X_sequences, y_targets)
+            Tuple of (X_sequences, y_targets); X_sequences is a read-only
+            strided view of the stacked features (no per-window copy)
         """
         features = np.column_stack([
             data["rainfall_mm"].values,
             data["river_level_m"].values
         ])
         
-        X, y = [], []
+        # Window i covers days i .. i+sequence_length-1; its target is the
+        # river level of day i+sequence_length+1
+        windows = max(len(features) - 1 - sequence_length, 0)
+        X = np.lib.stride_tricks.sliding_window_view(features, sequence_length, axis=0)[:windows]
+        y = features[sequence_length + 1:sequence_length + 1 + windows, 1]  # Next day river level
         
-        for i in range(sequence_length, len(features) - 1):
-            X.append(features[i-sequence_length:i])
-            y.append(features[i + 1, 1])  # Next day river level
-            
-        return np.array(X), np.array(y)
+        return X.transpose(0, 2, 1), y
     
     def generate_full_dataset(
         self,
@@ -0,0 +1,647 @@
+"""
+Flat-Array Random Forest Inference Engine
+=========================================
+Serving-time replacement for sklearn's RandomForestClassifier.predict_proba.
+
+sklearn walks each tree separately and, with n_jobs=-1, dispatches the 100
+trees to a joblib thread pool and re-validates the input on every call. For
+the one-row requests of the flood API that overhead dominates the actual
+tree walk. FlatForest exports the trained forest once into contiguous NumPy
+arrays:
+
+    feature[node], threshold[node]   split of each node
+    left[node], right[node]          global child indices (leaves point to themselves)
+    value[node, class]               class probabilities of each node
+    roots[tree]                      root node of each tree
+
+and walks all trees for all rows together, one vectorized step per depth
+level. Class and probability come out of that single pass.
+
+The StandardScaler is folded into the thresholds: for a split on scaled
+input, (x - mean) / scale <= t  <=>  x <= t * scale + mean  (scale > 0), so
+raw features go straight into the engine. sklearn compares float32-cast
+inputs against its thresholds, so each threshold is first moved to the exact
+boundary of the float32 rounding (see _float32_boundary); without this,
+splits on integer features (e.g. days_since_heavy_rain <= 6.9999999) can
+route a row differently from sklearn.
+
+Per-prediction feature attributions use the decision-path (Saabas) method:
+every node stores its expected class probability (value[node]), and each
+split on the path of a row credits value[child] - value[parent] to the split
+feature. Averaged over the trees, the contributions plus the forest's mean
+root value (the bias) sum exactly to the predicted probability. They are
+accumulated during the same vectorized walk, so explaining a prediction
+costs O(trees x depth) per row rather than a separate explainer pass.
+
+Compact artifacts (save / load, "*.forest.npz") store the same arrays with
+float32 values and int32 indices, optionally after pruning
+(whole trees, and leaves that barely change their parent's probability)
+within a tolerated validation accuracy loss. Thresholds stay float64: the
+float32 boundary computed above sits exactly between two float32 values,
+so rounding it to float32 would route rows near a split differently from
+sklearn. Serving can load them directly without sklearn's per-tree Python
+objects.
+
+Run this module to check parity against sklearn and benchmark latency.
+"""
+
+import os
+import time
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+# sklearn marks leaves with child index -1
+_TREE_LEAF = -1
+
+# Rows traversed together; larger blocks fall out of CPU cache and get slower per row
+ROW_BLOCK = 1024
+
+COMPACT_SUFFIX = ".forest.npz"
+
+
+def compact_artifact_path(model_path: str) -> str:
+    """Compact forest path next to a sklearn artifact (rf_x.joblib -> rf_x.forest.npz)."""
+    return os.path.splitext(model_path)[0] + COMPACT_SUFFIX
+
+
+def _float32_boundary(threshold: np.ndarray) -> np.ndarray:
+    """
+    Boundary b with  float32(x) <= threshold  <=>  x <= b  (up to exact ties).
+
+    sklearn trees evaluate float32(x) <= threshold. The float32 values <= t
+    end at f = largest float32 <= t, and x rounds to at most f exactly when
+    x lies below the midpoint between f and the next float32 up.
+    """
+    threshold = np.asarray(threshold, dtype=np.float64)
+    f = threshold.astype(np.float32)
+    f = np.where(f.astype(np.float64) > threshold, np.nextafter(f, np.float32(-np.inf)), f)
+    up = np.nextafter(f, np.float32(np.inf))
+    return (f.astype(np.float64) + up.astype(np.float64)) / 2
+
+
+class FlatForest:
+    """Random forest flattened into node arrays, evaluated with NumPy only."""
+
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        left: np.ndarray,
+        right: np.ndarray,
+        value: np.ndarray,
+        roots: np.ndarray,
+        max_depth: int,
+        classes: np.ndarray,
+        n_features: int
+    ):
+        """
+        Arrays keep their dtype: from_sklearn() builds np.intp / float64
+        (fastest gathers), compact() int32 indices / float32 values (smallest).
+        
+        Args:
+            feature: (n_nodes,) split feature per node (0 for leaves)
+            threshold: (n_nodes,) split threshold on raw features
+            left: (n_nodes,) global index of the left child (self for leaves)
+            right: (n_nodes,) global index of the right child (self for leaves)
+            value: (n_nodes, n_classes) class probabilities per node
+            roots: (n_trees,) global index of each tree's root
+            max_depth: Depth of the deepest tree (number of traversal steps)
+            classes: Class labels in value's column order
+            n_features: Number of input features
+        """
+        self.feature = np.asarray(feature)
+        self.threshold = np.asarray(threshold)
+        self.value = np.asarray(value)
+        self.roots = np.asarray(roots)
+        self.max_depth = int(max_depth)
+        self.classes = np.asarray(classes)
+        self.n_features = int(n_features)
+        # Interleaved children: node n goes to _children[2n] (left) or _children[2n + 1] (right)
+        self._children = np.stack([np.asarray(left), np.asarray(right)], axis=1).ravel()
+
+    @property
+    def left(self) -> np.ndarray:
+        return self._children[0::2]
+
+    @property
+    def right(self) -> np.ndarray:
+        return self._children[1::2]
+
+    @classmethod
+    def from_sklearn(cls, forest: Any, scaler: Any = None) -> "FlatForest":
+        """
+        Export a fitted RandomForestClassifier (and optional StandardScaler).
+
+        Args:
+            forest: Fitted sklearn RandomForestClassifier
+            scaler: Fitted StandardScaler applied before the forest, folded
+                into the thresholds (None if the forest takes raw features)
+
+        Returns:
+            FlatForest that takes raw (unscaled) features
+        """
+        n_features = int(forest.n_features_in_)
+        mean = np.zeros(n_features)
+        scale = np.ones(n_features)
+        if scaler is not None and hasattr(scaler, "scale_"):
+            if getattr(scaler, "with_mean", True) and scaler.mean_ is not None:
+                mean = np.asarray(scaler.mean_, dtype=np.float64)
+            if getattr(scaler, "with_std", True) and scaler.scale_ is not None:
+                scale = np.asarray(scaler.scale_, dtype=np.float64)
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            is_leaf = tree.children_left == _TREE_LEAF
+            own = np.arange(offset, offset + n_nodes, dtype=np.intp)
+
+            feature = np.where(is_leaf, 0, tree.feature).astype(np.intp)
+            boundary = _float32_boundary(tree.threshold)
+            threshold = np.where(is_leaf, 0.0, boundary * scale[feature] + mean[feature])
+            left = np.where(is_leaf, own, tree.children_left + offset).astype(np.intp)
+            right = np.where(is_leaf, own, tree.children_right + offset).astype(np.intp)
+
+            # (n_nodes, n_outputs=1, n_classes) -> normalised class probabilities
+            value = np.asarray(tree.value[:, 0, :], dtype=np.float64)
+            totals = value.sum(axis=1, keepdims=True)
+            value = np.divide(value, totals, out=np.zeros_like(value), where=totals > 0)
+
+            features.append(feature)
+            thresholds.append(threshold)
+            lefts.append(left)
+            rights.append(right)
+            values.append(value)
+            roots.append(offset)
+            max_depth = max(max_depth, tree.max_depth)
+            offset += n_nodes
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            value=np.concatenate(values),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max_depth,
+            classes=np.asarray(forest.classes_),
+            n_features=n_features
+        )
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the node arrays."""
+        return sum(
+            array.nbytes for array in
+            (self.feature, self.threshold, self._children, self.value, self.roots)
+        )
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """
+        Leaf reached in every tree for every row.
+
+        Args:
+            X: (n_rows, n_features) or (n_features,) raw features
+
+        Returns:
+            (n_rows, n_trees) global leaf indices
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[None, :]
+        n_rows = X.shape[0]
+
+        # Gather from the flattened matrix: row r, feature f -> r * n_features + f
+        flat_X = X.ravel()
+        row_offset = (np.arange(n_rows, dtype=np.intp) * self.n_features)[:, None]
+        nodes = np.broadcast_to(self.roots, (n_rows, self.n_trees)).copy()
+        for _ in range(self.max_depth):
+            go_right = flat_X[row_offset + self.feature[nodes]] > self.threshold[nodes]
+            nodes = self._children[2 * nodes + go_right]
+        return nodes
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """(n_rows, n_classes) class probabilities averaged over the trees."""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[None, :]
+        if len(X) <= ROW_BLOCK:
+            return self.value[self.apply(X)].mean(axis=1, dtype=np.float64)
+        return np.concatenate([
+            self.value[self.apply(X[start:start + ROW_BLOCK])].mean(axis=1, dtype=np.float64)
+            for start in range(0, len(X), ROW_BLOCK)
+        ])
+
+    def predict(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Class labels and class probabilities from one traversal."""
+        proba = self.predict_proba(X)
+        return self.classes[np.argmax(proba, axis=1)], proba
+
+    def expected_value(self, class_index: int = 1) -> float:
+        """Mean root value of a class: the prediction before any split (attribution bias)."""
+        return float(self.value[self.roots, class_index].mean(dtype=np.float64))
+
+    def predict_contributions(
+        self,
+        X: np.ndarray,
+        class_index: int = 1
+    ) -> Tuple[np.ndarray, float, np.ndarray]:
+        """
+        Class probabilities plus decision-path (Saabas) attributions, one traversal.
+
+        Args:
+            X: (n_rows, n_features) or (n_features,) raw features
+            class_index: Column of value the attributions explain (1 = flood)
+
+        Returns:
+            Tuple of (proba (n_rows, n_classes), bias,
+            contributions (n_rows, n_features)) with
+            bias + contributions.sum(axis=1) == proba[:, class_index]
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[None, :]
+        class_value = self.value[:, class_index]
+        probas, contributions = [], []
+        for start in range(0, max(len(X), 1), ROW_BLOCK):
+            block = X[start:start + ROW_BLOCK]
+            n_rows = block.shape[0]
+            flat_X = block.ravel()
+            # Also the offsets into the flattened (n_rows, n_features) contribution matrix
+            row_offset = (np.arange(n_rows, dtype=np.intp) * self.n_features)[:, None]
+            totals = np.zeros(n_rows * self.n_features)
+            nodes = np.broadcast_to(self.roots, (n_rows, self.n_trees)).copy()
+            for _ in range(self.max_depth):
+                cell = row_offset + self.feature[nodes]
+                go_right = flat_X[cell] > self.threshold[nodes]
+                children = self._children[2 * nodes + go_right]
+                # Leaves point to themselves, so finished trees add 0
+                totals += np.bincount(
+                    cell.ravel(),
+                    weights=(class_value[children] - class_value[nodes]).ravel(),
+                    minlength=totals.size
+                )
+                nodes = children
+            probas.append(self.value[nodes].mean(axis=1, dtype=np.float64))
+            contributions.append(totals.reshape(n_rows, self.n_features) / self.n_trees)
+        return np.concatenate(probas), self.expected_value(class_index), np.concatenate(contributions)
+
+    # -------------------------------------------------------------------------
+    # Pruning & compact artifacts
+    # -------------------------------------------------------------------------
+
+    def accuracy(self, X: np.ndarray, y: np.ndarray) -> float:
+        """Fraction of rows whose predicted class equals y."""
+        labels, _ = self.predict(X)
+        return float(np.mean(labels == np.asarray(y)))
+
+    def select_trees(self, tree_ids: Sequence[int]) -> "FlatForest":
+        """Forest made of a subset of the trees."""
+        return self._rebuilt(self._children, np.sort(np.asarray(tree_ids, dtype=np.intp)))
+
+    def collapse_leaves(self, tolerance: float) -> "FlatForest":
+        """
+        Turn splits into leaves while they barely matter.
+
+        A split whose two children are leaves with class probabilities
+        within `tolerance` of its own is replaced by a leaf; repeated
+        bottom-up until nothing changes.
+        """
+        children = self._children.copy()
+        own = np.arange(self.n_nodes)
+        for _ in range(self.max_depth):
+            left, right = children[0::2], children[1::2]
+            is_leaf = left == own
+            collapsible = (
+                ~is_leaf & is_leaf[left] & is_leaf[right]
+                & (np.abs(self.value[left] - self.value).max(axis=1) <= tolerance)
+                & (np.abs(self.value[right] - self.value).max(axis=1) <= tolerance)
+            )
+            if not collapsible.any():
+                break
+            nodes = own[collapsible]
+            children[2 * nodes] = nodes
+            children[2 * nodes + 1] = nodes
+        return self._rebuilt(children, np.arange(self.n_trees))
+
+    def _rebuilt(self, children: np.ndarray, tree_ids: np.ndarray) -> "FlatForest":
+        """Keep the nodes reachable from the given trees' roots and renumber them."""
+        left, right = children[0::2], children[1::2]
+        reachable = np.zeros(self.n_nodes, dtype=bool)
+        frontier = self.roots[tree_ids]
+        reachable[frontier] = True
+        depth = 0
+        while True:
+            nxt = np.unique(np.concatenate([left[frontier], right[frontier]]))
+            nxt = nxt[~reachable[nxt]]
+            if nxt.size == 0:
+                break
+            reachable[nxt] = True
+            frontier = nxt
+            depth += 1
+
+        # Ascending order keeps each tree's nodes contiguous and trees in order
+        keep = np.flatnonzero(reachable)
+        new_index = np.full(self.n_nodes, -1, dtype=np.intp)
+        new_index[keep] = np.arange(len(keep))
+        return FlatForest(
+            feature=self.feature[keep],
+            threshold=self.threshold[keep],
+            left=new_index[left[keep]].astype(self._children.dtype),
+            right=new_index[right[keep]].astype(self._children.dtype),
+            value=self.value[keep],
+            roots=new_index[self.roots[tree_ids]].astype(self.roots.dtype),
+            max_depth=depth,
+            classes=self.classes,
+            n_features=self.n_features
+        )
+
+    def prune(
+        self,
+        X_val: Optional[np.ndarray] = None,
+        y_val: Optional[np.ndarray] = None,
+        max_accuracy_loss: float = 0.0,
+        leaf_tolerance: float = 0.0,
+        max_probability_diff: float = 0.02
+    ) -> "FlatForest":
+        """
+        Smaller forest within a tolerated validation accuracy loss.
+
+        Trees of a random forest are independent bootstrap fits, so the
+        first k trees form an unbiased smaller forest; the smallest k is kept
+        whose validation accuracy is within max_accuracy_loss of the full
+        forest and whose flood probabilities stay within
+        max_probability_diff (mean absolute difference) of it, so risk
+        levels derived from the probability do not drift.
+
+        Args:
+            X_val, y_val: Validation rows (raw features) and labels; needed
+                for tree pruning
+            max_accuracy_loss: Accuracy (fraction) tree pruning may lose on
+                the validation set (0 keeps every tree)
+            leaf_tolerance: See collapse_leaves (0 keeps every split)
+            max_probability_diff: Mean |Δp| tree pruning may introduce
+
+        Returns:
+            Pruned FlatForest (self when nothing is pruned)
+        """
+        forest = self.collapse_leaves(leaf_tolerance) if leaf_tolerance > 0 else self
+        if X_val is None or y_val is None or max_accuracy_loss <= 0:
+            return forest
+
+        y_val = np.asarray(y_val)
+        per_tree = forest.value[forest.apply(X_val)]  # (n_rows, n_trees, n_classes)
+
+        # Probabilities / accuracy of the first-k forest for every k at once
+        proba = np.cumsum(per_tree, axis=1) / np.arange(1, forest.n_trees + 1)[None, :, None]
+        accuracy = np.mean(forest.classes[np.argmax(proba, axis=2)] == y_val[:, None], axis=0)
+        drift = np.mean(np.abs(proba - proba[:, -1:, :]).max(axis=2), axis=0)
+        within = np.flatnonzero(
+            (accuracy >= accuracy[-1] - max_accuracy_loss) & (drift <= max_probability_diff)
+        )
+        n_keep = int(within[0]) + 1
+        if n_keep >= forest.n_trees:
+            return forest
+        return forest.select_trees(np.arange(n_keep))
+
+    def compact(self) -> "FlatForest":
+        """Copy with float32 values and int32 indices (thresholds stay float64, see module docstring)."""
+        return FlatForest(
+            feature=self.feature.astype(np.int32),
+            threshold=self.threshold.astype(np.float64),
+            left=self.left.astype(np.int32),
+            right=self.right.astype(np.int32),
+            value=self.value.astype(np.float32),
+            roots=self.roots.astype(np.int32),
+            max_depth=self.max_depth,
+            classes=self.classes,
+            n_features=self.n_features
+        )
+
+    def save(self, path: str) -> None:
+        """Write the arrays as an .npz artifact (atomically replaced)."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                feature=self.feature,
+                threshold=self.threshold,
+                children=self._children,
+                value=self.value,
+                roots=self.roots,
+                classes=self.classes,
+                shape=np.array([self.max_depth, self.n_features]),
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "FlatForest":
+        """Load an artifact written by save(), keeping its dtypes."""
+        with np.load(path) as data:
+            children = data["children"]
+            max_depth, n_features = data["shape"].tolist()
+            if data["threshold"].dtype != np.float64:
+                print(f"⚠️ {path} has {data['threshold'].dtype} thresholds and can disagree with "
+                      f"sklearn near splits; re-export it with export_compact()")
+            return cls(
+                feature=data["feature"],
+                threshold=data["threshold"],
+                left=children[0::2],
+                right=children[1::2],
+                value=data["value"],
+                roots=data["roots"],
+                max_depth=max_depth,
+                classes=data["classes"],
+                n_features=n_features
+            )
+
+
+# =============================================================================
+# Parity check & benchmark
+# =============================================================================
+
+def _synthetic_flood_data(n_samples: int, seed: int = 42) -> Tuple[np.ndarray, np.ndarray]:
+    """Synthetic feature matrix in the FEATURE_NAMES layout (as in rf_flood_classifier)."""
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([
+        rng.gamma(2, 30, n_samples),       # rainfall_today
+        rng.gamma(2, 60, n_samples),       # rainfall_2day_sum
+        rng.gamma(2, 90, n_samples),       # rainfall_3day_sum
+        rng.gamma(2, 30, n_samples),       # rainfall_week_avg
+        rng.gamma(3, 40, n_samples),       # rainfall_week_max
+        rng.uniform(40, 110, n_samples),   # prev_river_level
+        rng.normal(0, 5, n_samples),       # level_change_rate
+        rng.gamma(2, 30, n_samples),       # soil_saturation_proxy
+        rng.integers(0, 14, n_samples),    # days_since_heavy_rain
+    ])
+    y = ((X[:, 2] > 150) & (X[:, 5] > 70)).astype(int)
+    return X, y
+
+
+def _reference_saabas(forest: Any, X_scaled: np.ndarray, class_index: int = 1) -> np.ndarray:
+    """Decision-path attributions walked tree by tree with sklearn's own decision_path."""
+    contributions = np.zeros(X_scaled.shape)
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        value = tree.value[:, 0, :] / tree.value[:, 0, :].sum(axis=1, keepdims=True)
+        paths = estimator.decision_path(X_scaled.astype(np.float32))
+        for row in range(len(X_scaled)):
+            path = paths.indices[paths.indptr[row]:paths.indptr[row + 1]]
+            for parent, child in zip(path[:-1], path[1:]):
+                contributions[row, tree.feature[parent]] += value[child, class_index] - value[parent, class_index]
+    return contributions / len(forest.estimators_)
+
+
+def _split_boundary_rows(classifier: Any, X: np.ndarray, n_splits: int = 200, seed: int = 0) -> np.ndarray:
+    """
+    Rows of X with one feature moved next to a split: onto the float32
+    values either side of the threshold and a quarter of the way between
+    them, i.e. inputs whose route depends on float32 rounding.
+    """
+    rng = np.random.default_rng(seed)
+    splits = [
+        (int(tree.feature[node]), float(tree.threshold[node]))
+        for tree in (estimator.tree_ for estimator in classifier.model.estimators_)
+        for node in np.flatnonzero(tree.children_left != _TREE_LEAF)
+    ]
+    scaler = classifier.scaler
+    # Same scaler handling as FlatForest.from_sklearn
+    mean = np.zeros(X.shape[1])
+    scale = np.ones(X.shape[1])
+    if scaler.with_mean and scaler.mean_ is not None:
+        mean = np.asarray(scaler.mean_, dtype=np.float64)
+    if scaler.with_std and scaler.scale_ is not None:
+        scale = np.asarray(scaler.scale_, dtype=np.float64)
+
+    rows = []
+    for i, index in enumerate(rng.choice(len(splits), size=min(n_splits, len(splits)), replace=False)):
+        feature, threshold = splits[index]
+        below = np.float32(threshold)
+        if below > threshold:
+            below = np.nextafter(below, np.float32(-np.inf))
+        above = np.nextafter(below, np.float32(np.inf))
+        step = float(above) - float(below)
+        for scaled in (float(below), float(below) + step / 4, float(above) - step / 4, float(above)):
+            row = X[i % len(X)].astype(np.float64)
+            row[feature] = scaled * scale[feature] + mean[feature]
+            rows.append(row)
+    return np.array(rows)
+
+
+def check_parity(classifier: Any, X: np.ndarray) -> Dict:
+    """
+    Compare FlatForest, and its compact (int32 / float32) copy, against
+    sklearn (scaler.transform + predict_proba) on X plus rows placed on the
+    split thresholds.
+    """
+    engine = FlatForest.from_sklearn(classifier.model, classifier.scaler)
+    X_all = np.vstack([X, _split_boundary_rows(classifier, X)])
+    expected = classifier.model.predict_proba(classifier.scaler.transform(X_all))
+    expected_labels = classifier.model.classes_[np.argmax(expected, axis=1)]
+    labels, proba = engine.predict(X_all)
+    compact_labels, compact_proba = engine.compact().predict(X_all)
+
+    # Attributions: additivity and agreement with a per-tree reference walk
+    _, bias, contributions = engine.predict_contributions(X)
+    sample = X[:50]
+    reference = _reference_saabas(classifier.model, classifier.scaler.transform(sample))
+    return {
+        "rows": len(X_all),
+        "max_abs_diff": float(np.max(np.abs(proba - expected))),
+        "label_mismatches": int(np.sum(labels != expected_labels)),
+        "compact_max_abs_diff": float(np.max(np.abs(compact_proba - expected))),
+        "compact_label_mismatches": int(np.sum(compact_labels != expected_labels)),
+        "attribution_additivity_error": float(np.max(np.abs(bias + contributions.sum(axis=1) - proba[:len(X), 1]))),
+        "attribution_reference_diff": float(np.max(np.abs(contributions[:len(sample)] - reference))),
+    }
+
+
+def benchmark_flat_forest(n_rows: int = 1000, repeats: int = 5, model_paths: Optional[list] = None) -> Dict:
+    """Parity against sklearn plus 1-row / N-row latency of both engines."""
+    from ml.rf_flood_classifier import RandomForestFloodClassifier
+
+    print("\n" + "=" * 60)
+    print("⏱️  Flat-array forest engine vs sklearn predict_proba")
+    print("=" * 60)
+
+    X_train, y_train = _synthetic_flood_data(2000)
+    classifier = RandomForestFloodClassifier(n_estimators=100, max_depth=10)
+    classifier.train(X_train, y_train)
+    X, _ = _synthetic_flood_data(n_rows, seed=7)
+
+    parity = {"synthetic": check_parity(classifier, X)}
+    for path in model_paths or []:
+        loaded = RandomForestFloodClassifier(model_path=path)
+        if loaded.is_trained:
+            parity[path] = check_parity(loaded, X)
+    for name, result in parity.items():
+        print(f"   Parity [{name}]: max |Δp| = {result['max_abs_diff']:.2e}, "
+              f"label mismatches {result['label_mismatches']}/{result['rows']}, "
+              f"compact max |Δp| = {result['compact_max_abs_diff']:.2e} "
+              f"({result['compact_label_mismatches']} mismatches), "
+              f"attributions: additivity {result['attribution_additivity_error']:.1e}, "
+              f"vs reference {result['attribution_reference_diff']:.1e}")
+
+    engine = FlatForest.from_sklearn(classifier.model, classifier.scaler)
+    forest, scaler = classifier.model, classifier.scaler
+
+    def best_of(fn, inner: int = 1):
+        timings = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            for _ in range(inner):
+                fn()
+            timings.append((time.perf_counter() - t0) / inner)
+        return min(timings)
+
+    one = X[:1]
+    results = {
+        "parity": parity,
+        "trees": engine.n_trees,
+        "nodes": engine.n_nodes,
+        "engine_bytes": engine.nbytes,
+        "single_sklearn_ms": best_of(lambda: forest.predict_proba(scaler.transform(one)), 20) * 1e3,
+        "single_flat_ms": best_of(lambda: engine.predict(one), 200) * 1e3,
+        "batch_rows": n_rows,
+        "batch_sklearn_ms": best_of(lambda: forest.predict_proba(scaler.transform(X))) * 1e3,
+        "batch_flat_ms": best_of(lambda: engine.predict(X)) * 1e3,
+        "single_attributions_ms": best_of(lambda: engine.predict_contributions(one), 200) * 1e3,
+        "batch_attributions_ms": best_of(lambda: engine.predict_contributions(X)) * 1e3,
+        "batch_reference_attributions_ms": best_of(
+            lambda: _reference_saabas(forest, scaler.transform(X[:100])), 1
+        ) * 1e3 * n_rows / 100,
+    }
+    print(f"   Forest: {results['trees']} trees, {results['nodes']} nodes, {results['engine_bytes'] / 1024:.0f} KiB")
+    print(f"   1 row:      sklearn {results['single_sklearn_ms']:.2f}ms | flat {results['single_flat_ms']:.3f}ms "
+          f"({results['single_sklearn_ms'] / results['single_flat_ms']:.0f}x)")
+    print(f"   {n_rows} rows: sklearn {results['batch_sklearn_ms']:.2f}ms | flat {results['batch_flat_ms']:.2f}ms "
+          f"({results['batch_sklearn_ms'] / results['batch_flat_ms']:.1f}x)")
+    print(f"   Attributions: 1 row {results['single_attributions_ms']:.3f}ms | "
+          f"{n_rows} rows {results['batch_attributions_ms']:.2f}ms "
+          f"(per-tree decision_path walk: ~{results['batch_reference_attributions_ms']:.0f}ms)")
+    return results
+
+
+if __name__ == "__main__":
+    import glob
+    import sys
+
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, backend_dir)
+    artifacts = sorted(
+        path for path in glob.glob(os.path.join(backend_dir, "models", "rf_flood_*.joblib"))
+        if not path.endswith("_scaler.joblib")
+    )
+    benchmark_flat_forest(model_paths=artifacts)
@@ -101,12 +101,13 @@ class LSTMFloodModel:
         if self.scaler:
             features = self.scaler.fit_transform(features) if fit_scaler else self.scaler.transform(features)
 
-        X, y = [], []
-        for i in range(self.sequence_length, len(features) - 1):
-            X.append(features[i - self.sequence_length:i])
-            y.append(features[i + 1, 1])
+        # Strided window views instead of per-window copies; window i covers
+        # rows i .. i+sequence_length-1 and targets row i+sequence_length+1
+        windows = max(len(features) - 1 - self.sequence_length, 0)
+        X = np.lib.stride_tricks.sliding_window_view(features, self.sequence_length, axis=0)[:windows]
+        y = features[self.sequence_length + 1:self.sequence_length + 1 + windows, 1]
 
-        return np.array(X), np.array(y)
+        return X.transpose(0, 2, 1), y
 
     # ---------- Training ----------
 
@@ -8,6 +8,7 @@ Architecture:
 - Multi-horizon forecasting (1-72 hours)
 - Uncertainty quantification via MC Dropout
 - Ensemble with Random Forest for robust predictions
+- Optional TorchScript / dynamic int8 CPU runtimes (see export_runtime)
 
 Author: Alert-AID Team
 Hackathon: AI for Disaster Management
@@ -16,12 +17,46 @@ Hackathon: AI for Disaster Management
 import numpy as np
 import torch
 import torch.nn as nn
-from torch.utils.data import DataLoader, TensorDataset
-from typing import Tuple, Dict, List, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 import os
 import json
+import time
+import copy
+import warnings
 from datetime import datetime
 
+# Inference runtimes: eager float32 (the trained module), TorchScript-scripted
+# float32, and TorchScript-scripted with dynamic int8 LSTM / Linear weights.
+# Scripting (not tracing) keeps dropout switchable, so MC dropout still works.
+RUNTIMES = ("eager", "torchscript", "int8")
+
+# File written into a training checkpoint directory (see train(checkpoint_dir=...))
+TRAINING_CHECKPOINT = "lstm_training_checkpoint.pt"
+
+
+def runtime_artifact_path(path: str, runtime: str) -> str:
+    """Artifact of a runtime next to a .pt checkpoint (lstm_flood_x.int8.pt); the checkpoint itself for eager."""
+    if runtime == "eager":
+        return path
+    root = path[:-len(".pt")] if path.endswith(".pt") else path
+    return f"{root}.{runtime}.pt"
+
+
+def _atomic_save(save: Callable, obj, path: str) -> None:
+    """save(obj, tmp) then rename over path, so readers never see a partial file."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        save(obj, tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _stat(value):
+    """Normalisation statistic read from a checkpoint: float, or array for per-river statistics."""
+    return np.array(value) if isinstance(value, list) else float(value)
+
 
 class AttentionLayer(nn.Module):
     """
@@ -37,7 +72,7 @@ class AttentionLayer(nn.Module):
             nn.Softmax(dim=1)
         )
     
-    def forward(self, lstm_output: torch.Tensor) -> torch.Tensor:
+    def forward(self, lstm_output: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
         # lstm_output: (batch, seq_len, hidden*2)
         attention_weights = self.attention(lstm_output)  # (batch, seq_len, 1)
         context = torch.sum(attention_weights * lstm_output, dim=1)  # (batch, hidden*2)
@@ -147,8 +182,22 @@ class LSTMFloodPredictor:
         num_layers: int = 2,
         dropout: float = 0.3,
         output_horizons: int = 24,
-        device: str = None
+        device: str = None,
+        runtime: str = "eager"
     ):
+        """
+        Args:
+            sequence_length: Time steps per input sequence
+            hidden_size: LSTM hidden units per direction
+            num_layers: Stacked LSTM layers
+            dropout: Dropout rate (also used for MC dropout at inference)
+            output_horizons: Hours predicted per sequence
+            device: torch device (default: cuda if available)
+            runtime: Inference runtime used after load(): "eager",
+                "torchscript" or "int8" (CPU only; see export_runtime)
+        """
+        if runtime not in RUNTIMES:
+            raise ValueError(f"Unknown runtime '{runtime}'. Available: {RUNTIMES}")
         self.sequence_length = sequence_length
         self.hidden_size = hidden_size
         self.num_layers = num_layers
@@ -160,6 +209,9 @@ class LSTMFloodPredictor:
             self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         else:
             self.device = torch.device(device)
+        self.runtime = runtime
+        if runtime != "eager":
+            self.device = torch.device("cpu")
         
         self.model = None
         self.feature_names = []
@@ -191,18 +243,28 @@ class LSTMFloodPredictor:
         X: np.ndarray, 
         y: np.ndarray
     ) -> Tuple[np.ndarray, np.ndarray]:
-        """Create sequences for LSTM training."""
-        sequences = []
-        targets = []
+        """
+        Create sequences for LSTM training.
         
-        for i in range(len(X) - self.sequence_length - self.output_horizons + 1):
-            seq = X[i:i + self.sequence_length]
-            target = y[i + self.sequence_length:i + self.sequence_length + self.output_horizons]
-            if len(target) == self.output_horizons:
-                sequences.append(seq)
-                targets.append(target)
+        Window i is X[i:i + sequence_length] with targets
+        y[i + sequence_length:i + sequence_length + output_horizons]. Both are
+        read-only strided views of X / y (no copy); take minibatches with _batch.
         
-        return np.array(sequences), np.array(targets)
+        Returns:
+            Tuple of (X windows (n, seq, features), y windows (n, horizons))
+        """
+        X, y = np.asarray(X), np.asarray(y)
+        windows = max(len(X) - self.sequence_length - self.output_horizons + 1, 0)
+        if windows == 0:
+            return (
+                np.empty((0, self.sequence_length) + X.shape[1:], dtype=X.dtype),
+                np.empty((0, self.output_horizons), dtype=y.dtype)
+            )
+        X_win = np.lib.stride_tricks.sliding_window_view(X, self.sequence_length, axis=0)[:windows]
+        y_win = np.lib.stride_tricks.sliding_window_view(y, self.output_horizons)[
+            self.sequence_length:self.sequence_length + windows
+        ]
+        return X_win.transpose(0, 2, 1), y_win
     
     def _normalize(self, X: np.ndarray, y: np.ndarray = None, fit: bool = True):
         """Normalize features and targets."""
@@ -231,7 +293,10 @@ class LSTMFloodPredictor:
         batch_size: int = 32,
         learning_rate: float = 0.001,
         early_stopping_patience: int = 15,
-        verbose: bool = True
+        verbose: bool = True,
+        checkpoint_dir: Optional[str] = None,
+        checkpoint_every: int = 5,
+        resume_from: Optional[str] = None
     ) -> Dict:
         """
         Train the LSTM model.
@@ -247,11 +312,17 @@ class LSTMFloodPredictor:
             learning_rate: Learning rate
             early_stopping_patience: Early stopping patience
             verbose: Print training progress
+            checkpoint_dir: Directory for a resumable training checkpoint
+                (model, optimizer, scheduler, normalisation, history)
+            checkpoint_every: Checkpoint every N epochs (and when training ends)
+            resume_from: Checkpoint file or directory to continue training from;
+                pass the same data and epochs as the interrupted run
         
         Returns:
             Training history dictionary
         """
         self.feature_names = feature_names or [f"feature_{i}" for i in range(X_train.shape[1])]
+        checkpoint = self._load_training_checkpoint(resume_from, "train") if resume_from else None
         
         if verbose:
             print(f"\n🏋️ Training LSTM Flood Predictor...")
@@ -260,10 +331,10 @@ class LSTMFloodPredictor:
             print(f"   Sequence length: {self.sequence_length}")
             print(f"   Output horizons: {self.output_horizons}")
         
-        # Normalize data
-        X_train_norm, y_train_norm = self._normalize(X_train, y_train, fit=True)
+        # Normalize data (a resumed run keeps the statistics it started with)
+        X_train_norm, y_train_norm = self._normalize(X_train, y_train, fit=checkpoint is None)
         
-        # Create sequences
+        # Create sequences (window views; minibatches are copied out by _batch)
         X_seq, y_seq = self._create_sequences(X_train_norm, y_train_norm)
         
         if len(X_seq) < batch_size:
@@ -273,30 +344,73 @@ class LSTMFloodPredictor:
         # Build model
         self._build_model(X_train.shape[1])
         
-        # Convert to tensors
-        X_tensor = torch.FloatTensor(X_seq).to(self.device)
-        y_tensor = torch.FloatTensor(y_seq).to(self.device)
-        
-        # DataLoader
-        dataset = TensorDataset(X_tensor, y_tensor)
-        loader = DataLoader(dataset, batch_size=batch_size, shuffle=True)
-        
         # Validation data
+        train_rows = np.arange(len(X_seq))
         if X_val is not None and y_val is not None:
             X_val_norm = self._normalize(X_val, fit=False)
             X_val_seq, y_val_seq = self._create_sequences(X_val_norm, (y_val - self.target_mean) / self.target_std)
-            X_val_tensor = torch.FloatTensor(X_val_seq).to(self.device)
-            y_val_tensor = torch.FloatTensor(y_val_seq).to(self.device)
+            val_rows = np.arange(len(X_val_seq))
         else:
             # Use last 20% as validation
-            split = int(len(X_tensor) * 0.8)
-            X_val_tensor = X_tensor[split:]
-            y_val_tensor = y_tensor[split:]
-            X_tensor = X_tensor[:split]
-            y_tensor = y_tensor[:split]
-            dataset = TensorDataset(X_tensor, y_tensor)
-            loader = DataLoader(dataset, batch_size=batch_size, shuffle=True)
+            split = int(len(X_seq) * 0.8)
+            X_val_seq, y_val_seq = X_seq, y_seq
+            train_rows, val_rows = train_rows[:split], train_rows[split:]
+        val_windows = [(X_val_seq, y_val_seq, val_rows, None)]
+        
+        history, best_val_loss, epochs_done = self._fit_windows(
+            X_seq, y_seq, train_rows, val_windows, None, "train",
+            epochs, batch_size, learning_rate, early_stopping_patience, verbose,
+            checkpoint_dir, checkpoint_every, checkpoint
+        )
+        self.is_trained = True
+        self.training_history = history
+        
+        # Final metrics
+        final = self._evaluate_windows(val_windows, batch_size)
+        final_mae, final_rmse, r2_score = final["mae"], final["rmse"], final["r2"]
+        
+        self.metadata = {
+            "trained_on": datetime.now().isoformat(),
+            "epochs_trained": epochs_done,
+            "best_val_loss": best_val_loss,
+            "final_mae": float(final_mae),
+            "final_rmse": float(final_rmse),
+            "r2_score": float(r2_score),
+            "device": str(self.device),
+            "architecture": self._architecture()
+        }
+        
+        if verbose:
+            print(f"\n✅ LSTM Training Complete!")
+            print(f"   MAE: {final_mae:.2f}m | RMSE: {final_rmse:.2f}m | R²: {r2_score:.4f}")
         
+        return history
+    
+    def _fit_windows(
+        self,
+        X_seq: np.ndarray,
+        y_seq: np.ndarray,
+        train_rows: np.ndarray,
+        val_windows: List[Tuple],
+        window_rivers: Optional[np.ndarray],
+        mode: str,
+        epochs: int,
+        batch_size: int,
+        learning_rate: float,
+        early_stopping_patience: int,
+        verbose: bool,
+        checkpoint_dir: Optional[str],
+        checkpoint_every: int,
+        checkpoint: Optional[Dict]
+    ) -> Tuple[Dict, float, int]:
+        """
+        Epoch loop of train(): shuffled minibatches of the train_rows windows,
+        validation on val_windows (see _evaluate_windows), LR schedule, early
+        stopping and checkpoints. Leaves the best weights loaded.
+        
+        Returns:
+            Tuple of (history, best validation loss, epochs done)
+        """
         # Loss and optimizer
         criterion = nn.MSELoss()
         optimizer = torch.optim.AdamW(self.model.parameters(), lr=learning_rate, weight_decay=1e-4)
@@ -306,34 +420,38 @@ class LSTMFloodPredictor:
         
         # Training loop
         best_val_loss = float('inf')
+        best_state = None
         patience_counter = 0
         history = {'train_loss': [], 'val_loss': [], 'val_mae': []}
+        start_epoch, stopped = 0, False
+        if checkpoint is not None:
+            start_epoch, best_val_loss, best_state, patience_counter, history, stopped = self._resume_training(
+                checkpoint, optimizer, scheduler, verbose=verbose
+            )
+        epochs_done = start_epoch
         
-        for epoch in range(epochs):
+        for epoch in range(start_epoch, start_epoch if stopped else epochs):
             # Training
             self.model.train()
-            train_loss = 0
-            for batch_X, batch_y in loader:
+            train_loss, n_batches = 0.0, 0
+            order = train_rows[torch.randperm(len(train_rows)).numpy()]
+            for i in range(0, len(order), batch_size):
+                rows = order[i:i + batch_size]
+                batch_X, batch_y = self._batch(X_seq, y_seq, rows)
                 optimizer.zero_grad()
-                pred, _, _ = self.model(batch_X)
+                pred, _, _ = self._forward(batch_X, window_rivers[rows] if window_rivers is not None else None)
                 loss = criterion(pred, batch_y)
                 loss.backward()
                 torch.nn.utils.clip_grad_norm_(self.model.parameters(), max_norm=1.0)
                 optimizer.step()
                 train_loss += loss.item()
+                n_batches += 1
             
-            train_loss /= len(loader)
+            train_loss /= max(n_batches, 1)
             
             # Validation
-            self.model.eval()
-            with torch.no_grad():
-                val_pred, _, _ = self.model(X_val_tensor)
-                val_loss = criterion(val_pred, y_val_tensor).item()
-                
-                # Denormalize for MAE
-                val_pred_denorm = val_pred.cpu().numpy() * self.target_std + self.target_mean
-                y_val_denorm = y_val_tensor.cpu().numpy() * self.target_std + self.target_mean
-                val_mae = np.mean(np.abs(val_pred_denorm - y_val_denorm))
+            val = self._evaluate_windows(val_windows, batch_size)
+            val_loss, val_mae = val["loss"], val["mae"]
             
             history['train_loss'].append(train_loss)
             history['val_loss'].append(val_loss)
@@ -346,60 +464,427 @@ class LSTMFloodPredictor:
                 best_val_loss = val_loss
                 patience_counter = 0
                 # Save best model state
-                self.best_model_state = self.model.state_dict().copy()
+                best_state = self._snapshot_state()
             else:
                 patience_counter += 1
             
             if verbose and (epoch + 1) % 10 == 0:
                 print(f"   Epoch {epoch+1}/{epochs} | Train Loss: {train_loss:.4f} | Val Loss: {val_loss:.4f} | Val MAE: {val_mae:.2f}m")
             
-            if patience_counter >= early_stopping_patience:
+            epochs_done = epoch + 1
+            stopped = patience_counter >= early_stopping_patience
+            if checkpoint_dir and (epochs_done % checkpoint_every == 0 or stopped or epochs_done == epochs):
+                self._save_training_checkpoint(
+                    checkpoint_dir, mode, epochs_done, optimizer, scheduler,
+                    best_state, best_val_loss, patience_counter, history, stopped
+                )
+            
+            if stopped:
                 if verbose:
                     print(f"   Early stopping at epoch {epoch+1}")
                 break
         
         # Load best model
-        self.model.load_state_dict(self.best_model_state)
-        self.is_trained = True
-        self.training_history = history
+        self.model.load_state_dict(best_state)
+        return history, best_val_loss, epochs_done
+    
+    def _forward(
+        self,
+        X: torch.Tensor,
+        rivers: Optional[np.ndarray] = None
+    ) -> Tuple[torch.Tensor, torch.Tensor, Optional[torch.Tensor]]:
+        """Model forward pass with attention; rivers (one index per row) is unused by the single-river model."""
+        return self.model(X, return_attention=True)
+    
+    def _target_stats(self, rivers: Optional[np.ndarray] = None):
+        """Target (mean, std) to denormalise rows with; scalars for the single-river model."""
+        return self.target_mean, self.target_std
+    
+    def _config(self) -> Dict:
+        """Constructor settings stored in the checkpoint."""
+        return {
+            "sequence_length": self.sequence_length,
+            "hidden_size": self.hidden_size,
+            "num_layers": self.num_layers,
+            "dropout": self.dropout,
+            "output_horizons": self.output_horizons
+        }
+    
+    def _apply_config(self, config: Dict) -> None:
+        """Restore the constructor settings of a checkpoint (before the model is rebuilt)."""
+        self.sequence_length = config["sequence_length"]
+        self.hidden_size = config["hidden_size"]
+        self.num_layers = config["num_layers"]
+        self.dropout = config["dropout"]
+        self.output_horizons = config["output_horizons"]
+    
+    def _architecture(self) -> Dict:
+        """Architecture summary stored in the training metadata."""
+        return {
+            "type": "Bidirectional LSTM + Attention",
+            "hidden_size": self.hidden_size,
+            "num_layers": self.num_layers,
+            "dropout": self.dropout,
+            "sequence_length": self.sequence_length,
+            "output_horizons": self.output_horizons,
+            "parameters": sum(p.numel() for p in self.model.parameters())
+        }
+    
+    # =========================================================================
+    # Training checkpoints
+    # =========================================================================
+    
+    def _snapshot_state(self) -> Dict[str, torch.Tensor]:
+        """
+        Independent copy of the model weights. state_dict() tensors alias the
+        live parameters, so keeping state_dict() (or its shallow .copy()) as
+        the "best" state would track every later optimizer step.
+        """
+        return {k: v.detach().clone() for k, v in self.model.state_dict().items()}
+    
+    def _save_training_checkpoint(
+        self,
+        checkpoint_dir: str,
+        mode: str,
+        epochs_done: int,
+        optimizer: torch.optim.Optimizer,
+        scheduler,
+        best_state: Optional[Dict[str, torch.Tensor]],
+        best_val_loss: float,
+        patience_counter: int,
+        history: Dict,
+        stopped: bool,
+        rng: Optional[np.random.Generator] = None
+    ) -> str:
+        """Write everything needed to continue training after epochs_done (atomically)."""
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        path = os.path.join(checkpoint_dir, TRAINING_CHECKPOINT)
+        checkpoint = {
+            "mode": mode,
+            "epochs_done": epochs_done,
+            "stopped": stopped,
+            "model_state": self.model.state_dict(),
+            "best_state": best_state,
+            "optimizer_state": optimizer.state_dict(),
+            "scheduler_state": scheduler.state_dict(),
+            "best_val_loss": best_val_loss,
+            "patience_counter": patience_counter,
+            "history": history,
+            "scaler_mean": self.scaler_mean.tolist(),
+            "scaler_std": self.scaler_std.tolist(),
+            "target_mean": np.asarray(self.target_mean).tolist(),
+            "target_std": np.asarray(self.target_std).tolist(),
+            "feature_names": self.feature_names,
+            "architecture": self._architecture(),
+            "torch_rng_state": torch.get_rng_state(),
+            "numpy_rng_state": rng.bit_generator.state if rng is not None else None,
+            "saved_on": datetime.now().isoformat(),
+        }
         
-        # Final metrics
+        # An interruption mid-write leaves the previous checkpoint intact
+        _atomic_save(torch.save, checkpoint, path)
+        return path
+    
+    def _load_training_checkpoint(self, resume_from: str, mode: str) -> Dict:
+        """Read a training checkpoint and restore its normalisation statistics and feature names."""
+        path = os.path.join(resume_from, TRAINING_CHECKPOINT) if os.path.isdir(resume_from) else resume_from
+        checkpoint = torch.load(path, map_location=self.device, weights_only=False)
+        if checkpoint["mode"] != mode:
+            raise ValueError(f"{path} is a {checkpoint['mode']} checkpoint; cannot resume {mode} training from it")
+        self.scaler_mean = np.array(checkpoint["scaler_mean"])
+        self.scaler_std = np.array(checkpoint["scaler_std"])
+        self.target_mean = _stat(checkpoint["target_mean"])
+        self.target_std = _stat(checkpoint["target_std"])
+        self.feature_names = checkpoint["feature_names"]
+        return checkpoint
+    
+    def _resume_training(
+        self,
+        checkpoint: Dict,
+        optimizer: torch.optim.Optimizer,
+        scheduler,
+        rng: Optional[np.random.Generator] = None,
+        verbose: bool = True
+    ) -> Tuple[int, float, Optional[Dict[str, torch.Tensor]], int, Dict, bool]:
+        """
+        Load a checkpoint's model / optimizer / scheduler / RNG state into a
+        freshly built model.
+        
+        Returns:
+            Tuple of (epochs done, best val loss, best state, patience counter, history, stopped)
+        """
+        if checkpoint["architecture"] != self._architecture():
+            raise ValueError(
+                f"Checkpoint architecture {checkpoint['architecture']} does not match {self._architecture()}"
+            )
+        self.model.load_state_dict(checkpoint["model_state"])
+        optimizer.load_state_dict(checkpoint["optimizer_state"])
+        scheduler.load_state_dict(checkpoint["scheduler_state"])
+        torch.set_rng_state(checkpoint["torch_rng_state"].cpu())
+        if rng is not None and checkpoint["numpy_rng_state"] is not None:
+            rng.bit_generator.state = checkpoint["numpy_rng_state"]
+        if verbose:
+            print(f"   ↩️ Resuming after epoch {checkpoint['epochs_done']} "
+                  f"(best val loss {checkpoint['best_val_loss']:.4f}, saved {checkpoint['saved_on']})")
+        return (
+            checkpoint["epochs_done"], checkpoint["best_val_loss"], checkpoint["best_state"],
+            checkpoint["patience_counter"], checkpoint["history"], checkpoint["stopped"]
+        )
+    
+    def _stream_sequences(
+        self,
+        source: Callable[[], Iterable[Tuple[np.ndarray, np.ndarray]]]
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Normalised (sequence, target) windows of a chunked stream, as _create_sequences
+        would build them from the concatenated data. Windows straddling a chunk
+        boundary are completed from a carried tail of sequence_length +
+        output_horizons - 1 rows; they are strided views of the current chunk.
+        
+        Yields:
+            Tuples of (X windows (n, seq, features), y windows (n, horizons), window start rows)
+        """
+        span = self.sequence_length + self.output_horizons - 1
+        X_tail = y_tail = None
+        offset = 0  # stream row of the first buffered row
+        for X, y in source():
+            X_norm, y_norm = self._normalize(np.asarray(X, dtype=float), np.asarray(y, dtype=float), fit=False)
+            X_buf = X_norm if X_tail is None else np.concatenate([X_tail, X_norm])
+            y_buf = y_norm if y_tail is None else np.concatenate([y_tail, y_norm])
+            windows = len(X_buf) - span
+            if windows > 0:
+                X_win, y_win = self._create_sequences(X_buf, y_buf)
+                yield X_win, y_win, offset + np.arange(windows)
+                X_buf, y_buf = X_buf[windows:], y_buf[windows:]
+                offset += windows
+            X_tail, y_tail = X_buf, y_buf
+    
+    def _batch(self, X_win: np.ndarray, y_win: np.ndarray, rows: np.ndarray) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Copy the selected windows into a float32 minibatch on the device."""
+        return (
+            torch.from_numpy(np.ascontiguousarray(X_win[rows], dtype=np.float32)).to(self.device),
+            torch.from_numpy(np.ascontiguousarray(y_win[rows], dtype=np.float32)).to(self.device)
+        )
+    
+    def _evaluate_stream(
+        self,
+        source: Callable[[], Iterable[Tuple[np.ndarray, np.ndarray]]],
+        first_window: int,
+        batch_size: int
+    ) -> Dict:
+        """Validation metrics (see _evaluate_windows) over the stream's windows starting at or after first_window."""
+        return self._evaluate_windows(
+            (
+                (X_win, y_win, np.flatnonzero(starts >= first_window), None)
+                for X_win, y_win, starts in self._stream_sequences(source)
+            ),
+            batch_size
+        )
+    
+    def _evaluate_windows(
+        self,
+        windows: Iterable[Tuple[np.ndarray, np.ndarray, np.ndarray, Optional[np.ndarray]]],
+        batch_size: int
+    ) -> Dict:
+        """
+        Validation metrics over (X windows, y windows, selected rows, river of
+        each window or None) groups, accumulated batch by batch (normalised
+        MSE, and MAE / RMSE / R² in meters).
+        """
+        count = 0
+        sq_norm = abs_err = sq_err = y_sum = y_sq_sum = 0.0
         self.model.eval()
         with torch.no_grad():
-            val_pred, _, _ = self.model(X_val_tensor)
-            val_pred_denorm = val_pred.cpu().numpy() * self.target_std + self.target_mean
-            y_val_denorm = y_val_tensor.cpu().numpy() * self.target_std + self.target_mean
+            for X_win, y_win, rows, window_rivers in windows:
+                for i in range(0, len(rows), batch_size):
+                    batch_rows = rows[i:i + batch_size]
+                    rivers = window_rivers[batch_rows] if window_rivers is not None else None
+                    batch_X, batch_y = self._batch(X_win, y_win, batch_rows)
+                    pred, _, _ = self._forward(batch_X, rivers)
+                    sq_norm += float(((pred - batch_y) ** 2).sum())
+                    target_mean, target_std = self._target_stats(rivers)
+                    pred_m = pred.cpu().numpy().astype(float) * target_std + target_mean
+                    y_m = batch_y.cpu().numpy().astype(float) * target_std + target_mean
+                    abs_err += float(np.abs(pred_m - y_m).sum())
+                    sq_err += float(((pred_m - y_m) ** 2).sum())
+                    y_sum += float(y_m.sum())
+                    y_sq_sum += float((y_m ** 2).sum())
+                    count += y_m.size
+        if count == 0:
+            raise ValueError("Validation produced no sequences")
+        ss_tot = y_sq_sum - y_sum ** 2 / count
+        return {
+            "loss": sq_norm / count,
+            "mae": abs_err / count,
+            "rmse": float(np.sqrt(sq_err / count)),
+            "r2": 1 - sq_err / ss_tot if ss_tot > 0 else 0,
+        }
+    
+    def train_streaming(
+        self,
+        source: Callable[[], Iterable[Tuple[np.ndarray, np.ndarray]]],
+        feature_names: List[str] = None,
+        epochs: int = 100,
+        batch_size: int = 32,
+        learning_rate: float = 0.001,
+        early_stopping_patience: int = 15,
+        val_fraction: float = 0.2,
+        random_state: Optional[int] = 42,
+        verbose: bool = True,
+        checkpoint_dir: Optional[str] = None,
+        checkpoint_every: int = 5,
+        resume_from: Optional[str] = None
+    ) -> Dict:
+        """
+        Train the LSTM out of core from a chunked (X, y) stream.
+        
+        Minibatches are cut straight from each chunk, so peak memory depends on
+        the chunk size, not on the history length. A first pass computes the
+        row count and normalisation statistics; each epoch is then one pass
+        over the stream. As in train(), the last val_fraction of the sequences
+        is held out for validation, early stopping and the final metrics.
+        Shuffling happens within each chunk.
+        
+        Args:
+            source: Callable returning a fresh iterable of (X, y) chunks in time
+                order on every call (e.g. data.gauge_stream.history_source)
+            feature_names: Names of input features
+            epochs: Number of training epochs
+            batch_size: Batch size
+            learning_rate: Learning rate
+            early_stopping_patience: Early stopping patience
+            val_fraction: Fraction of the (most recent) sequences held out
+            random_state: Seed of the within-chunk shuffles
+            verbose: Print training progress
+            checkpoint_dir: Directory for a resumable training checkpoint
+            checkpoint_every: Checkpoint every N epochs (and when training ends)
+            resume_from: Checkpoint file or directory to continue training from
+        
+        Returns:
+            Training history dictionary
+        """
+        from data.gauge_stream import running_moments
+        
+        # Pass 1: sizes and normalisation statistics
+        n_rows, X_mean, X_std, y_mean, y_std = running_moments(source())
+        
+        n_sequences = n_rows - self.sequence_length - self.output_horizons + 1
+        split = int(n_sequences * (1 - val_fraction))
+        if split < 1 or split >= n_sequences:
+            raise ValueError(f"History too short for streaming training ({n_rows} rows)")
+        
+        self.feature_names = feature_names or [f"feature_{i}" for i in range(len(X_mean))]
+        self.scaler_mean = X_mean
+        self.scaler_std = X_std + 1e-8
+        self.target_mean = y_mean
+        self.target_std = y_std + 1e-8
+        checkpoint = self._load_training_checkpoint(resume_from, "streaming") if resume_from else None
+        
+        if verbose:
+            print(f"\n🏋️ Training LSTM Flood Predictor (streaming)...")
+            print(f"   Rows: {n_rows:,} ({split:,} training / {n_sequences - split:,} validation sequences)")
+            print(f"   Features: {len(self.feature_names)}")
+            print(f"   Sequence length: {self.sequence_length}")
+            print(f"   Output horizons: {self.output_horizons}")
+        
+        self._build_model(len(X_mean))
+        rng = np.random.default_rng(random_state)
+        
+        # Loss and optimizer
+        criterion = nn.MSELoss()
+        optimizer = torch.optim.AdamW(self.model.parameters(), lr=learning_rate, weight_decay=1e-4)
+        scheduler = torch.optim.lr_scheduler.ReduceLROnPlateau(
+            optimizer, mode='min', factor=0.5, patience=5
+        )
+        
+        best_val_loss = float('inf')
+        best_state = None
+        patience_counter = 0
+        history = {'train_loss': [], 'val_loss': [], 'val_mae': []}
+        start_epoch, stopped = 0, False
+        if checkpoint is not None:
+            start_epoch, best_val_loss, best_state, patience_counter, history, stopped = self._resume_training(
+                checkpoint, optimizer, scheduler, rng, verbose=verbose
+            )
+        epochs_done = start_epoch
+        
+        for epoch in range(start_epoch, start_epoch if stopped else epochs):
+            # Training: one pass over the stream
+            self.model.train()
+            train_loss, n_batches = 0.0, 0
+            for X_win, y_win, starts in self._stream_sequences(source):
+                rows = np.flatnonzero(starts < split)
+                rng.shuffle(rows)
+                for i in range(0, len(rows), batch_size):
+                    batch_X, batch_y = self._batch(X_win, y_win, rows[i:i + batch_size])
+                    optimizer.zero_grad()
+                    pred, _, _ = self._forward(batch_X)
+                    loss = criterion(pred, batch_y)
+                    loss.backward()
+                    torch.nn.utils.clip_grad_norm_(self.model.parameters(), max_norm=1.0)
+                    optimizer.step()
+                    train_loss += loss.item()
+                    n_batches += 1
+            train_loss /= max(n_batches, 1)
+            
+            # Validation: another pass, scoring only the held-out tail
+            val = self._evaluate_stream(source, split, batch_size)
+            history['train_loss'].append(train_loss)
+            history['val_loss'].append(val["loss"])
+            history['val_mae'].append(val["mae"])
             
-            final_mae = np.mean(np.abs(val_pred_denorm - y_val_denorm))
-            final_rmse = np.sqrt(np.mean((val_pred_denorm - y_val_denorm) ** 2))
+            scheduler.step(val["loss"])
             
-            # R² score
-            ss_res = np.sum((y_val_denorm - val_pred_denorm) ** 2)
-            ss_tot = np.sum((y_val_denorm - np.mean(y_val_denorm)) ** 2)
-            r2_score = 1 - (ss_res / ss_tot) if ss_tot > 0 else 0
+            # Early stopping
+            if val["loss"] < best_val_loss:
+                best_val_loss = val["loss"]
+                patience_counter = 0
+                best_state = self._snapshot_state()
+            else:
+                patience_counter += 1
+            
+            if verbose and (epoch + 1) % 10 == 0:
+                print(f"   Epoch {epoch+1}/{epochs} | Train Loss: {train_loss:.4f} | Val Loss: {val['loss']:.4f} | Val MAE: {val['mae']:.2f}m")
+            
+            epochs_done = epoch + 1
+            stopped = patience_counter >= early_stopping_patience
+            if checkpoint_dir and (epochs_done % checkpoint_every == 0 or stopped or epochs_done == epochs):
+                self._save_training_checkpoint(
+                    checkpoint_dir, "streaming", epochs_done, optimizer, scheduler,
+                    best_state, best_val_loss, patience_counter, history, stopped, rng
+                )
+            
+            if stopped:
+                if verbose:
+                    print(f"   Early stopping at epoch {epoch+1}")
+                break
+        
+        # Load best model
+        self.model.load_state_dict(best_state)
+        self.is_trained = True
+        self.training_history = history
         
+        # Final metrics
+        final = self._evaluate_stream(source, split, batch_size)
         self.metadata = {
             "trained_on": datetime.now().isoformat(),
-            "epochs_trained": epoch + 1,
+            "epochs_trained": epochs_done,
             "best_val_loss": best_val_loss,
-            "final_mae": float(final_mae),
-            "final_rmse": float(final_rmse),
-            "r2_score": float(r2_score),
+            "final_mae": float(final["mae"]),
+            "final_rmse": float(final["rmse"]),
+            "r2_score": float(final["r2"]),
             "device": str(self.device),
-            "architecture": {
-                "type": "Bidirectional LSTM + Attention",
-                "hidden_size": self.hidden_size,
-                "num_layers": self.num_layers,
-                "dropout": self.dropout,
-                "sequence_length": self.sequence_length,
-                "output_horizons": self.output_horizons,
-                "parameters": sum(p.numel() for p in self.model.parameters())
+            "architecture": self._architecture(),
+            "streaming": {
+                "rows": n_rows,
+                "train_sequences": split,
+                "val_sequences": n_sequences - split,
             }
         }
         
         if verbose:
             print(f"\n✅ LSTM Training Complete!")
-            print(f"   MAE: {final_mae:.2f}m | RMSE: {final_rmse:.2f}m | R²: {r2_score:.4f}")
+            print(f"   MAE: {final['mae']:.2f}m | RMSE: {final['rmse']:.2f}m | R²: {final['r2']:.4f}")
         
         return history
     
@@ -407,94 +892,146 @@ class LSTMFloodPredictor:
         self,
         X: np.ndarray,
         mc_samples: int = 50,
-        return_uncertainty: bool = True
+        return_uncertainty: bool = True,
+        return_analysis: bool = True
     ) -> Dict:
         """
         Make predictions with uncertainty quantification.
         
-        Uses Monte Carlo Dropout to estimate prediction uncertainty.
+        Uses Monte Carlo Dropout to estimate prediction uncertainty. The
+        mc_samples dropout samples run as one batched forward pass, and the
+        risk head / attention come from that same pass (averaged over the
+        samples), so a prediction is a single LSTM evaluation.
         
         Args:
             X: Input features (seq_length, features)
             mc_samples: Number of MC samples for uncertainty
             return_uncertainty: Whether to compute uncertainty bounds
+            return_analysis: Whether to return risk_probabilities /
+                predicted_risk / attention_weights (None when skipped)
         
         Returns:
             Dictionary with predictions and confidence intervals
         """
-        if not self.is_trained:
-            raise ValueError("Model not trained. Call train() first.")
+        return self.predict_many([X], mc_samples, return_uncertainty, return_analysis)[0]
+    
+    def predict_many(
+        self,
+        sequences: List[np.ndarray],
+        mc_samples: int = 50,
+        return_uncertainty: bool = True,
+        return_analysis: bool = True
+    ) -> List[Dict]:
+        """
+        predict() for several input sequences in one forward pass.
         
-        # Normalize input
-        X_norm = self._normalize(X, fit=False)
+        The batch of B sequences (last sequence_length rows of each) is tiled
+        mc_samples times into a single (mc_samples * B, seq, features) pass.
         
-        # Ensure correct shape (batch, seq_len, features)
-        if len(X_norm.shape) == 2:
-            X_norm = X_norm[-self.sequence_length:].reshape(1, -1, X_norm.shape[-1])
+        Args:
+            sequences: Input feature matrices, each (>= seq_length, features)
+            mc_samples: Number of MC samples for uncertainty
+            return_uncertainty: Whether to compute uncertainty bounds
+            return_analysis: Whether to return risk_probabilities /
+                predicted_risk / attention_weights (None when skipped)
         
+        Returns:
+            One predict() result dictionary per sequence, in order
+        """
+        if not self.is_trained:
+            raise ValueError("Model not trained. Call train() first.")
+        
+        # Normalize input, shape (batch, seq_len, features)
+        X_norm = self._normalize(
+            np.stack([np.asarray(X, dtype=float)[-self.sequence_length:] for X in sequences]), fit=False
+        )
+        return self._predict_normalized(X_norm, None, mc_samples, return_uncertainty, return_analysis)
+    
+    def _predict_normalized(
+        self,
+        X_norm: np.ndarray,
+        rivers: Optional[np.ndarray],
+        mc_samples: int,
+        return_uncertainty: bool,
+        return_analysis: bool
+    ) -> List[Dict]:
+        """predict_many() on already normalised (batch, seq_len, features) input (rivers: see _forward)."""
         X_tensor = torch.FloatTensor(X_norm).to(self.device)
+        batch = X_tensor.shape[0]
+        target_mean, target_std = self._target_stats(rivers)
         
         if return_uncertainty:
-            # Monte Carlo Dropout for uncertainty
+            # Monte Carlo Dropout for uncertainty: all samples in one forward
+            # pass over the input tiled mc_samples times (dropout masks are
+            # drawn per row, so each copy is an independent sample)
             self.model.train()  # Enable dropout
-            predictions = []
-            
-            for _ in range(mc_samples):
-                with torch.no_grad():
-                    pred, risk_logits, attention = self.model(X_tensor, return_attention=True)
-                    predictions.append(pred.cpu().numpy())
+            with torch.no_grad():
+                pred, risk_logits, attention = self._forward(
+                    X_tensor.repeat(mc_samples, 1, 1), np.tile(rivers, mc_samples) if rivers is not None else None
+                )
+            self.model.eval()
             
-            predictions = np.array(predictions)  # (mc_samples, batch, horizons)
+            predictions = pred.cpu().numpy().reshape(mc_samples, batch, -1)  # (mc_samples, batch, horizons)
             
             # Denormalize
-            predictions = predictions * self.target_std + self.target_mean
+            predictions = predictions * target_std + target_mean
             
-            mean_pred = predictions.mean(axis=0).squeeze()
-            std_pred = predictions.std(axis=0).squeeze()
+            mean_pred = predictions.mean(axis=0)
+            std_pred = predictions.std(axis=0)
             
             # Confidence intervals (95%)
             lower_bound = mean_pred - 1.96 * std_pred
             upper_bound = mean_pred + 1.96 * std_pred
             
-            self.model.eval()
+            # Risk head and attention from the same pass, averaged over the samples
+            risk_probs = torch.softmax(risk_logits, dim=-1).reshape(mc_samples, batch, -1).mean(dim=0)
+            attention = attention.reshape(mc_samples, batch, -1).mean(dim=0) if attention is not None else None
         else:
             self.model.eval()
             with torch.no_grad():
-                pred, risk_logits, attention = self.model(X_tensor, return_attention=True)
-                mean_pred = (pred.cpu().numpy() * self.target_std + self.target_mean).squeeze()
+                pred, risk_logits, attention = self._forward(X_tensor, rivers)
+                mean_pred = pred.cpu().numpy() * target_std + target_mean
                 lower_bound = mean_pred * 0.9
                 upper_bound = mean_pred * 1.1
                 std_pred = np.zeros_like(mean_pred)
-                attention = attention.cpu().numpy().squeeze() if attention is not None else None
+            risk_probs = torch.softmax(risk_logits, dim=-1)
         
-        # Risk classification
-        self.model.eval()
-        with torch.no_grad():
-            _, risk_logits, attention_weights = self.model(X_tensor, return_attention=True)
-            risk_probs = torch.softmax(risk_logits, dim=-1).cpu().numpy().squeeze()
-            risk_labels = ["low", "moderate", "high", "critical"]
-            predicted_risk = risk_labels[np.argmax(risk_probs)]
+        risk_probs = risk_probs.cpu().numpy()
+        attention = attention.cpu().numpy() if attention is not None else None
+        risk_labels = ["low", "moderate", "high", "critical"]
+        row_std = np.broadcast_to(np.asarray(target_std, dtype=float).reshape(-1), (batch,))
         
-        return {
-            "predictions": mean_pred.tolist() if isinstance(mean_pred, np.ndarray) else [mean_pred],
-            "confidence_lower": lower_bound.tolist() if isinstance(lower_bound, np.ndarray) else [lower_bound],
-            "confidence_upper": upper_bound.tolist() if isinstance(upper_bound, np.ndarray) else [upper_bound],
-            "uncertainty_std": std_pred.tolist() if isinstance(std_pred, np.ndarray) else [std_pred],
-            "risk_probabilities": {
-                "low": float(risk_probs[0]),
-                "moderate": float(risk_probs[1]),
-                "high": float(risk_probs[2]),
-                "critical": float(risk_probs[3])
-            },
-            "predicted_risk": predicted_risk,
-            "attention_weights": attention_weights.cpu().numpy().squeeze().tolist() if attention_weights is not None else None,
-            "model_confidence": float(1 - np.mean(std_pred) / (self.target_std + 1e-8))
-        }
+        results = []
+        for i in range(batch):
+            result = {
+                "predictions": mean_pred[i].tolist(),
+                "confidence_lower": lower_bound[i].tolist(),
+                "confidence_upper": upper_bound[i].tolist(),
+                "uncertainty_std": std_pred[i].tolist(),
+                "risk_probabilities": None,
+                "predicted_risk": None,
+                "attention_weights": None,
+                "model_confidence": float(1 - np.mean(std_pred[i]) / (row_std[i] + 1e-8))
+            }
+            
+            if return_analysis:
+                # Risk classification
+                result["risk_probabilities"] = {
+                    label: float(p) for label, p in zip(risk_labels, risk_probs[i])
+                }
+                result["predicted_risk"] = risk_labels[int(np.argmax(risk_probs[i]))]
+                result["attention_weights"] = attention[i].tolist() if attention is not None else None
+            
+            results.append(result)
+        
+        return results
     
     def save(self, path: str):
         """Save the trained model."""
         if not self.is_trained:
             raise ValueError("Model not trained. Nothing to save.")
+        if isinstance(self.model, torch.jit.ScriptModule):
+            raise ValueError(f"Model loaded with the {self.runtime} runtime; save from an eager predictor.")
         
         os.makedirs(os.path.dirname(path) if os.path.dirname(path) else '.', exist_ok=True)
         
@@ -502,49 +1039,166 @@ class LSTMFloodPredictor:
             "model_state": self.model.state_dict(),
             "scaler_mean": self.scaler_mean.tolist(),
             "scaler_std": self.scaler_std.tolist(),
-            "target_mean": float(self.target_mean),
-            "target_std": float(self.target_std),
+            "target_mean": np.asarray(self.target_mean).tolist(),
+            "target_std": np.asarray(self.target_std).tolist(),
             "feature_names": self.feature_names,
             "metadata": self.metadata,
-            "config": {
-                "sequence_length": self.sequence_length,
-                "hidden_size": self.hidden_size,
-                "num_layers": self.num_layers,
-                "dropout": self.dropout,
-                "output_horizons": self.output_horizons
-            }
+            "config": self._config()
         }
         
-        torch.save(save_dict, path)
+        # Write then rename, so a server loading/mmapping the checkpoint never sees a partial file
+        _atomic_save(torch.save, save_dict, path)
         print(f"💾 Model saved to {path}")
     
-    def load(self, path: str):
-        """Load a trained model."""
-        save_dict = torch.load(path, map_location=self.device)
+    def load(self, path: str, mmap: bool = False):
+        """
+        Load a trained model.
+        
+        Args:
+            path: Path of the .pt checkpoint
+            mmap: Memory-map the checkpoint and use its tensors as the model
+                weights directly (CPU only), so the file pages are shared
+                between processes instead of copied into each one
+        """
+        mmap = mmap and self.device.type == "cpu"
+        save_dict = torch.load(path, map_location=self.device, mmap=mmap)
         
         # Restore config
-        config = save_dict["config"]
-        self.sequence_length = config["sequence_length"]
-        self.hidden_size = config["hidden_size"]
-        self.num_layers = config["num_layers"]
-        self.dropout = config["dropout"]
-        self.output_horizons = config["output_horizons"]
+        self._apply_config(save_dict["config"])
         
         # Build and load model
         self._build_model(len(save_dict["feature_names"]))
-        self.model.load_state_dict(save_dict["model_state"])
+        self.model.load_state_dict(save_dict["model_state"], assign=mmap)
         
         # Restore scalers
         self.scaler_mean = np.array(save_dict["scaler_mean"])
         self.scaler_std = np.array(save_dict["scaler_std"])
-        self.target_mean = save_dict["target_mean"]
-        self.target_std = save_dict["target_std"]
+        self.target_mean = _stat(save_dict["target_mean"])
+        self.target_std = _stat(save_dict["target_std"])
         self.feature_names = save_dict["feature_names"]
         self.metadata = save_dict["metadata"]
         self.is_trained = True
         
-        print(f"📂 Model loaded from {path}")
+        if self.runtime != "eager":
+            self.model = self._load_runtime(path)
+        
+        print(f"📂 Model loaded from {path}" + (f" ({self.runtime} runtime)" if self.runtime != "eager" else ""))
         return self
+    
+    def compile_runtime(self, runtime: str) -> torch.jit.ScriptModule:
+        """
+        Script the trained model for a CPU runtime; "int8" first applies
+        dynamic quantization (int8 weights, float activations) to the LSTM
+        and Linear layers.
+        """
+        if runtime not in RUNTIMES or runtime == "eager":
+            raise ValueError(f"Cannot compile runtime '{runtime}'. Available: {RUNTIMES[1:]}")
+        model = copy.deepcopy(self.model).cpu().eval()
+        with warnings.catch_warnings():
+            # torch.jit / torch.ao.quantization emit deprecation warnings on recent torch
+            warnings.simplefilter("ignore")
+            if runtime == "int8":
+                model = torch.ao.quantization.quantize_dynamic(model, {nn.LSTM, nn.Linear}, dtype=torch.qint8)
+            return torch.jit.script(model)
+    
+    def _load_runtime(self, path: str) -> torch.jit.ScriptModule:
+        """Load the exported runtime artifact of a checkpoint, or compile it in memory if missing / stale."""
+        runtime_path = runtime_artifact_path(path, self.runtime)
+        if os.path.exists(runtime_path) and os.path.getmtime(runtime_path) >= os.path.getmtime(path):
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                return torch.jit.load(runtime_path, map_location="cpu")
+        print(f"⚠️ No up-to-date {self.runtime} artifact at {runtime_path}; compiling in memory")
+        return self.compile_runtime(self.runtime)
+    
+    def export_runtime(
+        self,
+        path: str,
+        runtime: str = "int8",
+        X_val: Optional[np.ndarray] = None,
+        y_val: Optional[np.ndarray] = None
+    ) -> Dict:
+        """
+        Export a TorchScript (optionally int8) variant of the trained model
+        next to its checkpoint (see runtime_artifact_path).
+        
+        Args:
+            path: The model's .pt checkpoint path
+            runtime: "torchscript" or "int8"
+            X_val: Validation features (samples, features) for the parity check
+                ({river_id: features} for the shared multi-river model)
+            y_val: Validation targets (likewise per river for the shared model)
+        
+        Returns:
+            Export report (artifact sizes; validation MAE of both variants and their delta)
+        """
+        if not self.is_trained:
+            raise ValueError("Model not trained. Nothing to export.")
+        scripted = self.compile_runtime(runtime)
+        runtime_path = runtime_artifact_path(path, runtime)
+        
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            _atomic_save(torch.jit.save, scripted, runtime_path)
+        
+        report = {
+            "runtime": runtime,
+            "path": runtime_path,
+            "bytes": os.path.getsize(runtime_path),
+            "checkpoint_bytes": os.path.getsize(path) if os.path.exists(path) else None,
+        }
+        if X_val is not None and y_val is not None:
+            report.update(self.runtime_parity(scripted, X_val, y_val))
+        
+        print(f"📦 {runtime} runtime saved to {runtime_path} ({report['bytes'] / 1024:.0f} KiB)")
+        if "mae_delta" in report:
+            print(f"   Validation MAE: eager {report['mae_eager']:.4f}m -> {runtime} {report['mae_runtime']:.4f}m "
+                  f"(Δ {report['mae_delta']:+.4f}m, max |Δ| {report['max_abs_diff']:.4f}m)")
+        return report
+    
+    def runtime_parity(self, runtime_model: torch.nn.Module, X: np.ndarray, y: np.ndarray, batch_size: int = 256) -> Dict:
+        """
+        Deterministic (dropout off) validation MAE of the eager model and of
+        runtime_model on the sequences of (X, y), in meters.
+        """
+        X_seq, y_seq = self._create_sequences(self._normalize(X, fit=False), np.asarray(y, dtype=float))
+        return self._runtime_parity(runtime_model, X_seq, y_seq, None, batch_size)
+    
+    def _runtime_parity(
+        self,
+        runtime_model: torch.nn.Module,
+        X_seq: np.ndarray,
+        y_seq: np.ndarray,
+        rivers: Optional[np.ndarray],
+        batch_size: int
+    ) -> Dict:
+        """runtime_parity on normalised windows; rivers gives each window's river index (None: single river)."""
+        eager = self.model if not isinstance(self.model, torch.jit.ScriptModule) else None
+        if eager is None:
+            raise ValueError("runtime_parity needs the eager model (load with runtime='eager')")
+        outputs = {"eager": [], "runtime": []}
+        with torch.no_grad():
+            for name, model in (("eager", eager), ("runtime", runtime_model)):
+                model.eval()
+                for i in range(0, len(X_seq), batch_size):
+                    batch_X = torch.from_numpy(np.ascontiguousarray(X_seq[i:i + batch_size], dtype=np.float32))
+                    batch_rivers = None if rivers is None else rivers[i:i + batch_size]
+                    if batch_rivers is None:
+                        pred, _, _ = model(batch_X.to(self.device))
+                    else:
+                        pred, _, _ = model(batch_X.to(self.device), torch.as_tensor(batch_rivers, device=self.device))
+                    target_mean, target_std = self._target_stats(batch_rivers)
+                    outputs[name].append(pred.cpu().numpy() * target_std + target_mean)
+        eager_pred, runtime_pred = np.concatenate(outputs["eager"]), np.concatenate(outputs["runtime"])
+        mae_eager = float(np.mean(np.abs(eager_pred - y_seq)))
+        mae_runtime = float(np.mean(np.abs(runtime_pred - y_seq)))
+        return {
+            "val_sequences": len(X_seq),
+            "mae_eager": mae_eager,
+            "mae_runtime": mae_runtime,
+            "mae_delta": mae_runtime - mae_eager,
+            "max_abs_diff": float(np.max(np.abs(runtime_pred - eager_pred))),
+        }
 
 
 class EnsembleFloodPredictor:
@@ -605,6 +1259,213 @@ class EnsembleFloodPredictor:
         return result
 
 
+def _reference_mc_predict(predictor: LSTMFloodPredictor, X_tensor: torch.Tensor, mc_samples: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Previous predict(): one forward pass per MC sample, then a separate eval pass for the risk head."""
+    predictor.model.train()
+    predictions = []
+    for _ in range(mc_samples):
+        with torch.no_grad():
+            pred, _, _ = predictor.model(X_tensor, return_attention=True)
+            predictions.append(pred.cpu().numpy())
+    predictor.model.eval()
+    with torch.no_grad():
+        _, risk_logits, _ = predictor.model(X_tensor, return_attention=True)
+    return np.array(predictions), torch.softmax(risk_logits, dim=-1).cpu().numpy()
+
+
+def _reference_create_sequences(predictor: LSTMFloodPredictor, X: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Copying window construction (one array per window, then stacked): parity reference for _create_sequences."""
+    sequences, targets = [], []
+    for i in range(len(X) - predictor.sequence_length - predictor.output_horizons + 1):
+        sequences.append(X[i:i + predictor.sequence_length])
+        targets.append(y[i + predictor.sequence_length:i + predictor.sequence_length + predictor.output_horizons])
+    return np.array(sequences), np.array(targets)
+
+
+def benchmark_sequence_windows(rows: Tuple[int, ...] = (10_000, 100_000, 400_000), n_features: int = 9) -> Dict:
+    """Time and peak memory of preparing the training windows: strided views vs copied windows."""
+    import tracemalloc
+
+    print("\n" + "=" * 60)
+    print("⏱️  Sequence windows: strided views vs copied windows")
+    print("=" * 60)
+
+    predictor = LSTMFloodPredictor(device="cpu")
+    rng = np.random.default_rng(42)
+    results = {}
+    for n in rows:
+        X, y = rng.normal(size=(n, n_features)), rng.normal(size=n)
+        row = {}
+        for name, build in (("copied", lambda: _reference_create_sequences(predictor, X, y)),
+                            ("views", lambda: predictor._create_sequences(X, y))):
+            tracemalloc.start()
+            t0 = time.perf_counter()
+            X_seq, y_seq = build()
+            elapsed = time.perf_counter() - t0
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            row[f"{name}_ms"] = elapsed * 1e3
+            row[f"{name}_peak_bytes"] = peak
+            row[name] = (X_seq, y_seq)
+        copied, views = row.pop("copied"), row.pop("views")
+        row["parity"] = bool(np.array_equal(copied[0], views[0]) and np.array_equal(copied[1], views[1]))
+        row["input_bytes"] = X.nbytes + y.nbytes
+        results[n] = row
+        print(f"   {n:>7,} rows: copied {row['copied_ms']:8.1f}ms / {row['copied_peak_bytes'] / 2**20:7.1f}MiB peak | "
+              f"views {row['views_ms']:6.2f}ms / {row['views_peak_bytes'] / 2**20:5.2f}MiB peak "
+              f"(input {row['input_bytes'] / 2**20:.1f}MiB) | identical: {row['parity']}")
+    return results
+
+
+def benchmark_mc_dropout(mc_samples: int = 50, repeats: int = 20, hidden_size: int = 128) -> Dict:
+    """Latency of one MC-dropout prediction: batched pass vs the per-sample loop (CPU)."""
+    print("\n" + "=" * 60)
+    print(f"⏱️  MC dropout ({mc_samples} samples): batched pass vs per-sample loop")
+    print("=" * 60)
+
+    torch.manual_seed(0)
+    predictor = LSTMFloodPredictor(hidden_size=hidden_size, device="cpu")
+    predictor._build_model(9)
+    predictor.scaler_mean, predictor.scaler_std = np.zeros(9), np.ones(9)
+    predictor.target_mean, predictor.target_std = 0.0, 1.0
+    predictor.is_trained = True
+    X = np.random.default_rng(42).normal(size=(predictor.sequence_length, 9))
+    X_tensor = torch.FloatTensor(X).reshape(1, predictor.sequence_length, 9)
+
+    # Parity: same deterministic output, and MC statistics of the same distribution
+    deterministic = predictor.predict(X, return_uncertainty=False)
+    with torch.no_grad():
+        predictor.model.eval()
+        expected, _, _ = predictor.model(X_tensor)
+    batched = predictor.predict(X, mc_samples=2000)
+    looped, _ = _reference_mc_predict(predictor, X_tensor, 2000)
+    parity = {
+        "deterministic_max_abs_diff": float(np.max(np.abs(np.array(deterministic["predictions"]) - expected.numpy().squeeze()))),
+        "mc_mean_max_abs_diff": float(np.max(np.abs(np.array(batched["predictions"]) - looped.mean(axis=0).squeeze()))),
+        "mc_std_max_abs_diff": float(np.max(np.abs(np.array(batched["uncertainty_std"]) - looped.std(axis=0).squeeze()))),
+    }
+    print(f"   Parity: deterministic max |Δ| = {parity['deterministic_max_abs_diff']:.1e}, "
+          f"MC mean / std max |Δ| (2000 samples) = {parity['mc_mean_max_abs_diff']:.3f} / {parity['mc_std_max_abs_diff']:.3f}")
+
+    def best_of(fn):
+        timings = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - t0)
+        return min(timings)
+
+    results = {
+        "parity": parity,
+        "mc_samples": mc_samples,
+        "threads": torch.get_num_threads(),
+        "loop_ms": best_of(lambda: _reference_mc_predict(predictor, X_tensor, mc_samples)) * 1e3,
+        "batched_ms": best_of(lambda: predictor.predict(X, mc_samples=mc_samples)) * 1e3,
+    }
+    results["speedup"] = results["loop_ms"] / results["batched_ms"]
+    print(f"   1 prediction ({results['threads']} threads): loop {results['loop_ms']:.1f}ms "
+          f"({mc_samples + 1} passes) | batched {results['batched_ms']:.1f}ms (1 pass) "
+          f"({results['speedup']:.1f}x)")
+    return results
+
+
+def _rss_bytes() -> Optional[int]:
+    """Resident set size of this process (Linux), or None."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def benchmark_runtimes(
+    model_path: Optional[str] = None,
+    river_id: str = "cauvery",
+    mc_samples: int = 30,
+    batch_size: int = 64,
+    repeats: int = 20
+) -> Dict:
+    """
+    Eager vs TorchScript vs int8 runtimes on CPU: validation MAE delta,
+    latency (one MC-dropout prediction, one deterministic batch) and memory
+    (artifact size, resident memory added by loading).
+
+    Args:
+        model_path: Trained .pt checkpoint (default: train a small model on simulated data)
+        river_id: River whose simulated history provides the validation set
+        mc_samples: MC dropout samples for the single-prediction latency
+        batch_size: Sequences in the deterministic batch
+        repeats: Timing repeats (best is reported)
+    """
+    import tempfile
+    from data.hydrological_simulator import HydrologicalSimulator
+
+    print("\n" + "=" * 60)
+    print("⏱️  LSTM runtimes: eager vs TorchScript vs int8 (CPU)")
+    print("=" * 60)
+
+    # Same data / target as train_lstm_predictor: simulated history, river level
+    dataset = HydrologicalSimulator(river_id=river_id).generate_full_dataset(num_days=730)
+    feature_names = dataset["feature_names"]
+    X = np.vstack([dataset["X_train"], dataset["X_test"]])
+    y = X[:, feature_names.index("prev_river_level")]
+    split = len(dataset["X_train"])
+
+    workdir = tempfile.mkdtemp(prefix="lstm_runtimes_")
+    if model_path is None:
+        model_path = os.path.join(workdir, "lstm_flood_benchmark.pt")
+        trainer = LSTMFloodPredictor(hidden_size=128, device="cpu")
+        trainer.train(X[:split], y[:split], feature_names, epochs=10, batch_size=32)
+        trainer.save(model_path)
+    else:
+        # Keep exported artifacts out of the models directory
+        copied = os.path.join(workdir, os.path.basename(model_path))
+        with open(model_path, "rb") as src, open(copied, "wb") as dst:
+            dst.write(src.read())
+        model_path = copied
+
+    eager = LSTMFloodPredictor(hidden_size=128, device="cpu").load(model_path)
+    exports = {runtime: eager.export_runtime(model_path, runtime, X[split:], y[split:]) for runtime in RUNTIMES[1:]}
+
+    X_seq, _ = eager._create_sequences(X[split:], y[split:])
+    single, batch = X_seq[-1], list(X_seq[-batch_size:])
+
+    def best_of(fn):
+        timings = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - t0)
+        return min(timings)
+
+    results = {"model_path": model_path, "mc_samples": mc_samples, "batch_size": len(batch), "runtimes": {}}
+    for runtime in RUNTIMES:
+        rss_before = _rss_bytes()
+        predictor = LSTMFloodPredictor(hidden_size=128, device="cpu", runtime=runtime).load(model_path)
+        rss_after = _rss_bytes()
+        predictor.predict(single, mc_samples=mc_samples)  # warm-up (TorchScript profiling runs)
+        predictor.predict_many(batch, return_uncertainty=False)
+        results["runtimes"][runtime] = {
+            "artifact_bytes": os.path.getsize(runtime_artifact_path(model_path, runtime)),
+            "load_rss_bytes": rss_after - rss_before if rss_before is not None and rss_after is not None else None,
+            "mc_predict_ms": best_of(lambda: predictor.predict(single, mc_samples=mc_samples)) * 1e3,
+            "batch_predict_ms": best_of(lambda: predictor.predict_many(batch, return_uncertainty=False)) * 1e3,
+            "mae_delta": exports[runtime]["mae_delta"] if runtime in exports else 0.0,
+        }
+        del predictor
+
+    print(f"   Validation: {exports['int8']['val_sequences']} sequences, eager MAE {exports['int8']['mae_eager']:.4f}m")
+    for runtime, r in results["runtimes"].items():
+        rss = f"{r['load_rss_bytes'] / 2**20:.1f}MiB" if r["load_rss_bytes"] is not None else "n/a"
+        print(f"   {runtime:<11} artifact {r['artifact_bytes'] / 2**20:5.2f}MiB | load RSS +{rss} | "
+              f"MC({mc_samples}) {r['mc_predict_ms']:.1f}ms | batch({len(batch)}) {r['batch_predict_ms']:.1f}ms | "
+              f"MAE Δ {r['mae_delta']:+.4f}m")
+    return results
+
+
 # Test function
 def test_lstm_predictor():
     """Test the LSTM predictor with synthetic data."""
@@ -670,4 +1531,47 @@ def test_lstm_predictor():
 
 
 if __name__ == "__main__":
-    test_lstm_predictor()
+    import argparse
+    import sys
+
+    # Run as a script from backend/ml: make the data / ml packages importable
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    parser = argparse.ArgumentParser(description="LSTM flood predictor self-test, benchmarks and runtime export")
+    parser.add_argument("--benchmark", action="store_true", help="MC dropout: batched pass vs per-sample loop")
+    parser.add_argument("--benchmark-sequences", action="store_true", help="Sequence windows: strided views vs copies")
+    parser.add_argument("--benchmark-runtimes", action="store_true", help="Eager vs TorchScript vs int8 runtimes")
+    parser.add_argument("--export", metavar="PATH", help="Export a runtime artifact for the .pt checkpoint at PATH")
+    parser.add_argument("--runtime", choices=RUNTIMES[1:], default="int8", help="Runtime to export (default: int8)")
+    parser.add_argument("--model", help="Checkpoint for --benchmark-runtimes (default: train a small one)")
+    parser.add_argument("--river", default="cauvery", help="River whose simulated history validates --export / --benchmark-runtimes "
+                                                          "(a shared checkpoint is validated on every river it covers)")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark_mc_dropout()
+    elif args.benchmark_sequences:
+        benchmark_sequence_windows()
+    elif args.benchmark_runtimes:
+        benchmark_runtimes(args.model, args.river)
+    elif args.export:
+        from data.hydrological_simulator import HydrologicalSimulator
+
+        def validation_history(river_id: str) -> np.ndarray:
+            return HydrologicalSimulator(river_id=river_id).generate_full_dataset(num_days=730)["X_test"]
+
+        if "river_ids" in torch.load(args.export, map_location="cpu", mmap=True)["config"]:
+            # Shared multi-river checkpoint: validate on every river it covers
+            from ml.multi_river_lstm import MultiRiverLSTMFloodPredictor
+
+            predictor = MultiRiverLSTMFloodPredictor(device="cpu").load(args.export)
+            level = predictor.feature_names.index("prev_river_level")
+            X_val = {river_id: validation_history(river_id) for river_id in predictor.river_ids}
+            y_val = {river_id: X[:, level] for river_id, X in X_val.items()}
+        else:
+            predictor = LSTMFloodPredictor(device="cpu").load(args.export)
+            X_val = validation_history(args.river)
+            y_val = X_val[:, predictor.feature_names.index("prev_river_level")]
+        predictor.export_runtime(args.export, args.runtime, X_val, y_val)
+    else:
+        test_lstm_predictor()
@@ -0,0 +1,192 @@
+"""
+Cross-Request Micro-Batching
+============================
+Under concurrent load every request calls the models with a batch of one,
+and per-call overhead (Python dispatch, sklearn/torch setup, thread-pool
+hand-off) dominates the actual math. A MicroBatcher sits in front of one
+model: concurrent requests submit single items, a worker task collects them
+for up to max_wait_ms or until max_batch items are queued, runs ONE batched
+call in an executor and hands each result back to the request that asked.
+
+- Batches of one batcher run one at a time; items arriving meanwhile are
+  collected into the next batch, so batches grow with load while an idle
+  server only pays max_wait_ms.
+- An exception from the batch function is raised in every request of that batch.
+- stats() reports the batch-size distribution, queueing delay (submit ->
+  batch start) and batch run time.
+"""
+
+import asyncio
+import time
+from collections import Counter, deque
+from concurrent.futures import Executor
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class MicroBatcher:
+    """
+    Collects concurrent single-item calls into batched calls.
+
+    Args:
+        name: Label used in stats (e.g. "rf_cauvery")
+        run_batch: Blocking function mapping a list of items to a list of
+            results in the same order; runs in the executor
+        max_batch: Largest batch handed to run_batch
+        max_wait_ms: How long the first item of a batch waits for company
+        executor: Executor for run_batch (default: the loop's default executor)
+        delay_window: Recent queueing delays kept for the percentiles
+    """
+
+    def __init__(
+        self,
+        name: str,
+        run_batch: Callable[[List[Any]], List[Any]],
+        max_batch: int = 32,
+        max_wait_ms: float = 2.0,
+        executor: Optional[Executor] = None,
+        delay_window: int = 1024
+    ):
+        self.name = name
+        self.run_batch = run_batch
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.executor = executor
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        self.batches = 0
+        self.items = 0
+        self.errors = 0
+        self._sizes: Counter = Counter()
+        self._delays: Deque[float] = deque(maxlen=delay_window)
+        self._delay_total = 0.0
+        self._delay_max = 0.0
+        self._run_total = 0.0
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its result."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            # First use, or a new event loop (e.g. a fresh test client)
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+        future = loop.create_future()
+        await self._queue.put((item, future, time.perf_counter()))
+        return await future
+
+    async def _run(self) -> None:
+        """Worker: gather a batch, run it, deliver results, repeat."""
+        queue = self._queue
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                if not queue.empty():
+                    batch.append(queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._execute(batch)
+
+    async def _execute(self, batch: List[Tuple[Any, asyncio.Future, float]]) -> None:
+        """Run one batch in the executor and resolve its futures."""
+        # Requests cancelled while queued (client went away) are dropped
+        batch = [entry for entry in batch if not entry[1].done()]
+        if not batch:
+            return
+        start = time.perf_counter()
+        for _, _, submitted in batch:
+            delay = start - submitted
+            self._delays.append(delay)
+            self._delay_total += delay
+            self._delay_max = max(self._delay_max, delay)
+        self.batches += 1
+        self.items += len(batch)
+        self._sizes[len(batch)] += 1
+
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self.run_batch, [item for item, _, _ in batch]
+            )
+            if len(results) != len(batch):
+                raise RuntimeError(f"{self.name}: batch of {len(batch)} returned {len(results)} results")
+        except Exception as e:
+            self.errors += 1
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._run_total += time.perf_counter() - start
+
+    def stats(self) -> Dict:
+        """Batch-size distribution, queueing delay and run time."""
+        histogram: Counter = Counter()
+        for size, count in self._sizes.items():
+            # Power-of-two buckets: "1", "2", "3-4", "5-8", ...
+            upper = 1 << (size - 1).bit_length()
+            histogram[str(upper) if upper <= 2 else f"{upper // 2 + 1}-{upper}"] += count
+        recent = np.array(self._delays) * 1e3 if self._delays else np.zeros(1)
+        return {
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1e3,
+            "batches": self.batches,
+            "items": self.items,
+            "errors": self.errors,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0,
+            "batch_size_histogram": dict(sorted(histogram.items(), key=lambda kv: int(kv[0].split("-")[0]))),
+            "queue_delay_ms": {
+                "mean": round(self._delay_total / self.items * 1e3, 3) if self.items else 0,
+                "p50": round(float(np.percentile(recent, 50)), 3),
+                "p95": round(float(np.percentile(recent, 95)), 3),
+                "max": round(self._delay_max * 1e3, 3),
+            },
+            "mean_batch_run_ms": round(self._run_total / self.batches * 1e3, 3) if self.batches else 0,
+        }
+
+
+class MicroBatcherPool:
+    """
+    One MicroBatcher per key (e.g. per river and model), created on first use
+    with shared settings.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[List[Any]], List[Any]],
+        max_batch: int = 32,
+        max_wait_ms: float = 2.0,
+        executor: Optional[Executor] = None
+    ):
+        self.run_batch = run_batch
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self.executor = executor
+        self._batchers: Dict[str, MicroBatcher] = {}
+
+    async def submit(self, key: str, item: Any) -> Any:
+        """Queue item on the batcher for key."""
+        batcher = self._batchers.get(key)
+        if batcher is None:
+            batcher = self._batchers[key] = MicroBatcher(
+                key, self.run_batch, self.max_batch, self.max_wait_ms, self.executor
+            )
+        return await batcher.submit(item)
+
+    def stats(self) -> Dict[str, Dict]:
+        return {key: batcher.stats() for key, batcher in sorted(self._batchers.items())}
@@ -0,0 +1,704 @@
+"""
+Model Lifecycle Manager
+=======================
+Loads, trains and warms per-river flood models in the background so that
+request handlers never train a model inside the event loop.
+
+Lifecycle of a model key (e.g. "rf_cauvery", "lstm_cauvery"):
+    pending -> loading -> [training] -> warming -> ready
+                                     \\-> failed (retried after a backoff)
+
+- Artifacts on disk are loaded in a background thread.
+- Missing artifacts are trained in a separate worker process, so the
+  CPU-heavy fit (50 LSTM epochs, 100-tree forest) never holds the GIL of the
+  serving process.
+- A dummy inference runs before a model is published, which pays the
+  first-call costs of sklearn/torch (lazy imports, thread pools, allocator
+  warm-up) before real traffic arrives.
+- Each key is initialised at most once at a time; handlers asking for a model
+  that is not ready get ModelWarmingError (immediately, or after an optional
+  bounded wait) instead of blocking on training.
+- A key that failed is not retried until its cooldown has passed
+  (failure_backoff seconds, doubling with each consecutive failure up to
+  max_failure_backoff), so a persistently failing trainer does not start a
+  new training job on every request; meanwhile its Retry-After is the time
+  left on the cooldown.
+- With max_resident set, the least recently used models are unloaded once
+  more than max_resident are held; they are reloaded lazily on next use.
+- Listeners added with add_listener() are told when a key is published with
+  a different version than before (e.g. after retraining), so caches of
+  that model's outputs can be invalidated.
+"""
+
+import os
+import time
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class ModelWarmingError(Exception):
+    """Raised when a model is requested before it has finished initialising."""
+
+    def __init__(self, key: str, state: str, retry_after: int):
+        super().__init__(f"Model '{key}' is {state}, retry in {retry_after}s")
+        self.key = key
+        self.state = state
+        self.retry_after = retry_after
+
+
+# =============================================================================
+# Worker-process entry points (module level so they can be pickled)
+# =============================================================================
+
+def train_rf_classifier(
+    river_id: str,
+    num_days: int = 365,
+    model_path: Optional[str] = None,
+    dataset: Optional[Dict] = None,
+    n_jobs: int = -1,
+    fast: bool = False,
+    threads: Optional[int] = None
+):
+    """
+    Train an RF classifier on simulated data, optionally save it, and return it.
+
+    Args:
+        river_id: River to simulate
+        num_days: Days of data to simulate (ignored when dataset is given)
+        model_path: Where to save the .joblib (plus compact) artifacts
+        dataset: Pre-generated HydrologicalSimulator dataset to train on
+        n_jobs: Cores used to fit the trees (-1 = all)
+        fast: Skip cross-validation and validate on out-of-bag votes
+            (see RandomForestFloodClassifier.train)
+        threads: Thread budget of the fit (default: n_jobs; half the cores when fast)
+    """
+    from data.hydrological_simulator import HydrologicalSimulator
+    from ml.rf_flood_classifier import RandomForestFloodClassifier
+
+    classifier = RandomForestFloodClassifier(n_jobs=n_jobs)
+    if dataset is None:
+        simulator = HydrologicalSimulator(river_id=river_id)
+        dataset = simulator.generate_full_dataset(num_days=num_days)
+    classifier.train(
+        dataset["X_train"],
+        dataset["y_train_classification"],
+        feature_names=dataset["feature_names"],
+        model_save_path=model_path,
+        fast=fast,
+        threads=threads
+    )
+    return classifier
+
+
+def retrain_rf_classifier(
+    river_id: str,
+    model_path: str,
+    num_days: int = 730,
+    fast: bool = False,
+    threads: Optional[int] = None,
+    save_path: Optional[str] = None
+) -> Tuple[Any, Dict, Dict]:
+    """
+    Full RF retrain on freshly simulated data (the /train endpoint's job).
+
+    Args:
+        river_id: River to simulate
+        model_path: Where to save the .joblib (plus compact) artifacts
+        num_days: Days of data to simulate
+        fast: Skip cross-validation and validate on out-of-bag votes
+        threads: Thread budget of the fit (see RandomForestFloodClassifier.train)
+        save_path: Directory the simulated dataset CSVs are written to
+
+    Returns:
+        Tuple of (classifier, training metrics, dataset summary)
+    """
+    from data.hydrological_simulator import HydrologicalSimulator
+    from ml.rf_flood_classifier import RandomForestFloodClassifier
+
+    dataset = HydrologicalSimulator(river_id=river_id).generate_full_dataset(
+        num_days=num_days,
+        save_path=save_path
+    )
+    classifier = RandomForestFloodClassifier()
+    metrics = classifier.train(
+        dataset["X_train"],
+        dataset["y_train_classification"],
+        feature_names=dataset["feature_names"],
+        model_save_path=model_path,
+        fast=fast,
+        threads=threads
+    )
+    summary = {
+        "training_samples": len(dataset["X_train"]),
+        "test_samples": len(dataset["X_test"]),
+        "flood_events": dataset["metadata"]["num_flood_days"],
+    }
+    return classifier, metrics, summary
+
+
+def update_rf_classifier(
+    river_id: str,
+    model_path: str,
+    num_days: int,
+    new_trees: int = 20,
+    max_trees: Optional[int] = None,
+    random_seed: int = 42
+) -> Tuple[Any, Dict]:
+    """
+    Warm-start update of a saved RF with newly simulated observations
+    (see RandomForestFloodClassifier.update).
+
+    Args:
+        river_id: River to simulate
+        model_path: Saved .joblib forest to extend (rewritten in place)
+        num_days: Days of new observations to simulate
+        new_trees: Trees to add
+        max_trees: Keep at most this many trees, dropping the oldest
+        random_seed: Seed of the simulation
+
+    Returns:
+        Tuple of (updated classifier, update report)
+    """
+    from data.hydrological_simulator import HydrologicalSimulator
+    from ml.rf_flood_classifier import RandomForestFloodClassifier
+
+    classifier = RandomForestFloodClassifier(model_path=model_path)
+    dataset = HydrologicalSimulator(river_id=river_id, random_seed=random_seed).generate_full_dataset(
+        num_days=num_days
+    )
+    X_new = np.vstack([dataset["X_train"], dataset["X_test"]])
+    y_new = np.concatenate([dataset["y_train_classification"], dataset["y_test_classification"]])
+    report = classifier.update(
+        X_new, y_new,
+        n_new_trees=new_trees,
+        max_trees=max_trees,
+        model_save_path=model_path
+    )
+    return classifier, report
+
+
+def train_lstm_predictor(
+    river_id: str,
+    model_path: str,
+    num_days: int = 365,
+    dataset: Optional[Dict] = None,
+    epochs: int = 50,
+    checkpoint_dir: Optional[str] = None,
+    resume: bool = False
+) -> str:
+    """
+    Train an LSTM predictor on simulated data, save it and return its path.
+
+    Args:
+        river_id: River to simulate
+        model_path: Where to save the .pt checkpoint
+        num_days: Days of data to simulate (ignored when dataset is given)
+        dataset: Pre-generated HydrologicalSimulator dataset to train on
+        epochs: Training epochs
+        checkpoint_dir: Directory for periodic training checkpoints
+        resume: Continue from the checkpoint in checkpoint_dir, if there is one
+    """
+    from data.hydrological_simulator import HydrologicalSimulator
+    from ml.lstm_flood_predictor import LSTMFloodPredictor
+
+    print(f"🏋️ Training LSTM for {river_id}...")
+    lstm = LSTMFloodPredictor(
+        sequence_length=7,
+        hidden_size=128,
+        num_layers=2,
+        output_horizons=24
+    )
+    if dataset is None:
+        simulator = HydrologicalSimulator(river_id=river_id)
+        dataset = simulator.generate_full_dataset(num_days=num_days)
+
+    # Use river level as target
+    X = dataset["X_train"]
+    y = dataset.get("y_train_level", dataset["X_train"][:, 5])  # prev_river_level
+
+    lstm.train(
+        X, y,
+        feature_names=dataset["feature_names"],
+        epochs=epochs,
+        batch_size=16,
+        verbose=True,
+        checkpoint_dir=checkpoint_dir,
+        resume_from=_resume_checkpoint(checkpoint_dir, resume)
+    )
+
+    os.makedirs(os.path.dirname(model_path) or ".", exist_ok=True)
+    lstm.save(model_path)
+    return model_path
+
+
+def train_multi_river_lstm(
+    model_path: str,
+    river_ids: Optional[List[str]] = None,
+    num_days: int = 365,
+    datasets: Optional[Dict[str, Dict]] = None,
+    epochs: int = 50,
+    checkpoint_dir: Optional[str] = None,
+    resume: bool = False
+) -> str:
+    """
+    Train the shared multi-river LSTM on simulated data for several rivers,
+    save it and return its path.
+
+    Args:
+        model_path: Where to save the .pt checkpoint
+        river_ids: Rivers to cover (default: every river in INDIA_RIVERS)
+        num_days: Days of data to simulate per river (ignored for rivers in datasets)
+        datasets: Pre-generated HydrologicalSimulator datasets by river
+        epochs: Training epochs
+        checkpoint_dir: Directory for periodic training checkpoints
+        resume: Continue from the checkpoint in checkpoint_dir, if there is one
+    """
+    from data.hydrological_simulator import HydrologicalSimulator, INDIA_RIVERS
+    from ml.multi_river_lstm import MultiRiverLSTMFloodPredictor
+
+    river_ids = river_ids or list(INDIA_RIVERS)
+    datasets = dict(datasets or {})
+    for river_id in river_ids:
+        if river_id not in datasets:
+            datasets[river_id] = HydrologicalSimulator(river_id=river_id).generate_full_dataset(num_days=num_days)
+
+    print(f"🏋️ Training shared LSTM for {len(river_ids)} rivers...")
+    lstm = MultiRiverLSTMFloodPredictor(
+        sequence_length=7,
+        hidden_size=128,
+        num_layers=2,
+        output_horizons=24
+    )
+    # Same target as train_lstm_predictor: river level
+    lstm.train(
+        {
+            river_id: (datasets[river_id]["X_train"],
+                       datasets[river_id].get("y_train_level", datasets[river_id]["X_train"][:, 5]))
+            for river_id in river_ids
+        },
+        feature_names=datasets[river_ids[0]]["feature_names"],
+        epochs=epochs,
+        batch_size=16,
+        verbose=True,
+        checkpoint_dir=checkpoint_dir,
+        resume_from=_resume_checkpoint(checkpoint_dir, resume)
+    )
+
+    os.makedirs(os.path.dirname(model_path) or ".", exist_ok=True)
+    lstm.save(model_path)
+    return model_path
+
+
+def _resume_checkpoint(checkpoint_dir: Optional[str], resume: bool) -> Optional[str]:
+    """The training checkpoint to resume from, or None to start at epoch 0."""
+    from ml.lstm_flood_predictor import TRAINING_CHECKPOINT
+
+    if not (resume and checkpoint_dir):
+        return None
+    path = os.path.join(checkpoint_dir, TRAINING_CHECKPOINT)
+    if not os.path.exists(path):
+        print(f"⚠️ No training checkpoint in {checkpoint_dir}; starting from epoch 0")
+        return None
+    return path
+
+
+def train_rf_from_history(
+    history_path: str,
+    model_path: Optional[str] = None,
+    sample_size: int = 200_000,
+    chunk_rows: int = 100_000,
+    n_jobs: int = -1,
+    fast: bool = False
+):
+    """
+    Train an RF classifier on a gauge history file too large to load whole.
+
+    The file is streamed once in chunks and the forest is fitted on a
+    uniform reservoir sample of at most sample_size rows, so memory is
+    bounded by the sample, not by the history length.
+
+    Args:
+        history_path: Raw timeseries or feature CSV (see data.gauge_stream)
+        model_path: Where to save the .joblib (plus compact) artifacts
+        sample_size: Rows kept for fitting
+        chunk_rows: Rows read from disk at a time
+        n_jobs: Cores used to fit the trees (-1 = all)
+        fast: Skip cross-validation and validate on out-of-bag votes
+    """
+    from data.gauge_stream import FEATURE_NAMES, iter_history, reservoir_sample
+    from ml.rf_flood_classifier import RandomForestFloodClassifier
+
+    sample, rows_seen = reservoir_sample(iter_history(history_path, chunk_rows), sample_size)
+    print(f"🪣 Sampled {len(sample.X):,} of {rows_seen:,} rows from {history_path}")
+    classifier = RandomForestFloodClassifier(n_jobs=n_jobs)
+    classifier.train(
+        sample.X,
+        sample.y_flood,
+        feature_names=list(FEATURE_NAMES),
+        model_save_path=model_path,
+        fast=fast
+    )
+    return classifier
+
+
+def train_lstm_from_history(
+    history_path: str,
+    model_path: str,
+    chunk_rows: int = 100_000,
+    epochs: int = 50,
+    checkpoint_dir: Optional[str] = None,
+    resume: bool = False
+) -> str:
+    """
+    Train an LSTM predictor out of core on a gauge history file, save it and
+    return its path. Minibatches are streamed from the file chunk by chunk.
+
+    Args:
+        history_path: Raw timeseries or feature CSV (see data.gauge_stream)
+        model_path: Where to save the .pt checkpoint
+        chunk_rows: Rows read from disk at a time
+        epochs: Training epochs
+        checkpoint_dir: Directory for periodic training checkpoints
+        resume: Continue from the checkpoint in checkpoint_dir, if there is one
+    """
+    from data.gauge_stream import FEATURE_NAMES, history_source
+    from ml.lstm_flood_predictor import LSTMFloodPredictor
+
+    print(f"🏋️ Streaming LSTM training from {history_path}...")
+    lstm = LSTMFloodPredictor(
+        sequence_length=7,
+        hidden_size=128,
+        num_layers=2,
+        output_horizons=24
+    )
+    lstm.train_streaming(
+        history_source(history_path, chunk_rows),
+        feature_names=list(FEATURE_NAMES),
+        epochs=epochs,
+        batch_size=16,
+        verbose=True,
+        checkpoint_dir=checkpoint_dir,
+        resume_from=_resume_checkpoint(checkpoint_dir, resume)
+    )
+
+    os.makedirs(os.path.dirname(model_path) or ".", exist_ok=True)
+    lstm.save(model_path)
+    return model_path
+
+
+# =============================================================================
+# Warm-up helpers
+# =============================================================================
+
+def warm_up_rf(classifier) -> None:
+    """Run one throwaway prediction through the RF classifier."""
+    classifier.predict_single({name: 0.0 for name in classifier.FEATURE_NAMES})
+
+
+def warm_up_lstm(predictor) -> None:
+    """Run one throwaway forward pass (with and without MC dropout) through the LSTM."""
+    n_features = len(predictor.feature_names) or 9
+    dummy = np.zeros((predictor.sequence_length, n_features))
+    predictor.predict(dummy, mc_samples=2)
+    predictor.predict(dummy, return_uncertainty=False)
+
+
+# =============================================================================
+# Lifecycle Manager
+# =============================================================================
+
+class ModelSpec:
+    """How to obtain one model: load it, or train it in a worker process, then warm it."""
+
+    def __init__(
+        self,
+        key: str,
+        load: Callable[[], Optional[Any]],
+        train: Optional[Tuple[Callable, tuple]] = None,
+        after_train: Optional[Callable[[Any], Any]] = None,
+        warmup: Optional[Callable[[Any], None]] = None,
+        retry_after: int = 5,
+        version: Optional[Callable[[], Optional[str]]] = None
+    ):
+        """
+        Args:
+            key: Model cache key (e.g. "rf_cauvery")
+            load: Returns the model from its artifact, or None if there is none
+            train: (function, args) run in the worker process when load() gives None
+            after_train: Turns the worker's return value into a model (default: identity)
+            warmup: Dummy inference run before the model is published
+            retry_after: Seconds clients are asked to wait while the model warms
+            version: Returns a fingerprint of the artifact being published
+                (e.g. file size + mtime), recorded when the model becomes ready
+        """
+        self.key = key
+        self.load = load
+        self.train = train
+        self.after_train = after_train
+        self.warmup = warmup
+        self.retry_after = retry_after
+        self.version = version
+
+
+class ModelLifecycleManager:
+    """
+    Background loader/trainer for the models held in a route module's cache dict.
+
+    The manager publishes a model into `models` only once it is fully loaded
+    and warmed, so a plain dict lookup in the request path stays lock-free.
+    """
+
+    def __init__(
+        self,
+        models: Dict[str, Any],
+        max_threads: int = 4,
+        max_processes: int = 1,
+        max_resident: Optional[int] = None,
+        failure_backoff: float = 30.0,
+        max_failure_backoff: float = 900.0
+    ):
+        """
+        Args:
+            models: Dict the ready models are published into
+            max_threads: Threads for loading/warming
+            max_processes: Worker processes for training
+            max_resident: Unload least recently used models beyond this many
+                (None keeps every model loaded)
+            failure_backoff: Seconds before a failed key is retried; doubles
+                with each consecutive failure
+            max_failure_backoff: Upper bound of the retry cooldown
+        """
+        self._models = models
+        self._specs: Dict[str, ModelSpec] = {}
+        self._status: Dict[str, Dict[str, Any]] = {}
+        self._ready: Dict[str, threading.Event] = {}
+        self._versions: Dict[str, Optional[str]] = {}
+        # Last version ever published per key (survives LRU unloads)
+        self._published: Dict[str, Optional[str]] = {}
+        self._listeners: List[Callable[[str, Optional[str]], None]] = []
+        self._last_used: "OrderedDict[str, None]" = OrderedDict()
+        self.max_resident = max_resident
+        self.failure_backoff = failure_backoff
+        self.max_failure_backoff = max_failure_backoff
+        # key -> (consecutive failures, time.monotonic() before which no retry starts)
+        self._failures: Dict[str, Tuple[int, float]] = {}
+        self.unloads = 0
+        self._lock = threading.Lock()
+        self._threads = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="model-init")
+        self._max_processes = max_processes
+        self._processes: Optional[ProcessPoolExecutor] = None
+
+    def register(self, spec: ModelSpec) -> None:
+        """Register how a model key is loaded/trained."""
+        self._specs[spec.key] = spec
+
+    def add_listener(self, callback: Callable[[str, Optional[str]], None]) -> None:
+        """Call callback(key, new_version) whenever a key's published version changes."""
+        self._listeners.append(callback)
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Run fn(*args, **kwargs) in the training worker process (e.g. an on-demand retrain)."""
+        return self._process_pool().submit(fn, *args, **kwargs)
+
+    def is_registered(self, key: str) -> bool:
+        return key in self._specs
+
+    def start(self, keys: Optional[List[str]] = None) -> None:
+        """Schedule initialisation of the given keys (default: every registered key)."""
+        for key in keys or list(self._specs):
+            self.ensure(key)
+
+    def ensure(self, key: str) -> None:
+        """
+        Schedule initialisation of a key unless it is ready, already in
+        progress, or failed and still cooling down.
+        """
+        if key in self._models:
+            return
+        with self._lock:
+            status = self._status.get(key)
+            if status is not None and status["state"] != "failed":
+                return
+            if status is not None and self._cooldown_locked(key) > 0:
+                return
+            self._status[key] = {"state": "pending", "since": datetime.now().isoformat()}
+            self._ready[key] = threading.Event()
+        self._threads.submit(self._initialise, key)
+
+    def get(self, key: str, wait: float = 0.0) -> Any:
+        """
+        Return a ready model, waiting at most `wait` seconds for it.
+
+        A short wait lets callers that are already off the event loop ride
+        out a lazy artifact load; training still surfaces as ModelWarmingError.
+
+        Raises:
+            ModelWarmingError: model is still loading/training/warming, or it
+                failed and is cooling down (retry_after is the time left)
+            KeyError: nothing is registered under this key
+        """
+        model = self._models.get(key)
+        if model is None:
+            if key not in self._specs:
+                raise KeyError(key)
+            self.ensure(key)
+            event = self._ready.get(key)
+            if wait > 0 and event is not None:
+                event.wait(wait)
+            model = self._models.get(key)
+            if model is None:
+                with self._lock:
+                    state = self._status.get(key, {}).get("state", "pending")
+                    retry_after = self._specs[key].retry_after
+                    if state == "failed":
+                        retry_after = max(1, int(np.ceil(self._cooldown_locked(key))))
+                raise ModelWarmingError(key, state, retry_after)
+        if self.max_resident is not None:
+            with self._lock:
+                if key in self._last_used:
+                    self._last_used.move_to_end(key)
+        return model
+
+    def put(self, key: str, model: Any, version: Optional[str] = None) -> None:
+        """
+        Publish a ready model (also used for externally trained models, e.g.
+        from a /train endpoint). Without an explicit version the spec's
+        version() fingerprint is recorded.
+        """
+        spec = self._specs.get(key)
+        if version is None and spec is not None and spec.version is not None:
+            version = spec.version()
+        with self._lock:
+            self._models[key] = model
+            self._versions[key] = version
+            changed = key in self._published and self._published[key] != version
+            self._published[key] = version
+            self._status[key] = {"state": "ready", "since": datetime.now().isoformat()}
+            self._failures.pop(key, None)
+            self._last_used[key] = None
+            self._last_used.move_to_end(key)
+            event = self._ready.pop(key, None)
+            evicted = self._evict_lru(keep=key)
+        if event is not None:
+            event.set()
+        for evicted_key in evicted:
+            print(f"♻️ Unloaded least recently used model '{evicted_key}'")
+        if changed:
+            for callback in self._listeners:
+                try:
+                    callback(key, version)
+                except Exception as e:
+                    print(f"⚠️ Version listener failed for '{key}': {e}")
+
+    def unload(self, key: str) -> bool:
+        """Drop a ready model; it is reloaded lazily on its next use."""
+        with self._lock:
+            return self._unload_locked(key)
+
+    def version(self, key: str) -> Optional[str]:
+        """Fingerprint recorded when the loaded model was published (None if not loaded)."""
+        if key not in self._models:
+            return None
+        return self._versions.get(key)
+
+    def _unload_locked(self, key: str) -> bool:
+        self._last_used.pop(key, None)
+        self._versions.pop(key, None)
+        if self._models.pop(key, None) is None:
+            return False
+        self._status.pop(key, None)
+        self.unloads += 1
+        return True
+
+    def _evict_lru(self, keep: str) -> List[str]:
+        """Unload least recently used models beyond max_resident (lock held)."""
+        evicted = []
+        if self.max_resident is None:
+            return evicted
+        for key in list(self._last_used):
+            if len(self._last_used) <= self.max_resident:
+                break
+            if key != keep and self._unload_locked(key):
+                evicted.append(key)
+        return evicted
+
+    def state(self, key: str) -> str:
+        """Current lifecycle state of a key."""
+        if key in self._models:
+            return "ready"
+        return self._status.get(key, {}).get("state", "unloaded")
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Lifecycle state of every registered key (failed keys include their retry cooldown)."""
+        report = {}
+        with self._lock:
+            for key in self._specs:
+                entry = {**self._status.get(key, {}), "state": self.state(key)}
+                if entry["state"] == "failed":
+                    entry["retry_in_s"] = round(self._cooldown_locked(key), 1)
+                report[key] = entry
+        return report
+
+    def shutdown(self) -> None:
+        """Stop background threads and the training worker process."""
+        self._threads.shutdown(wait=False, cancel_futures=True)
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
+
+    def _set_state(self, key: str, state: str, **extra) -> None:
+        with self._lock:
+            self._status[key] = {"state": state, "since": datetime.now().isoformat(), **extra}
+            if state == "failed":
+                failures = self._failures.get(key, (0, 0.0))[0] + 1
+                backoff = min(self.failure_backoff * 2 ** (failures - 1), self.max_failure_backoff)
+                self._failures[key] = (failures, time.monotonic() + backoff)
+                self._status[key]["failures"] = failures
+                event = self._ready.pop(key, None)
+                if event is not None:
+                    event.set()
+
+    def _cooldown_locked(self, key: str) -> float:
+        """Seconds until a failed key may be retried (lock held)."""
+        _, retry_at = self._failures.get(key, (0, 0.0))
+        return max(0.0, retry_at - time.monotonic())
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        if self._processes is None:
+            # spawn: forking a process that already runs torch/OpenMP threads can deadlock
+            self._processes = ProcessPoolExecutor(
+                max_workers=self._max_processes,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._processes
+
+    def _initialise(self, key: str) -> None:
+        spec = self._specs[key]
+        try:
+            self._set_state(key, "loading")
+            model = spec.load()
+
+            if model is None:
+                if spec.train is None:
+                    raise RuntimeError(f"No artifact and no trainer for '{key}'")
+                self._set_state(key, "training")
+                fn, args = spec.train
+                result = self._process_pool().submit(fn, *args).result()
+                model = spec.after_train(result) if spec.after_train else result
+
+            if spec.warmup is not None:
+                self._set_state(key, "warming")
+                spec.warmup(model)
+
+            self.put(key, model)
+            print(f"✅ Model '{key}' ready")
+        except Exception as e:
+            self._set_state(key, "failed", error=str(e))
+            with self._lock:
+                cooldown = self._cooldown_locked(key)
+            print(f"❌ Model '{key}' failed to initialise: {e} (retry in {cooldown:.0f}s)")
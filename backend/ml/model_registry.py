@@ -0,0 +1,375 @@
+"""
+Per-River Model Registry
+========================
+Single cache of the per-river flood models shared by every route module
+(routes/frontend_api.py and routes/india_rivers.py), so each process holds
+at most one copy of each river's Random Forest / LSTM.
+
+- Artifact paths are absolute (backend/models/...), independent of the
+  working directory the server was started from.
+- RF models are served from the compact forest artifact (float32 values,
+  int32 indices, rf_flood_<river>.forest.npz) when one exists; set
+  FLOOD_RF_ARTIFACT=sklearn to load the full .joblib forest instead.
+- .joblib artifacts load with joblib mmap_mode="r" and LSTM checkpoints with
+  torch mmap, so large arrays are shared file pages rather than private copies.
+- LSTMs are served from the shared multi-river model (lstm_flood_shared.pt,
+  see ml/multi_river_lstm.py) for the rivers it covers when it exists: every
+  river's "lstm_<river>" entry is then a view of the same weights. Set
+  FLOOD_LSTM_ARTIFACT=per_river to load the per-river checkpoints instead.
+- FLOOD_LSTM_RUNTIME selects the LSTM inference runtime: "eager" (default),
+  "torchscript" or "int8" (dynamic int8 LSTM / Linear weights, CPU). The
+  exported lstm_flood_<river>.<runtime>.pt is used when it is up to date,
+  else the runtime is compiled from the checkpoint at load.
+- Models load lazily on first use via the ModelLifecycleManager; set
+  FLOOD_MODEL_PRELOAD ("all", "rf", "lstm" or a comma-separated key list)
+  to warm some at startup instead.
+- FLOOD_MODEL_MAX_RESIDENT caps how many models stay loaded; the least
+  recently used rivers are unloaded and reloaded from disk when needed.
+"""
+
+import os
+import threading
+from concurrent.futures import Future
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from data.hydrological_simulator import INDIA_RIVERS
+from ml.rf_flood_classifier import RandomForestFloodClassifier
+from ml.model_lifecycle import (
+    ModelLifecycleManager, ModelSpec, ModelWarmingError,
+    train_rf_classifier, train_lstm_predictor, warm_up_rf, warm_up_lstm
+)
+
+try:
+    from ml.lstm_flood_predictor import LSTMFloodPredictor
+    from ml.multi_river_lstm import MultiRiverLSTMFloodPredictor
+    LSTM_AVAILABLE = True
+except ImportError:
+    LSTMFloodPredictor = None
+    MultiRiverLSTMFloodPredictor = None
+    LSTM_AVAILABLE = False
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models")
+
+ARTIFACT_PATTERNS = {
+    "rf": "rf_flood_{river_id}.joblib",
+    "rf_compact": "rf_flood_{river_id}.forest.npz",
+    "lstm": "lstm_flood_{river_id}.pt",
+    "lstm_shared": "lstm_flood_shared.pt",
+    "keras_lstm": "lstm_flood_{river_id}.h5",
+}
+
+
+def artifact_path(kind: str, river_id: str) -> str:
+    """Absolute path of a river's model artifact ("rf", "rf_compact", "lstm", "lstm_shared" or "keras_lstm")."""
+    return os.path.join(MODELS_DIR, ARTIFACT_PATTERNS[kind].format(river_id=river_id))
+
+
+def rf_serving_path(river_id: str) -> str:
+    """RF artifact serving loads: the compact forest if present, else the .joblib forest."""
+    compact_path = artifact_path("rf_compact", river_id)
+    if os.environ.get("FLOOD_RF_ARTIFACT", "compact") != "sklearn" and os.path.exists(compact_path):
+        return compact_path
+    return artifact_path("rf", river_id)
+
+
+def shared_lstm_enabled() -> bool:
+    """Whether LSTMs are served from the shared multi-river artifact (if it exists)."""
+    return LSTM_AVAILABLE and os.environ.get("FLOOD_LSTM_ARTIFACT", "shared") != "per_river"
+
+
+def lstm_serving_path(river_id: str) -> str:
+    """LSTM artifact serving loads: the shared multi-river model if present, else the river's own."""
+    shared_path = artifact_path("lstm_shared", river_id)
+    if shared_lstm_enabled() and os.path.exists(shared_path):
+        return shared_path
+    return artifact_path("lstm", river_id)
+
+
+def artifact_version(path: str) -> Optional[str]:
+    """Cheap fingerprint of an artifact file (size + mtime), None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return f"{stat.st_size:x}-{stat.st_mtime_ns:x}"
+
+
+# =============================================================================
+# Artifact Loaders
+# =============================================================================
+
+def load_rf_classifier(river_id: str) -> Optional[RandomForestFloodClassifier]:
+    """Load the RF classifier for a river (compact, or memory-mapped .joblib), if an artifact exists."""
+    model_path = rf_serving_path(river_id)
+    if os.path.exists(model_path):
+        return RandomForestFloodClassifier(model_path=model_path, mmap_mode="r")
+    return None
+
+
+# The loaded shared multi-river LSTM, keyed by artifact version (at most one)
+_shared_lstm: Dict[str, Any] = {}
+_shared_lstm_lock = threading.Lock()
+
+
+def load_shared_lstm():
+    """The shared multi-river LSTM, loaded once per artifact version; None without one."""
+    path = artifact_path("lstm_shared", "")
+    version = artifact_version(path)
+    if not shared_lstm_enabled() or version is None:
+        return None
+    with _shared_lstm_lock:
+        shared = _shared_lstm.get(version)
+        if shared is None:
+            shared = MultiRiverLSTMFloodPredictor(
+                runtime=os.environ.get("FLOOD_LSTM_RUNTIME", "eager")
+            ).load(path, mmap=True)
+            # A new version replaces the old one; views already handed out keep it alive
+            _shared_lstm.clear()
+            _shared_lstm[version] = shared
+    return shared
+
+
+def load_lstm_predictor(river_id: str):
+    """
+    Load the LSTM predictor for a river (memory-mapped), if an artifact
+    exists: a view of the shared multi-river model when it covers the
+    river, else the river's own checkpoint.
+    """
+    shared = load_shared_lstm()
+    if shared is not None and river_id in shared.river_ids:
+        return shared.for_river(river_id)
+    model_path = artifact_path("lstm", river_id)
+    if not LSTM_AVAILABLE or not os.path.exists(model_path):
+        return None
+    lstm = LSTMFloodPredictor(
+        sequence_length=7,
+        hidden_size=128,
+        num_layers=2,
+        output_horizons=24,
+        runtime=os.environ.get("FLOOD_LSTM_RUNTIME", "eager")
+    )
+    return lstm.load(model_path, mmap=True)
+
+
+# =============================================================================
+# Memory Accounting
+# =============================================================================
+
+def _artifact_mappings() -> List[Tuple[int, int]]:
+    """Address ranges of files under MODELS_DIR mapped into this process (Linux)."""
+    ranges = []
+    try:
+        with open("/proc/self/maps") as maps:
+            for line in maps:
+                if MODELS_DIR in line:
+                    start, end = line.split()[0].split("-")
+                    ranges.append((int(start, 16), int(end, 16)))
+    except OSError:
+        pass
+    return ranges
+
+
+def _is_mapped(address: int, ranges: List[Tuple[int, int]]) -> bool:
+    return any(start <= address < end for start, end in ranges)
+
+
+def model_memory(model: Any, ranges: Optional[List[Tuple[int, int]]] = None) -> Dict[str, int]:
+    """
+    Bytes held by a model's arrays, split into private and memory-mapped.
+
+    Private bytes are resident in this process only; mapped bytes live in
+    artifact file pages the OS shares between processes loading the same
+    file. Small Python-object overhead is not counted.
+    """
+    if ranges is None:
+        ranges = _artifact_mappings()
+    private, mapped = 0, 0
+
+    def add(address: int, nbytes: int) -> None:
+        nonlocal private, mapped
+        if _is_mapped(address, ranges):
+            mapped += nbytes
+        else:
+            private += nbytes
+
+    if isinstance(model, RandomForestFloodClassifier):
+        forest = model.model
+        for estimator in getattr(forest, "estimators_", []):
+            # Tree.__getstate__ exposes the node/value buffers as arrays
+            state = estimator.tree_.__getstate__()
+            for array in (state["nodes"], state["values"]):
+                add(array.ctypes.data, array.nbytes)
+        for attr in ("mean_", "scale_", "var_"):
+            array = getattr(model.scaler, attr, None)
+            if isinstance(array, np.ndarray):
+                add(array.ctypes.data, array.nbytes)
+        if model.engine is not None:
+            private += model.engine.nbytes
+    elif LSTM_AVAILABLE and isinstance(model, LSTMFloodPredictor) and model.model is not None:
+        for tensor in list(model.model.parameters()) + list(model.model.buffers()):
+            add(tensor.data_ptr(), tensor.element_size() * tensor.nelement())
+    return {"private_bytes": private, "mapped_bytes": mapped}
+
+
+# =============================================================================
+# Registry
+# =============================================================================
+
+class ModelRegistry:
+    """
+    Shared per-river model cache on top of a ModelLifecycleManager.
+
+    Keys are "rf_<river>", "lstm_<river>" (PyTorch) and "keras_lstm_<river>".
+    RF and PyTorch LSTM keys are loaded/trained in the background; other
+    models can be cached synchronously through get_or_load().
+    """
+
+    def __init__(self, rivers: Dict[str, Dict], max_resident: Optional[int] = None):
+        self.rivers = rivers
+        self.models: Dict[str, Any] = {}
+        self.lifecycle = ModelLifecycleManager(self.models, max_resident=max_resident)
+        self._sync_lock = threading.Lock()
+        self._started = False
+        self._shut_down = False
+        # key -> function giving the artifact path a load would use
+        self._artifacts: Dict[str, Callable[[], str]] = {}
+
+        # RF keys first so the fast models are not queued behind LSTM training
+        for river_id in rivers:
+            key = f"rf_{river_id}"
+            self._artifacts[key] = partial(rf_serving_path, river_id)
+            self.lifecycle.register(ModelSpec(
+                key=key,
+                load=partial(load_rf_classifier, river_id),
+                # Cold-start training blocks serving: skip the CV refits
+                train=(partial(train_rf_classifier, fast=True), (river_id, 365, artifact_path("rf", river_id))),
+                warmup=warm_up_rf,
+                retry_after=5,
+                version=partial(self._artifact_version, key)
+            ))
+        if LSTM_AVAILABLE:
+            for river_id in rivers:
+                key = f"lstm_{river_id}"
+                path = artifact_path("lstm", river_id)
+                self._artifacts[key] = partial(lstm_serving_path, river_id)
+                self.lifecycle.register(ModelSpec(
+                    key=key,
+                    load=partial(load_lstm_predictor, river_id),
+                    train=(train_lstm_predictor, (river_id, path)),
+                    after_train=lambda _path, river_id=river_id: load_lstm_predictor(river_id),
+                    warmup=warm_up_lstm,
+                    retry_after=30,
+                    version=partial(self._artifact_version, key)
+                ))
+
+    def start(self, preload: Optional[str] = None) -> None:
+        """
+        Schedule startup preloading (once per process; later calls are no-ops).
+
+        Args:
+            preload: "all", "none", "rf", "lstm" or comma-separated keys;
+                defaults to $FLOOD_MODEL_PRELOAD, else "none" (fully lazy)
+        """
+        if self._started:
+            return
+        self._started = True
+        preload = (preload if preload is not None else os.environ.get("FLOOD_MODEL_PRELOAD", "none")).strip()
+        if preload == "none" or not preload:
+            return
+        registered = [key for key in self.lifecycle.status()]
+        if preload == "all":
+            keys = registered
+        elif preload in ("rf", "lstm"):
+            keys = [key for key in registered if key.startswith(f"{preload}_")]
+        else:
+            keys = [key.strip() for key in preload.split(",") if self.lifecycle.is_registered(key.strip())]
+        self.lifecycle.start(keys)
+
+    def shutdown(self) -> None:
+        """Stop background loading/training (safe to call from several routers)."""
+        if not self._shut_down:
+            self._shut_down = True
+            self.lifecycle.shutdown()
+
+    def get(self, key: str, wait: float = 0.0) -> Any:
+        """Ready model for a key (see ModelLifecycleManager.get)."""
+        return self.lifecycle.get(key, wait=wait)
+
+    def put(self, key: str, model: Any) -> None:
+        """Publish a freshly trained model."""
+        self.lifecycle.put(key, model)
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Run a training job in the lifecycle's worker process, off the serving process's GIL."""
+        return self.lifecycle.submit(fn, *args, **kwargs)
+
+    def add_listener(self, callback: Callable[[str, Optional[str]], None]) -> None:
+        """Be told (key, new_version) when a model is replaced by a different version."""
+        self.lifecycle.add_listener(callback)
+
+    def get_or_load(self, key: str, loader: Callable[[], Any]) -> Any:
+        """Cache a model that is cheap to build synchronously (no background lifecycle)."""
+        model = self.models.get(key)
+        if model is None:
+            with self._sync_lock:
+                model = self.models.get(key)
+                if model is None:
+                    model = loader()
+                    self.models[key] = model
+        return model
+
+    def version(self, key: str) -> str:
+        """
+        Fingerprint of the model a request for this key is served by.
+
+        The version recorded when the loaded model was published; for a model
+        that is not loaded yet, the fingerprint of the artifact it would load.
+        """
+        version = self.lifecycle.version(key)
+        if version is None:
+            version = self._artifact_version(key)
+        return version or "none"
+
+    def _artifact_version(self, key: str) -> Optional[str]:
+        """Fingerprint of the artifact file a load of this key would read."""
+        path_of = self._artifacts.get(key)
+        if path_of is None:
+            return None
+        path = path_of()
+        version = artifact_version(path)
+        # The format is part of the version: switching formats changes outputs slightly
+        return f"{os.path.basename(path)}:{version}" if version else None
+
+    def state(self, key: str) -> str:
+        return self.lifecycle.state(key)
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        return self.lifecycle.status()
+
+    def memory_report(self) -> Dict[str, Any]:
+        """Per-model private/mapped bytes plus totals and LRU settings."""
+        ranges = _artifact_mappings()
+        per_model = {key: model_memory(model, ranges) for key, model in list(self.models.items())}
+        # River views hold no weights; the shared LSTM is counted once
+        for shared in list(_shared_lstm.values()):
+            per_model["lstm_shared"] = model_memory(shared, ranges)
+        return {
+            "models": per_model,
+            "loaded": len(per_model),
+            "total_private_bytes": sum(m["private_bytes"] for m in per_model.values()),
+            "total_mapped_bytes": sum(m["mapped_bytes"] for m in per_model.values()),
+            "max_resident": self.lifecycle.max_resident,
+            "lru_unloads": self.lifecycle.unloads,
+        }
+
+
+def _max_resident_from_env() -> Optional[int]:
+    value = os.environ.get("FLOOD_MODEL_MAX_RESIDENT")
+    return int(value) if value else None
+
+
+# Shared by every route module
+registry = ModelRegistry(INDIA_RIVERS, max_resident=_max_resident_from_env())
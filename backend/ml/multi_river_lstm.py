@@ -0,0 +1,379 @@
+"""
+Multi-River LSTM Flood Predictor
+================================
+One FloodLSTM shared by every river, instead of one lstm_flood_<river>.pt
+per river whose memory and warm-up time grow with the river catalog.
+
+- A learned river embedding is appended to every input time step, so the
+  shared weights can condition on which river / gauge they are reading.
+- Inputs and targets keep per-river normalisation (each river's own
+  mean / std), so rivers with very different level ranges train together.
+- Requests for different rivers batch into one forward pass
+  (predict_many(sequences, river_ids)).
+- for_river() gives the single-river LSTMFloodPredictor interface on top of
+  the shared weights; the model registry serves these views, so serving
+  memory is one model however many rivers it covers.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from ml.lstm_flood_predictor import FloodLSTM, LSTMFloodPredictor
+
+
+class MultiRiverFloodLSTM(nn.Module):
+    """FloodLSTM over [features, river embedding] at every time step."""
+
+    def __init__(
+        self,
+        n_rivers: int,
+        input_size: int = 9,
+        embedding_dim: int = 8,
+        hidden_size: int = 128,
+        num_layers: int = 2,
+        dropout: float = 0.3,
+        output_horizons: int = 24
+    ):
+        super().__init__()
+        self.river_embedding = nn.Embedding(n_rivers, embedding_dim)
+        self.backbone = FloodLSTM(
+            input_size=input_size + embedding_dim,
+            hidden_size=hidden_size,
+            num_layers=num_layers,
+            dropout=dropout,
+            output_horizons=output_horizons
+        )
+
+    def forward(
+        self,
+        x: torch.Tensor,
+        rivers: torch.Tensor,
+        return_attention: bool = False
+    ) -> Tuple[torch.Tensor, torch.Tensor, Optional[torch.Tensor]]:
+        # x: (batch, seq_len, features), rivers: (batch,) river indices
+        embedding = self.river_embedding(rivers).unsqueeze(1).expand(-1, x.shape[1], -1)
+        return self.backbone(torch.cat([x, embedding], dim=-1), return_attention)
+
+
+class MultiRiverLSTMFloodPredictor(LSTMFloodPredictor):
+    """
+    LSTMFloodPredictor trained on several rivers at once.
+
+    scaler_mean / scaler_std are (rivers, features) and target_mean /
+    target_std are (rivers,) arrays, row i belonging to river_ids[i].
+    """
+
+    def __init__(self, river_ids: Optional[Sequence[str]] = None, embedding_dim: int = 8, **kwargs):
+        """
+        Args:
+            river_ids: Rivers the model covers (set by train() / load())
+            embedding_dim: Size of the learned river embedding
+            **kwargs: LSTMFloodPredictor settings (hidden_size, runtime, ...)
+        """
+        super().__init__(**kwargs)
+        self.river_ids = list(river_ids or [])
+        self.embedding_dim = embedding_dim
+
+    def river_index(self, river_ids: Sequence[str]) -> np.ndarray:
+        """Embedding row of each river id."""
+        positions = {river_id: i for i, river_id in enumerate(self.river_ids)}
+        unknown = sorted(set(river_ids) - set(positions))
+        if unknown:
+            raise ValueError(f"Rivers not covered by the shared LSTM: {', '.join(unknown)}")
+        return np.array([positions[river_id] for river_id in river_ids], dtype=np.int64)
+
+    def for_river(self, river_id: str) -> "RiverLSTMView":
+        """Single-river predictor interface backed by this model."""
+        self.river_index([river_id])
+        return RiverLSTMView(self, river_id)
+
+    # =========================================================================
+    # LSTMFloodPredictor hooks
+    # =========================================================================
+
+    def _build_model(self, input_size: int):
+        """Build the shared LSTM model."""
+        self.model = MultiRiverFloodLSTM(
+            n_rivers=len(self.river_ids),
+            input_size=input_size,
+            embedding_dim=self.embedding_dim,
+            hidden_size=self.hidden_size,
+            num_layers=self.num_layers,
+            dropout=self.dropout,
+            output_horizons=self.output_horizons
+        ).to(self.device)
+
+        print(f"🧠 Multi-river LSTM Model built on {self.device}")
+        print(f"   Rivers: {len(self.river_ids)} (embedding dim {self.embedding_dim})")
+        print(f"   Layers: {self.num_layers}, Hidden: {self.hidden_size}")
+        print(f"   Parameters: {sum(p.numel() for p in self.model.parameters()):,}")
+
+    def _forward(self, X: torch.Tensor, rivers: Optional[np.ndarray] = None):
+        return self.model(X, torch.as_tensor(rivers, dtype=torch.long, device=self.device), return_attention=True)
+
+    def _target_stats(self, rivers: Optional[np.ndarray] = None):
+        return self.target_mean[rivers][:, None], self.target_std[rivers][:, None]
+
+    def _config(self) -> Dict:
+        return {**super()._config(), "river_ids": self.river_ids, "embedding_dim": self.embedding_dim}
+
+    def _apply_config(self, config: Dict) -> None:
+        super()._apply_config(config)
+        self.river_ids = list(config["river_ids"])
+        self.embedding_dim = config["embedding_dim"]
+
+    def _architecture(self) -> Dict:
+        return {
+            **super()._architecture(),
+            "type": "Bidirectional LSTM + Attention + river embedding",
+            "river_ids": self.river_ids,
+            "embedding_dim": self.embedding_dim,
+        }
+
+    def runtime_parity(
+        self,
+        runtime_model: torch.nn.Module,
+        X: Dict[str, np.ndarray],
+        y: Dict[str, np.ndarray],
+        batch_size: int = 256
+    ) -> Dict:
+        """
+        LSTMFloodPredictor.runtime_parity() over several rivers: each river's
+        windows are normalised with its own statistics and run with its
+        river index.
+
+        Args:
+            runtime_model: Compiled runtime (see compile_runtime)
+            X: river_id -> validation features (samples, features)
+            y: river_id -> validation targets
+        """
+        if not isinstance(X, dict) or not isinstance(y, dict):
+            raise TypeError("The shared LSTM validates per river: pass {river_id: X} and {river_id: y}")
+        X_parts, y_parts, river_parts = [], [], []
+        for river_id, k in zip(X, self.river_index(list(X))):
+            X_norm = (np.asarray(X[river_id], dtype=float) - self.scaler_mean[k]) / self.scaler_std[k]
+            X_seq, y_seq = self._create_sequences(X_norm, np.asarray(y[river_id], dtype=float))
+            X_parts.append(X_seq)
+            y_parts.append(y_seq)
+            river_parts.append(np.full(len(X_seq), k, dtype=np.int64))
+        return self._runtime_parity(
+            runtime_model, np.concatenate(X_parts), np.concatenate(y_parts), np.concatenate(river_parts), batch_size
+        )
+
+    # =========================================================================
+    # Training
+    # =========================================================================
+
+    def train(
+        self,
+        datasets: Dict[str, Tuple[np.ndarray, np.ndarray]],
+        feature_names: List[str] = None,
+        epochs: int = 100,
+        batch_size: int = 32,
+        learning_rate: float = 0.001,
+        early_stopping_patience: int = 15,
+        val_fraction: float = 0.2,
+        verbose: bool = True,
+        checkpoint_dir: Optional[str] = None,
+        checkpoint_every: int = 5,
+        resume_from: Optional[str] = None
+    ) -> Dict:
+        """
+        Train one model on every river's data.
+
+        Each river's series is normalised with its own statistics and cut
+        into windows that never straddle two rivers; the last val_fraction
+        of each river's windows is held out. Minibatches mix rivers.
+
+        Args:
+            datasets: river_id -> (X (samples, features), y river levels)
+            feature_names: Names of input features (same for every river)
+            epochs: Number of training epochs
+            batch_size: Batch size
+            learning_rate: Learning rate
+            early_stopping_patience: Early stopping patience
+            val_fraction: Fraction of each river's (most recent) windows held out
+            verbose: Print training progress
+            checkpoint_dir: Directory for a resumable training checkpoint
+            checkpoint_every: Checkpoint every N epochs (and when training ends)
+            resume_from: Checkpoint file or directory to continue training from
+
+        Returns:
+            Training history dictionary
+        """
+        self.river_ids = list(datasets)
+        n_features = np.asarray(next(iter(datasets.values()))[0]).shape[1]
+        self.feature_names = feature_names or [f"feature_{i}" for i in range(n_features)]
+        checkpoint = self._load_training_checkpoint(resume_from, "multi_river") if resume_from else None
+
+        if checkpoint is None:
+            # Per-river normalisation statistics
+            self.scaler_mean = np.stack([np.asarray(X, dtype=float).mean(axis=0) for X, _ in datasets.values()])
+            self.scaler_std = np.stack([np.asarray(X, dtype=float).std(axis=0) + 1e-8 for X, _ in datasets.values()])
+            self.target_mean = np.array([np.asarray(y, dtype=float).mean() for _, y in datasets.values()])
+            self.target_std = np.array([np.asarray(y, dtype=float).std() + 1e-8 for _, y in datasets.values()])
+
+        # All rivers' normalised series back to back; windows are views of it
+        X_parts, y_parts, starts = [], [], []
+        offset = 0
+        for k, (X, y) in enumerate(datasets.values()):
+            X_parts.append((np.asarray(X, dtype=float) - self.scaler_mean[k]) / self.scaler_std[k])
+            y_parts.append((np.asarray(y, dtype=float) - self.target_mean[k]) / self.target_std[k])
+            windows = len(X) - self.sequence_length - self.output_horizons + 1
+            if windows < 2:
+                raise ValueError(f"Not enough data for river {self.river_ids[k]} ({len(X)} rows)")
+            starts.append(offset + np.arange(windows))
+            offset += len(X)
+        X_seq, y_seq = self._create_sequences(np.concatenate(X_parts), np.concatenate(y_parts))
+
+        window_rivers = np.zeros(len(X_seq), dtype=np.int64)
+        train_rows, val_rows = [], []
+        for k, river_starts in enumerate(starts):
+            window_rivers[river_starts] = k
+            split = max(1, int(len(river_starts) * (1 - val_fraction)))
+            train_rows.append(river_starts[:split])
+            val_rows.append(river_starts[split:])
+        train_rows, val_rows = np.concatenate(train_rows), np.concatenate(val_rows)
+
+        if verbose:
+            print("\n🏋️ Training multi-river LSTM Flood Predictor...")
+            print(f"   Rivers: {', '.join(self.river_ids)}")
+            print(f"   Training / validation sequences: {len(train_rows)} / {len(val_rows)}")
+            print(f"   Features: {len(self.feature_names)}")
+            print(f"   Sequence length: {self.sequence_length}")
+            print(f"   Output horizons: {self.output_horizons}")
+
+        self._build_model(n_features)
+        val_windows = [(X_seq, y_seq, val_rows, window_rivers)]
+        history, best_val_loss, epochs_done = self._fit_windows(
+            X_seq, y_seq, train_rows, val_windows, window_rivers, "multi_river",
+            epochs, batch_size, learning_rate, early_stopping_patience, verbose,
+            checkpoint_dir, checkpoint_every, checkpoint
+        )
+        self.is_trained = True
+        self.training_history = history
+
+        # Final metrics, overall and per river
+        final = self._evaluate_windows(val_windows, batch_size)
+        per_river = {}
+        for k, river_id in enumerate(self.river_ids):
+            rows = val_rows[window_rivers[val_rows] == k]
+            metrics = self._evaluate_windows([(X_seq, y_seq, rows, window_rivers)], batch_size)
+            per_river[river_id] = {
+                "final_mae": float(metrics["mae"]),
+                "final_rmse": float(metrics["rmse"]),
+                "r2_score": float(metrics["r2"]),
+                "train_sequences": int(np.sum(window_rivers[train_rows] == k)),
+            }
+
+        self.metadata = {
+            "trained_on": datetime.now().isoformat(),
+            "epochs_trained": epochs_done,
+            "best_val_loss": best_val_loss,
+            "final_mae": float(final["mae"]),
+            "final_rmse": float(final["rmse"]),
+            "r2_score": float(final["r2"]),
+            "device": str(self.device),
+            "architecture": self._architecture(),
+            "rivers": per_river,
+        }
+
+        if verbose:
+            print("\n✅ Multi-river LSTM Training Complete!")
+            print(f"   MAE: {final['mae']:.2f}m | RMSE: {final['rmse']:.2f}m | R²: {final['r2']:.4f}")
+            for river_id, metrics in per_river.items():
+                print(f"   {river_id:<16} MAE: {metrics['final_mae']:.2f}m | R²: {metrics['r2_score']:.4f}")
+
+        return history
+
+    # =========================================================================
+    # Prediction
+    # =========================================================================
+
+    def predict(
+        self,
+        X: np.ndarray,
+        river_id: str,
+        mc_samples: int = 50,
+        return_uncertainty: bool = True,
+        return_analysis: bool = True
+    ) -> Dict:
+        """LSTMFloodPredictor.predict() for one river's input sequence."""
+        return self.predict_many([X], [river_id], mc_samples, return_uncertainty, return_analysis)[0]
+
+    def predict_many(
+        self,
+        sequences: List[np.ndarray],
+        river_ids: List[str],
+        mc_samples: int = 50,
+        return_uncertainty: bool = True,
+        return_analysis: bool = True
+    ) -> List[Dict]:
+        """
+        LSTMFloodPredictor.predict_many() for sequences of any mix of rivers,
+        in one forward pass.
+
+        Args:
+            sequences: Input feature matrices, each (>= seq_length, features)
+            river_ids: River of each sequence
+            mc_samples: Number of MC samples for uncertainty
+            return_uncertainty: Whether to compute uncertainty bounds
+            return_analysis: Whether to return risk / attention analysis
+
+        Returns:
+            One predict() result dictionary per sequence, in order
+        """
+        if not self.is_trained:
+            raise ValueError("Model not trained. Call train() first.")
+        if len(sequences) != len(river_ids):
+            raise ValueError(f"{len(sequences)} sequences but {len(river_ids)} river ids")
+
+        rivers = self.river_index(river_ids)
+        X = np.stack([np.asarray(X, dtype=float)[-self.sequence_length:] for X in sequences])
+        X_norm = (X - self.scaler_mean[rivers][:, None, :]) / self.scaler_std[rivers][:, None, :]
+        return self._predict_normalized(X_norm, rivers, mc_samples, return_uncertainty, return_analysis)
+
+
+class RiverLSTMView:
+    """
+    One river's LSTMFloodPredictor interface over a shared
+    MultiRiverLSTMFloodPredictor. Holds no weights of its own; other
+    attributes (feature_names, sequence_length, model, ...) are the shared
+    model's.
+    """
+
+    def __init__(self, shared: MultiRiverLSTMFloodPredictor, river_id: str):
+        self.shared = shared
+        self.river_id = river_id
+
+    def __getattr__(self, name):
+        return getattr(self.shared, name)
+
+    @property
+    def metadata(self) -> Dict:
+        """Shared training metadata with this river's validation metrics on top."""
+        return {**self.shared.metadata, **self.shared.metadata.get("rivers", {}).get(self.river_id, {})}
+
+    def predict(
+        self,
+        X: np.ndarray,
+        mc_samples: int = 50,
+        return_uncertainty: bool = True,
+        return_analysis: bool = True
+    ) -> Dict:
+        return self.shared.predict(X, self.river_id, mc_samples, return_uncertainty, return_analysis)
+
+    def predict_many(
+        self,
+        sequences: List[np.ndarray],
+        mc_samples: int = 50,
+        return_uncertainty: bool = True,
+        return_analysis: bool = True
+    ) -> List[Dict]:
+        return self.shared.predict_many(
+            sequences, [self.river_id] * len(sequences), mc_samples, return_uncertainty, return_analysis
+        )
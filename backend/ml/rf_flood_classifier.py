@@ -21,12 +21,21 @@ Features:
 import numpy as np
 import pandas as pd
 import os
+import copy
 import json
+import time
+import pickle
 from typing import Tuple, Dict, List, Optional
 from datetime import datetime
 
+try:
+    from ml.flat_forest import FlatForest, COMPACT_SUFFIX, compact_artifact_path
+except ImportError:  # run as a script from backend/ml
+    from flat_forest import FlatForest, COMPACT_SUFFIX, compact_artifact_path
+
 # Import sklearn
 try:
+    from sklearn.base import clone
     from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
     from sklearn.model_selection import train_test_split, cross_val_score
     from sklearn.metrics import (
@@ -34,6 +43,7 @@ try:
         confusion_matrix, classification_report, roc_auc_score
     )
     from sklearn.preprocessing import StandardScaler
+    from sklearn.utils.class_weight import compute_class_weight
     import joblib
     SKLEARN_AVAILABLE = True
 except ImportError:
@@ -41,6 +51,17 @@ except ImportError:
     print("⚠️ scikit-learn not available. Using simulation mode.")
 
 
+def _atomic_write(path: str, write) -> None:
+    """Call write(tmp_path), then rename the finished file over path."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
 class RandomForestFloodClassifier:
     """
     Random Forest classifier for binary flood prediction.
@@ -62,6 +83,16 @@ class RandomForestFloodClassifier:
         "days_since_heavy_rain"
     ]
     
+    # Risk levels in ascending order; a probability >= RISK_THRESHOLDS[i]
+    # reaches RISK_LEVELS[i + 1]
+    RISK_LEVELS = ("LOW", "MODERATE", "HIGH", "CRITICAL")
+    RISK_COLORS = ("green", "yellow", "orange", "red")
+    RISK_THRESHOLDS = (0.4, 0.6, 0.8)
+    
+    # Above this many rows sklearn's compiled tree walk beats the NumPy
+    # engine (per-call overhead no longer dominates); both give the same result
+    ENGINE_MAX_ROWS = 2048
+    
     def __init__(
         self,
         n_estimators: int = 100,
@@ -69,7 +100,9 @@ class RandomForestFloodClassifier:
         min_samples_split: int = 5,
         class_weight: str = "balanced",
         random_state: int = 42,
-        model_path: Optional[str] = None
+        model_path: Optional[str] = None,
+        mmap_mode: Optional[str] = None,
+        n_jobs: int = -1
     ):
         """
         Initialize Random Forest flood classifier.
@@ -80,22 +113,27 @@ class RandomForestFloodClassifier:
             min_samples_split: Minimum samples required to split
             class_weight: Handle class imbalance ("balanced" recommended)
             random_state: For reproducibility
-            model_path: Path to load pre-trained model
+            model_path: Path to load pre-trained model (.joblib, or a compact
+                *.forest.npz artifact written by export_compact)
+            mmap_mode: joblib mmap_mode used when loading model_path (e.g. "r")
+            n_jobs: Cores used to fit the trees (-1 = all)
         """
         self.n_estimators = n_estimators
         self.max_depth = max_depth
         self.min_samples_split = min_samples_split
         self.class_weight = class_weight
         self.random_state = random_state
+        self.n_jobs = n_jobs
         
         self.model = None
         self.scaler = StandardScaler() if SKLEARN_AVAILABLE else None
+        self.engine: Optional[FlatForest] = None  # flat-array inference engine
         self.is_trained = False
         self.feature_importance = {}
         self.model_metadata = {}
         
         if model_path and os.path.exists(model_path):
-            self.load_model(model_path)
+            self.load_model(model_path, mmap_mode=mmap_mode)
         elif SKLEARN_AVAILABLE:
             self._build_model()
     
@@ -110,7 +148,7 @@ class RandomForestFloodClassifier:
             min_samples_split=self.min_samples_split,
             class_weight=self.class_weight,
             random_state=self.random_state,
-            n_jobs=-1,  # Use all CPU cores
+            n_jobs=self.n_jobs,  # -1: use all CPU cores
             oob_score=True  # Out-of-bag score for validation
         )
         
@@ -123,7 +161,14 @@ class RandomForestFloodClassifier:
         y: np.ndarray,
         feature_names: Optional[List[str]] = None,
         test_size: float = 0.2,
-        model_save_path: Optional[str] = None
+        model_save_path: Optional[str] = None,
+        compact_max_accuracy_loss: float = 0.0,
+        compact_leaf_tolerance: float = 0.0,
+        fast: bool = False,
+        cv_folds: int = 5,
+        cv_n_jobs: int = 1,
+        profile: bool = False,
+        threads: Optional[int] = None
     ) -> Dict:
         """
         Train the Random Forest classifier.
@@ -133,15 +178,98 @@ class RandomForestFloodClassifier:
             y: Binary labels (0: no flood, 1: flood)
             feature_names: Names of features
             test_size: Fraction for test split
-            model_save_path: Path to save trained model
+            model_save_path: Path to save trained model; a compact artifact
+                (see export_compact) is written next to it
+            compact_max_accuracy_loss: Test accuracy the compact artifact may
+                give up through tree pruning
+            compact_leaf_tolerance: Leaf pruning tolerance of the compact artifact
+            fast: Quick retrain: skip cross-validation and the training-set
+                re-prediction, report out-of-bag metrics as the validation
+                signal, and by default fit on at most half the machine's cores
+            cv_folds: Cross-validation folds (0 skips cross-validation)
+            cv_n_jobs: Folds fitted in parallel; each parallel fold fits its
+                forest single-threaded, capped at the thread budget
+            profile: Print the seconds spent in each training stage
+            threads: Thread budget of this run (see _thread_budget); caps the
+                forest's n_jobs and the parallel CV folds for the fit only
             
         Returns:
-            Training metrics dictionary
+            Training metrics dictionary (per-stage seconds under "profile")
         """
         if not SKLEARN_AVAILABLE or self.model is None:
             print("⚠️ scikit-learn not available. Using simulated training.")
             return self._simulate_training()
         
+        # n_jobs only bounds this fit's joblib threads; BLAS/OpenMP pools are
+        # process-wide and are left to the process that runs the training
+        cores = self._thread_budget(threads, fast)
+        self.model.set_params(n_jobs=cores)
+        try:
+            metrics, X_test, y_test = self._train(
+                X, y, feature_names, test_size, fast,
+                0 if fast else cv_folds, min(cv_n_jobs, cv_folds, cores)
+            )
+        finally:
+            self.model.set_params(n_jobs=self.n_jobs)
+        stages = metrics["profile"]
+        self.model_metadata["train_threads"] = cores
+        
+        # Save model
+        if model_save_path:
+            start = time.perf_counter()
+            # Compact artifact first so its report lands in the saved metadata
+            metrics["compact_export"] = self.export_compact(
+                compact_artifact_path(model_save_path),
+                X_test, y_test,
+                max_accuracy_loss=compact_max_accuracy_loss,
+                leaf_tolerance=compact_leaf_tolerance
+            )
+            stages["compact_export"] = time.perf_counter() - start
+            start = time.perf_counter()
+            self.save_model(model_save_path)
+            stages["save"] = time.perf_counter() - start
+        
+        if profile:
+            print(f"\n⏱️ Training profile ({'fast' if fast else 'full'} mode):")
+            for stage, seconds in stages.items():
+                print(f"   {stage:<16} {seconds:>8.3f}s")
+            print(f"   {'total':<16} {sum(stages.values()):>8.3f}s")
+        
+        return metrics
+    
+    def _thread_budget(self, threads: Optional[int], fast: bool) -> int:
+        """
+        Cores a training run may use: threads when given (capped at n_jobs),
+        else n_jobs. Fast mode is meant for quick retrains next to serving
+        traffic, so it defaults to at most half of the machine's cores.
+        """
+        cores = joblib.effective_n_jobs(self.n_jobs)
+        if threads is not None:
+            return max(1, min(threads, cores))
+        if fast:
+            return max(1, min(cores, (os.cpu_count() or 1) // 2))
+        return cores
+    
+    def _train(
+        self,
+        X: np.ndarray,
+        y: np.ndarray,
+        feature_names: Optional[List[str]],
+        test_size: float,
+        fast: bool,
+        cv_folds: int,
+        cv_n_jobs: int
+    ) -> Tuple[Dict, np.ndarray, np.ndarray]:
+        """Fit and evaluate the forest, timing each stage (see train); also returns the test split."""
+        stages = {}
+        start = time.perf_counter()
+        
+        def lap(stage: str) -> None:
+            nonlocal start
+            now = time.perf_counter()
+            stages[stage] = now - start
+            start = now
+        
         if feature_names:
             self.FEATURE_NAMES = feature_names
         
@@ -153,28 +281,27 @@ class RandomForestFloodClassifier:
         # Scale features
         X_train_scaled = self.scaler.fit_transform(X_train)
         X_test_scaled = self.scaler.transform(X_test)
+        lap("split_scale")
         
-        print(f"🏋️ Training Random Forest classifier...")
+        print(f"🏋️ Training Random Forest classifier{' (fast mode)' if fast else ''}...")
         print(f"   Training samples: {len(X_train)} (Floods: {sum(y_train)})")
         print(f"   Test samples: {len(X_test)} (Floods: {sum(y_test)})")
         
         # Train model
         self.model.fit(X_train_scaled, y_train)
         self.is_trained = True
+        lap("fit")
+        self.compile()
+        lap("compile")
         
-        # Predictions
-        y_pred_train = self.model.predict(X_train_scaled)
-        y_pred_test = self.model.predict(X_test_scaled)
-        y_prob_test = self.model.predict_proba(X_test_scaled)[:, 1]
+        # Predictions: one pass for the test set, class = argmax of the
+        # averaged tree probabilities (what RandomForestClassifier.predict does)
+        proba_test = self.model.predict_proba(X_test_scaled)
+        y_pred_test = self.model.classes_[np.argmax(proba_test, axis=1)]
+        y_prob_test = proba_test[:, 1]
         
         # Calculate metrics
         metrics = {
-            "train": {
-                "accuracy": accuracy_score(y_train, y_pred_train),
-                "precision": precision_score(y_train, y_pred_train, zero_division=0),
-                "recall": recall_score(y_train, y_pred_train, zero_division=0),
-                "f1": f1_score(y_train, y_pred_train, zero_division=0),
-            },
             "test": {
                 "accuracy": accuracy_score(y_test, y_pred_test),
                 "precision": precision_score(y_test, y_pred_test, zero_division=0),
@@ -185,29 +312,51 @@ class RandomForestFloodClassifier:
             "confusion_matrix": confusion_matrix(y_test, y_pred_test).tolist(),
             "oob_score": self.model.oob_score_,
         }
+        lap("test_metrics")
         
-        # Feature importance
-        self.feature_importance = dict(zip(
-            self.FEATURE_NAMES[:len(self.model.feature_importances_)],
-            self.model.feature_importances_
-        ))
+        if fast:
+            # Out-of-bag votes: a validation signal that needs no extra fits
+            # or predictions (rows never in any bootstrap have no OOB vote)
+            oob_proba = self.model.oob_decision_function_
+            voted = ~np.isnan(oob_proba).any(axis=1)
+            y_oob, y_pred_oob = y_train[voted], self.model.classes_[np.argmax(oob_proba[voted], axis=1)]
+            metrics["oob"] = {
+                "accuracy": accuracy_score(y_oob, y_pred_oob),
+                "precision": precision_score(y_oob, y_pred_oob, zero_division=0),
+                "recall": recall_score(y_oob, y_pred_oob, zero_division=0),
+                "f1": f1_score(y_oob, y_pred_oob, zero_division=0),
+                "roc_auc": roc_auc_score(y_oob, oob_proba[voted, 1]) if len(np.unique(y_oob)) > 1 else 0,
+            }
+            lap("oob_metrics")
+        else:
+            y_pred_train = self.model.predict(X_train_scaled)
+            metrics["train"] = {
+                "accuracy": accuracy_score(y_train, y_pred_train),
+                "precision": precision_score(y_train, y_pred_train, zero_division=0),
+                "recall": recall_score(y_train, y_pred_train, zero_division=0),
+                "f1": f1_score(y_train, y_pred_train, zero_division=0),
+            }
+            lap("train_metrics")
         
-        # Sort by importance
-        self.feature_importance = dict(sorted(
-            self.feature_importance.items(),
-            key=lambda x: x[1],
-            reverse=True
-        ))
+        # Feature importance
+        self._update_feature_importance()
         
         metrics["feature_importance"] = self.feature_importance
         
         # Cross-validation
-        cv_scores = cross_val_score(self.model, X_train_scaled, y_train, cv=5)
-        metrics["cv_scores"] = {
-            "mean": float(np.mean(cv_scores)),
-            "std": float(np.std(cv_scores)),
-            "scores": cv_scores.tolist()
-        }
+        if cv_folds:
+            estimator = self.model
+            if cv_n_jobs > 1:
+                # Parallel folds, one core each, instead of serial folds that
+                # each spread their trees over n_jobs cores
+                estimator = clone(self.model).set_params(n_jobs=1)
+            cv_scores = cross_val_score(estimator, X_train_scaled, y_train, cv=cv_folds, n_jobs=cv_n_jobs)
+            metrics["cv_scores"] = {
+                "mean": float(np.mean(cv_scores)),
+                "std": float(np.std(cv_scores)),
+                "scores": cv_scores.tolist()
+            }
+            lap("cross_validation")
         
         # Store metadata
         self.model_metadata = {
@@ -218,6 +367,9 @@ class RandomForestFloodClassifier:
             "test_samples": len(X_test),
             "test_accuracy": metrics["test"]["accuracy"],
             "test_f1": metrics["test"]["f1"],
+            "oob_score": metrics["oob_score"],
+            "fast_train": fast,
+            "train_profile": stages,  # filled in as the remaining stages finish
             "feature_importance": self.feature_importance,
         }
         
@@ -226,15 +378,174 @@ class RandomForestFloodClassifier:
         print(f"   Test F1 Score: {metrics['test']['f1']:.4f}")
         print(f"   Test Precision: {metrics['test']['precision']:.4f}")
         print(f"   Test Recall: {metrics['test']['recall']:.4f}")
+        print(f"   OOB Score: {metrics['oob_score']:.4f}")
         print(f"\n   Top 3 Important Features:")
         for i, (feat, imp) in enumerate(list(self.feature_importance.items())[:3]):
             print(f"   {i+1}. {feat}: {imp:.4f}")
         
-        # Save model
+        metrics["profile"] = stages
+        return metrics, X_test, y_test
+    
+    def update(
+        self,
+        X_new: np.ndarray,
+        y_new: np.ndarray,
+        n_new_trees: int = 20,
+        max_trees: Optional[int] = None,
+        holdout_fraction: float = 0.2,
+        update_scaler: bool = True,
+        model_save_path: Optional[str] = None
+    ) -> Dict:
+        """
+        Incrementally update a trained forest with new observations.
+        
+        Appends n_new_trees trees fitted on the new data (sklearn warm_start)
+        instead of refitting the whole forest, optionally retiring the oldest
+        trees, so a daily refresh takes seconds. No cross-validation is run:
+        the most recent holdout_fraction of the (chronologically ordered) new
+        rows is held out and both the previous and the updated model are
+        scored on that rolling window.
+        
+        Args:
+            X_new: New feature rows, oldest first
+            y_new: New binary labels
+            n_new_trees: Trees to add
+            max_trees: Keep at most this many trees, dropping the oldest
+            holdout_fraction: Most recent fraction of rows used for evaluation only
+            update_scaler: Fold the new rows into the scaler statistics; the
+                existing trees' thresholds are remapped so their splits are unchanged
+            model_save_path: Path to save the updated model (plus compact artifact)
+            
+        Returns:
+            Update report (trees added/retired, holdout metrics before/after)
+        """
+        if not SKLEARN_AVAILABLE or self.model is None or not hasattr(self.model, "estimators_"):
+            raise ValueError(
+                "Incremental update needs a trained sklearn forest (.joblib); "
+                "compact artifacts cannot be extended"
+            )
+        start = time.perf_counter()
+        X_new = np.asarray(X_new, dtype=np.float64)
+        y_new = np.asarray(y_new)
+        
+        # Rolling holdout: the latest rows are only used for evaluation
+        n_holdout = int(len(X_new) * holdout_fraction)
+        X_fit, y_fit = X_new[:len(X_new) - n_holdout], y_new[:len(y_new) - n_holdout]
+        X_hold, y_hold = X_new[len(X_new) - n_holdout:], y_new[len(y_new) - n_holdout:]
+        if len(np.unique(y_fit)) < len(self.model.classes_):
+            raise ValueError("New observations must contain both flood and no-flood rows")
+        
+        metrics_before = self._holdout_metrics(X_hold, y_hold)
+        
+        if update_scaler:
+            scaler = copy.deepcopy(self.scaler)
+            scaler.partial_fit(X_fit)
+            self._rescale_trees(self.scaler, scaler)
+            self.scaler = scaler
+        
+        n_before = len(self.model.estimators_)
+        oob_score, class_weight = self.model.oob_score, self.model.class_weight
+        if class_weight in ("balanced", "balanced_subsample"):
+            # warm_start cannot use the presets: balance the new trees on the new rows explicitly
+            weights = compute_class_weight("balanced", classes=self.model.classes_, y=y_fit)
+            self.model.set_params(class_weight=dict(zip(self.model.classes_, weights)))
+        # OOB scoring would re-score the old trees against rows they never saw
+        self.model.set_params(warm_start=True, oob_score=False, n_estimators=n_before + n_new_trees)
+        self.model.fit(self.scaler.transform(X_fit), y_fit)
+        
+        retired = 0
+        if max_trees is not None and len(self.model.estimators_) > max_trees:
+            retired = len(self.model.estimators_) - max_trees
+            self.model.estimators_ = self.model.estimators_[retired:]
+        self.model.set_params(
+            warm_start=False, oob_score=oob_score, class_weight=class_weight,
+            n_estimators=len(self.model.estimators_)
+        )
+        self.n_estimators = len(self.model.estimators_)
+        
+        self.compile()
+        self._update_feature_importance()
+        metrics_after = self._holdout_metrics(X_hold, y_hold)
+        
+        report = {
+            "updated_at": datetime.now().isoformat(),
+            "new_samples": len(X_fit),
+            "holdout_samples": len(X_hold),
+            "trees_added": n_new_trees,
+            "trees_retired": retired,
+            "n_estimators": self.n_estimators,
+            "scaler_updated": update_scaler,
+            "holdout_before": metrics_before,
+            "holdout_after": metrics_after,
+            "update_seconds": time.perf_counter() - start,
+        }
+        
+        self.model_metadata.update({
+            "n_estimators": self.n_estimators,
+            "incremental_updates": self.model_metadata.get("incremental_updates", 0) + 1,
+            "last_update": report,
+            "feature_importance": self.feature_importance,
+        })
+        if metrics_after:
+            self.model_metadata["test_accuracy"] = metrics_after["accuracy"]
+            self.model_metadata["test_f1"] = metrics_after["f1"]
+        
+        print(f"🔁 Forest updated: +{n_new_trees} trees, -{retired} retired "
+              f"({self.n_estimators} total) in {report['update_seconds']:.2f}s")
+        if metrics_after:
+            print(f"   Holdout accuracy: {metrics_before['accuracy']:.4f} → {metrics_after['accuracy']:.4f} "
+                  f"({len(X_hold)} most recent rows)")
+        
         if model_save_path:
+            report["compact_export"] = self.export_compact(
+                compact_artifact_path(model_save_path),
+                X_hold if len(X_hold) else X_fit,
+                y_hold if len(y_hold) else y_fit
+            )
             self.save_model(model_save_path)
         
-        return metrics
+        return report
+    
+    def _rescale_trees(self, old_scaler, new_scaler) -> None:
+        """Move every split threshold from old_scaler's feature space to new_scaler's."""
+        old_mean, old_scale = np.asarray(old_scaler.mean_), np.asarray(old_scaler.scale_)
+        new_mean, new_scale = np.asarray(new_scaler.mean_), np.asarray(new_scaler.scale_)
+        for estimator in self.model.estimators_:
+            state = estimator.tree_.__getstate__()
+            nodes = state["nodes"].copy()  # may be a read-only memory map
+            split = nodes["feature"] >= 0
+            feature = nodes["feature"][split]
+            raw = nodes["threshold"][split] * old_scale[feature] + old_mean[feature]
+            nodes["threshold"][split] = (raw - new_mean[feature]) / new_scale[feature]
+            state["nodes"] = nodes
+            estimator.tree_.__setstate__(state)
+    
+    def _holdout_metrics(self, X: np.ndarray, y: np.ndarray) -> Dict:
+        """Classification metrics of the current model on a holdout window ({} if empty)."""
+        if len(X) == 0:
+            return {}
+        y_pred, y_prob = self.predict(X)
+        return {
+            "accuracy": accuracy_score(y, y_pred),
+            "precision": precision_score(y, y_pred, zero_division=0),
+            "recall": recall_score(y, y_pred, zero_division=0),
+            "f1": f1_score(y, y_pred, zero_division=0),
+            "roc_auc": roc_auc_score(y, y_prob) if len(np.unique(y)) > 1 else 0,
+        }
+    
+    def _update_feature_importance(self) -> None:
+        """Refresh feature_importance (sorted, descending) from the fitted forest."""
+        self.feature_importance = dict(zip(
+            self.FEATURE_NAMES[:len(self.model.feature_importances_)],
+            self.model.feature_importances_
+        ))
+        
+        # Sort by importance
+        self.feature_importance = dict(sorted(
+            self.feature_importance.items(),
+            key=lambda x: x[1],
+            reverse=True
+        ))
     
     def _simulate_training(self) -> Dict:
         """Simulate training when sklearn is not available."""
@@ -254,6 +565,19 @@ class RandomForestFloodClassifier:
             "feature_importance": self.feature_importance
         }
     
+    def compile(self) -> Optional[FlatForest]:
+        """
+        Export the fitted forest + scaler into the flat-array engine used by
+        predict(). Called after train() and load_model().
+        """
+        self.engine = None
+        if SKLEARN_AVAILABLE and self.model is not None and hasattr(self.model, "estimators_"):
+            try:
+                self.engine = FlatForest.from_sklearn(self.model, self.scaler)
+            except Exception as e:
+                print(f"⚠️ Could not compile forest, using sklearn inference: {e}")
+        return self.engine
+    
     def predict(
         self,
         X: np.ndarray,
@@ -269,18 +593,26 @@ class RandomForestFloodClassifier:
         Returns:
             Tuple of (predictions, probabilities)
         """
-        if not SKLEARN_AVAILABLE or self.model is None or not self.is_trained:
+        if self.engine is None and (not SKLEARN_AVAILABLE or self.model is None or not self.is_trained):
             return self._simulate_prediction(X)
         
-        # Scale features
-        X_scaled = self.scaler.transform(X)
-        
-        # Predict
-        predictions = self.model.predict(X_scaled)
+        # Compact artifacts have no sklearn model to fall back to
+        if self.engine is not None and (self.model is None or len(X) <= self.ENGINE_MAX_ROWS):
+            # Flat engine: scaler folded into thresholds, class and
+            # probability from one NumPy traversal of all trees
+            predictions, proba = self.engine.predict(X)
+        else:
+            # Scale features
+            X_scaled = self.scaler.transform(X)
+            
+            # Predict: one pass through the forest, class = argmax of the
+            # averaged tree probabilities (what RandomForestClassifier.predict does)
+            proba = self.model.predict_proba(X_scaled)
+            predictions = self.model.classes_[np.argmax(proba, axis=1)]
         
         probabilities = None
         if return_probability:
-            probabilities = self.model.predict_proba(X_scaled)[:, 1]
+            probabilities = proba[:, 1]
         
         return predictions, probabilities
     
@@ -317,50 +649,142 @@ class RandomForestFloodClassifier:
         Returns:
             Detailed prediction with explanation
         """
+        return self.predict_batch([features])[0]
+    
+    def predict_batch(
+        self,
+        features_list: List[Dict[str, float]],
+        explain: bool = True,
+        contributions: Optional[bool] = None
+    ) -> List[Dict]:
+        """
+        Detailed predictions for many samples with one pass through the forest.
+        
+        Args:
+            features_list: List of feature dictionaries
+            explain: Whether to build the explanation text (None when False)
+            contributions: Whether to build feature_contributions (empty when
+                False); defaults to the value of explain
+            
+        Returns:
+            List of predictions in the same format as predict_single
+        """
+        if contributions is None:
+            contributions = explain
+        
         # Convert to array
-        X = np.array([[features.get(name, 0) for name in self.FEATURE_NAMES]])
-        
-        prediction, probability = self.predict(X)
-        
-        # Get feature contributions
-        contributions = {}
-        if self.feature_importance:
-            for name in self.FEATURE_NAMES:
-                value = features.get(name, 0)
-                importance = self.feature_importance.get(name, 0)
-                # Estimate contribution
-                contributions[name] = {
-                    "value": value,
-                    "importance": importance,
-                    "contribution": value * importance / 100  # Simplified
-                }
-        
-        # Determine risk level
-        prob = probability[0]
-        if prob >= 0.8:
-            risk_level = "CRITICAL"
-            risk_color = "red"
-        elif prob >= 0.6:
-            risk_level = "HIGH"
-            risk_color = "orange"
-        elif prob >= 0.4:
-            risk_level = "MODERATE"
-            risk_color = "yellow"
+        X = np.array([
+            [features.get(name, 0) for name in self.FEATURE_NAMES]
+            for features in features_list
+        ])
+        
+        # Explanations are built from the original dicts (missing keys keep
+        # their _generate_explanation defaults)
+        batch = self.predict_many(X, contributions=contributions)
+        matrix = batch["contributions"]
+        
+        results = []
+        for i, features in enumerate(features_list):
+            feature_contributions = {}
+            if matrix is not None:
+                for j, name in enumerate(self.FEATURE_NAMES):
+                    feature_contributions[name] = {
+                        "value": features.get(name, 0),
+                        "importance": self.feature_importance.get(name, 0),
+                        "contribution": float(matrix[i, j])
+                    }
+            
+            results.append({
+                "prediction": "FLOOD" if batch["predictions"][i] == 1 else "NO_FLOOD",
+                "probability": float(batch["probabilities"][i]),
+                "risk_level": str(batch["risk_levels"][i]),
+                "risk_color": str(batch["risk_colors"][i]),
+                "feature_contributions": feature_contributions,
+                "contribution_method": batch["contribution_method"],
+                "base_probability": batch["base_probability"],
+                "explanation": self._generate_explanation(features, batch["probabilities"][i]) if explain else None,
+                "confidence": float(batch["confidence"][i]),
+            })
+        
+        return results
+    
+    def predict_many(
+        self,
+        features_matrix,
+        explain: bool = False,
+        contributions: bool = True
+    ) -> Dict:
+        """
+        Vectorized predictions for a whole feature matrix (e.g. a backtest
+        over a full time series) in one call.
+        
+        Contributions are decision-path (Saabas) attributions of the flood
+        probability, taken from the same forest traversal as the prediction:
+        base_probability + contributions.sum(axis=1) == probabilities.
+        Without the compiled engine (simulation mode) they fall back to the
+        value x importance estimate.
+        
+        Args:
+            features_matrix: (n_samples, n_features) array in FEATURE_NAMES
+                order, or a DataFrame with FEATURE_NAMES columns (missing
+                columns are 0)
+            explain: Whether to also build the explanation text of every row
+            contributions: Whether to compute the contribution matrix
+            
+        Returns:
+            Dictionary of arrays, one entry per row:
+                predictions (0/1), probabilities, risk_codes (index into
+                RISK_LEVELS), risk_levels, risk_colors, confidence,
+                contributions ((n_samples, n_features) or None),
+                contribution_method ("decision_path", "importance_estimate"
+                or None), base_probability (attribution bias, or None),
+                feature_names, explanations (list of str, None unless explain)
+        """
+        if isinstance(features_matrix, pd.DataFrame):
+            X = features_matrix.reindex(columns=self.FEATURE_NAMES, fill_value=0).to_numpy(dtype=np.float64)
         else:
-            risk_level = "LOW"
-            risk_color = "green"
+            X = np.asarray(features_matrix, dtype=np.float64)
+            if X.ndim == 1:
+                X = X[None, :]
         
-        result = {
-            "prediction": "FLOOD" if prediction[0] == 1 else "NO_FLOOD",
-            "probability": float(prob),
-            "risk_level": risk_level,
-            "risk_color": risk_color,
-            "feature_contributions": contributions,
-            "explanation": self._generate_explanation(features, prob),
-            "confidence": self._calculate_confidence(prob),
-        }
+        matrix, method, base_probability = None, None, None
+        if contributions and self.engine is not None:
+            # Prediction and attributions from one traversal
+            proba, base_probability, matrix = self.engine.predict_contributions(X)
+            predictions = self.engine.classes[np.argmax(proba, axis=1)]
+            probabilities = proba[:, 1]
+            method = "decision_path"
+        else:
+            predictions, probabilities = self.predict(X)
+            if contributions and self.feature_importance:
+                # Estimated contribution: value x importance (simplified)
+                importance = np.array([self.feature_importance.get(name, 0) for name in self.FEATURE_NAMES])
+                matrix = X[:, :len(importance)] * importance / 100
+                method = "importance_estimate"
         
-        return result
+        # Risk level: index of the highest threshold reached
+        risk_codes = np.searchsorted(self.RISK_THRESHOLDS, probabilities, side="right")
+        
+        explanations = None
+        if explain:
+            explanations = [
+                self._generate_explanation(dict(zip(self.FEATURE_NAMES, row)), prob)
+                for row, prob in zip(X.tolist(), probabilities.tolist())
+            ]
+        
+        return {
+            "predictions": predictions,
+            "probabilities": probabilities,
+            "risk_codes": risk_codes,
+            "risk_levels": np.asarray(self.RISK_LEVELS)[risk_codes],
+            "risk_colors": np.asarray(self.RISK_COLORS)[risk_codes],
+            "confidence": np.clip(np.abs(probabilities - 0.5) * 2, 0.5, 0.95),
+            "contributions": matrix,
+            "contribution_method": method,
+            "base_probability": base_probability,
+            "feature_names": list(self.FEATURE_NAMES),
+            "explanations": explanations,
+        }
     
     def _generate_explanation(
         self,
@@ -420,34 +844,150 @@ class RandomForestFloodClassifier:
         ]
     
     def save_model(self, path: str) -> None:
-        """Save trained model and associated files."""
-        os.makedirs(os.path.dirname(path) if os.path.dirname(path) else ".", exist_ok=True)
+        """
+        Save trained model and associated files.
         
-        if SKLEARN_AVAILABLE and self.model:
-            joblib.dump(self.model, path)
-            print(f"✅ Model saved to {path}")
+        Each file is written to a temporary name and renamed into place, so a
+        server loading (or memory-mapping) the artifacts never reads a partly
+        written file. The model is replaced last, after its scaler/metadata.
+        """
+        os.makedirs(os.path.dirname(path) if os.path.dirname(path) else ".", exist_ok=True)
         
         # Save scaler
         if self.scaler:
             scaler_path = path.replace('.joblib', '_scaler.joblib')
-            joblib.dump(self.scaler, scaler_path)
+            _atomic_write(scaler_path, lambda tmp: joblib.dump(self.scaler, tmp))
         
         # Save metadata
         meta_path = path.replace('.joblib', '_metadata.json')
-        with open(meta_path, 'w') as f:
-            json.dump(self.model_metadata, f, indent=2)
+        
+        def write_metadata(tmp_path: str) -> None:
+            with open(tmp_path, 'w') as f:
+                json.dump(self.model_metadata, f, indent=2)
+        
+        _atomic_write(meta_path, write_metadata)
+        
+        if SKLEARN_AVAILABLE and self.model:
+            _atomic_write(path, lambda tmp: joblib.dump(self.model, tmp))
+            print(f"✅ Model saved to {path}")
     
-    def load_model(self, path: str) -> None:
-        """Load pre-trained model."""
+    def export_compact(
+        self,
+        path: str,
+        X_val: Optional[np.ndarray] = None,
+        y_val: Optional[np.ndarray] = None,
+        max_accuracy_loss: float = 0.0,
+        leaf_tolerance: float = 0.0,
+        max_probability_diff: float = 0.02
+    ) -> Dict:
+        """
+        Write the compact forest artifact (float32 values, int32 indices,
+        optionally pruned) and report the size/accuracy trade-off.
+        
+        Args:
+            path: Output path (*.forest.npz)
+            X_val: Validation features (raw) for pruning and the report
+            y_val: Validation labels
+            max_accuracy_loss: Validation accuracy (fraction) tree pruning may lose
+            leaf_tolerance: Collapse splits whose leaves are within this
+                probability of their parent (0 keeps every split)
+            max_probability_diff: Mean |Δp| tree pruning may introduce
+            
+        Returns:
+            Report with trees, nodes, bytes and (with validation data) accuracy
+            of the original and the compact forest
+        """
+        if self.engine is None:
+            raise ValueError("Model must be trained before exporting a compact artifact")
+        
+        compact = self.engine.prune(
+            X_val, y_val, max_accuracy_loss, leaf_tolerance, max_probability_diff
+        ).compact()
+        compact.save(path)
+        
+        report = {
+            "path": path,
+            "trees": {"original": self.engine.n_trees, "compact": compact.n_trees},
+            "nodes": {"original": self.engine.n_nodes, "compact": compact.n_nodes},
+            "bytes": {
+                # Pickled size approximates what the sklearn forest holds in memory
+                "sklearn_model": len(pickle.dumps(self.model)) if self.model is not None else None,
+                "flat_float64": self.engine.nbytes,
+                "compact": compact.nbytes,
+                "compact_file": os.path.getsize(path),
+            },
+            "max_accuracy_loss": max_accuracy_loss,
+            "leaf_tolerance": leaf_tolerance,
+            "max_probability_diff": max_probability_diff,
+        }
+        if X_val is not None and y_val is not None:
+            original_proba = self.engine.predict_proba(X_val)
+            compact_proba = compact.predict_proba(X_val)
+            report["accuracy"] = {
+                "original": self.engine.accuracy(X_val, y_val),
+                "compact": compact.accuracy(X_val, y_val),
+            }
+            diff = np.abs(original_proba - compact_proba)[:, -1]
+            report["probability_diff"] = {"max": float(diff.max()), "mean": float(diff.mean())}
+        
+        baseline = report["bytes"]["sklearn_model"] or report["bytes"]["flat_float64"]
+        print(f"📦 Compact forest saved to {path}")
+        print(f"   Trees: {self.engine.n_trees} -> {compact.n_trees}, "
+              f"nodes: {self.engine.n_nodes} -> {compact.n_nodes}")
+        print(f"   Size: {baseline / 1024:.1f} KiB -> {compact.nbytes / 1024:.1f} KiB "
+              f"({baseline / compact.nbytes:.1f}x smaller)")
+        if "accuracy" in report:
+            print(f"   Accuracy: {report['accuracy']['original']:.4f} -> {report['accuracy']['compact']:.4f} "
+                  f"(|Δp| max {report['probability_diff']['max']:.4f}, "
+                  f"mean {report['probability_diff']['mean']:.4f})")
+        
+        self.model_metadata["compact_export"] = report
+        return report
+    
+    def load_compact(self, path: str) -> None:
+        """
+        Load a compact forest artifact; predictions run on the flat engine
+        only (no sklearn model or scaler is needed).
+        """
+        self.engine = FlatForest.load(path)
+        self.model = None
+        self.is_trained = True
+        print(f"✅ Compact model loaded from {path}")
+        
+        meta_path = path[:-len(COMPACT_SUFFIX)] + "_metadata.json"
+        if os.path.exists(meta_path):
+            with open(meta_path, 'r') as f:
+                self.model_metadata = json.load(f)
+                if "feature_importance" in self.model_metadata:
+                    self.feature_importance = self.model_metadata["feature_importance"]
+    
+    def load_model(self, path: str, mmap_mode: Optional[str] = None) -> None:
+        """
+        Load pre-trained model.
+        
+        Args:
+            path: Path of the .joblib model artifact (or a *.forest.npz
+                compact artifact, see load_compact)
+            mmap_mode: Passed to joblib.load; with "r" the numpy arrays stored
+                in the artifact are memory-mapped read-only instead of copied,
+                so processes loading the same file share those pages
+        """
+        if path.endswith(COMPACT_SUFFIX):
+            self.load_compact(path)
+            return
+        
         if SKLEARN_AVAILABLE and os.path.exists(path):
-            self.model = joblib.load(path)
+            self.model = joblib.load(path, mmap_mode=mmap_mode)
             self.is_trained = True
             print(f"✅ Model loaded from {path}")
         
         # Load scaler
         scaler_path = path.replace('.joblib', '_scaler.joblib')
         if os.path.exists(scaler_path):
-            self.scaler = joblib.load(scaler_path)
+            self.scaler = joblib.load(scaler_path, mmap_mode=mmap_mode)
+        
+        if self.is_trained:
+            self.compile()
         
         # Load metadata
         meta_path = path.replace('.joblib', '_metadata.json')
@@ -595,5 +1135,16 @@ if __name__ == "__main__":
     print(f"Probability: {result['probability']:.2%}")
     print(f"Risk Level: {result['risk_level']}")
     print(f"Explanation: {result['explanation']}")
+    top = sorted(result["feature_contributions"].items(), key=lambda item: -abs(item[1]["contribution"]))[:3]
+    print(f"Top drivers ({result['contribution_method']}, base {result['base_probability']:.2f}): "
+          + ", ".join(f"{name} {item['contribution']:+.3f}" for name, item in top))
+    
+    # Score the whole synthetic series in one call
+    print("\n" + "=" * 50)
+    print("Testing batch prediction (predict_many):")
+    batch = classifier.predict_many(X)
+    levels, counts = np.unique(batch["risk_levels"], return_counts=True)
+    print(f"Scored {len(X)} rows: " + ", ".join(f"{lvl}={cnt}" for lvl, cnt in zip(levels, counts)))
+    print(f"Contribution matrix: {batch['contributions'].shape}")
     
     print("\n✅ Random Forest classifier test complete!")
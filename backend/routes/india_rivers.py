@@ -19,6 +19,7 @@ from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel, Field
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta
+import asyncio
 import numpy as np
 import os
 import sys
@@ -27,8 +28,11 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from data.hydrological_simulator import HydrologicalSimulator, INDIA_RIVERS
+from data.forecast_kernel import net_inflow, run_forecast, RISK_LABELS
 from ml.rf_flood_classifier import RandomForestFloodClassifier
-from ml.lstm_flood_model import LSTMFloodModel, FloodLevelPredictor
+from ml.lstm_flood_model import LSTMFloodModel
+from ml.model_registry import registry, artifact_path, ModelWarmingError
+from ml.model_lifecycle import retrain_rf_classifier, update_rf_classifier
 
 router = APIRouter(prefix="/api/flood/india", tags=["India Flood Forecasting"])
 
@@ -95,40 +99,40 @@ class SimulationRequest(BaseModel):
 
 
 # =============================================================================
-# Global Model Instances (Lazy Loading)
+# Global Model Instances (Lazy Loading, shared with frontend_api via ml.model_registry)
 # =============================================================================
 
-_models = {}
+@router.on_event("startup")
+async def start_model_warmup():
+    """Preload models configured via FLOOD_MODEL_PRELOAD (others load on first use)."""
+    registry.start()
+
+
+@router.on_event("shutdown")
+async def stop_model_warmup():
+    registry.shutdown()
 
 
 def get_rf_classifier(river_id: str = "cauvery") -> RandomForestFloodClassifier:
-    """Get or create RF classifier for a river."""
+    """Get the RF classifier for a river (503 + Retry-After while it is warming)."""
     key = f"rf_{river_id}"
-    if key not in _models:
-        model_path = f"backend/models/rf_flood_{river_id}.joblib"
-        if os.path.exists(model_path):
-            _models[key] = RandomForestFloodClassifier(model_path=model_path)
-        else:
-            # Create and train with synthetic data
-            classifier = RandomForestFloodClassifier()
-            simulator = HydrologicalSimulator(river_id=river_id)
-            dataset = simulator.generate_full_dataset(num_days=365)
-            classifier.train(
-                dataset["X_train"],
-                dataset["y_train_classification"],
-                feature_names=dataset["feature_names"]
-            )
-            _models[key] = classifier
-    return _models[key]
+    try:
+        return registry.get(key)
+    except ModelWarmingError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Model '{key}' is {e.state}. Retry shortly.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
 
 
 def get_lstm_model(river_id: str = "cauvery") -> LSTMFloodModel:
     """Get or create LSTM model for a river."""
-    key = f"lstm_{river_id}"
-    if key not in _models:
-        model_path = f"backend/models/lstm_flood_{river_id}.h5"
-        _models[key] = LSTMFloodModel(model_path=model_path if os.path.exists(model_path) else None)
-    return _models[key]
+    model_path = artifact_path("keras_lstm", river_id)
+    return registry.get_or_load(
+        f"keras_lstm_{river_id}",
+        lambda: LSTMFloodModel(model_path=model_path if os.path.exists(model_path) else None)
+    )
 
 
 # =============================================================================
@@ -230,33 +234,27 @@ async def predict_flood(request: PredictionRequest):
     rf_result = rf_classifier.predict_single(features)
     
     # Generate multi-horizon predictions using hydrological model
-    simulator = HydrologicalSimulator(river_id=river_id)
-    predictions = {}
-    current_level = request.current_river_level
+    # (one step per forecast day, solved in closed form by the shared kernel)
+    forecast = run_forecast(
+        request.current_river_level,
+        net_inflow(request.forecast_rainfall, river_config["base_level"], steps_per_day=1),
+        river_config["warning_level"],
+        river_config["danger_level"]
+    )
+    levels = forecast["levels"][0]
+    rounded_levels = np.round(levels, 2).tolist()
+    above_danger = (levels >= river_config["danger_level"]).tolist()
+    above_warning = (levels >= river_config["warning_level"]).tolist()
     
+    predictions = {}
     for day, forecast_rain in enumerate(request.forecast_rainfall, 1):
-        # Simplified prediction using hydrological model
-        predicted_level = (
-            simulator.memory_coef * current_level +
-            simulator.rainfall_coef * forecast_rain -
-            simulator.evap_rate * river_config["base_level"]
-        )
-        
-        risk = _determine_risk_level(
-            predicted_level,
-            river_config["danger_level"],
-            river_config["warning_level"]
-        )
-        
         predictions[f"{day}d"] = {
-            "predicted_level_m": round(predicted_level, 2),
+            "predicted_level_m": rounded_levels[day - 1],
             "forecast_rainfall_mm": forecast_rain,
-            "risk_level": risk,
-            "above_danger": predicted_level >= river_config["danger_level"],
-            "above_warning": predicted_level >= river_config["warning_level"],
+            "risk_level": RISK_LABELS[forecast["risk_code"][0, day - 1]].upper(),
+            "above_danger": above_danger[day - 1],
+            "above_warning": above_warning[day - 1],
         }
-        
-        current_level = predicted_level
     
     # Generate alerts
     alerts = _generate_alerts(predictions, river_config, rf_result)
@@ -435,6 +433,8 @@ async def get_model_status():
                     "top_features": list(rf_classifier.feature_importance.items())[:5]
                 }
             }
+        except HTTPException:
+            models_status[river_id] = {"random_forest": {"trained": False, "state": registry.state(f"rf_{river_id}")}}
         except Exception as e:
             models_status[river_id] = {"error": str(e)}
     
@@ -448,13 +448,30 @@ async def get_model_status():
 @router.post("/train/{river_id}")
 async def train_model(
     river_id: str,
-    num_days: int = Query(default=730, ge=100, le=3650)
+    num_days: int = Query(default=730, ge=100, le=3650),
+    incremental: bool = Query(default=False, description="Add trees fitted on new observations to the saved forest instead of retraining"),
+    new_trees: int = Query(default=20, ge=1, le=500, description="Trees added by an incremental update"),
+    max_trees: Optional[int] = Query(default=None, ge=1, le=1000, description="Retire the oldest trees beyond this count"),
+    fast: bool = Query(default=False, description="Skip cross-validation and validate on out-of-bag votes"),
+    threads: Optional[int] = Query(default=None, ge=1, le=256, description="Cores the forest fit may use (default: all; half with fast=true)")
 ):
     """
     🏋️ Train ML models for a specific river.
     
     Generates synthetic training data using hydrological model
     and trains both Random Forest and LSTM models.
+    
+    With incremental=true, num_days of new observations are simulated and
+    the saved Random Forest is warm-start updated with new_trees extra trees
+    (seconds instead of a full retrain); metrics come from the most recent
+    rows, held out as a rolling window.
+    
+    With fast=true the full retrain skips the 5-fold cross-validation
+    refits and reports out-of-bag metrics instead, fitting on at most half
+    the cores (or threads) so concurrent requests keep CPU to run on.
+    
+    Simulation and fitting run in the model lifecycle's worker process, so
+    the event loop keeps serving other requests while a model trains.
     """
     if river_id not in INDIA_RIVERS:
         raise HTTPException(
@@ -462,30 +479,26 @@ async def train_model(
             detail=f"Invalid river_id. Available: {list(INDIA_RIVERS.keys())}"
         )
     
-    # Generate training data
-    simulator = HydrologicalSimulator(river_id=river_id)
-    dataset = simulator.generate_full_dataset(
+    if incremental:
+        return await update_model(river_id, num_days, new_trees, max_trees)
+    
+    # Generate training data and train the Random Forest in the worker process
+    rf_classifier, rf_metrics, summary = await asyncio.wrap_future(registry.submit(
+        retrain_rf_classifier,
+        river_id,
+        artifact_path("rf", river_id),
         num_days=num_days,
+        fast=fast,
+        threads=threads,
         save_path="backend/data"
-    )
-    
-    # Train Random Forest
-    rf_classifier = RandomForestFloodClassifier()
-    rf_metrics = rf_classifier.train(
-        dataset["X_train"],
-        dataset["y_train_classification"],
-        feature_names=dataset["feature_names"],
-        model_save_path=f"backend/models/rf_flood_{river_id}.joblib"
-    )
+    ))
     
     # Update cache
-    _models[f"rf_{river_id}"] = rf_classifier
+    registry.put(f"rf_{river_id}", rf_classifier)
     
     return {
         "river_id": river_id,
-        "training_samples": len(dataset["X_train"]),
-        "test_samples": len(dataset["X_test"]),
-        "flood_events": dataset["metadata"]["num_flood_days"],
+        **summary,
         "random_forest_metrics": {
             "accuracy": rf_metrics["test"]["accuracy"],
             "f1_score": rf_metrics["test"]["f1"],
@@ -493,6 +506,62 @@ async def train_model(
             "recall": rf_metrics["test"]["recall"],
         },
         "feature_importance": rf_metrics["feature_importance"],
+        "oob_score": rf_metrics.get("oob_score"),
+        "stage_seconds": rf_metrics.get("profile"),
+        "model_saved": True
+    }
+
+
+async def update_model(river_id: str, num_days: int, new_trees: int, max_trees: Optional[int]) -> Dict:
+    """
+    Warm-start update of a river's saved Random Forest with newly simulated
+    observations, run in the model lifecycle's worker process.
+    """
+    model_path = artifact_path("rf", river_id)
+    if not os.path.exists(model_path):
+        raise HTTPException(
+            status_code=404,
+            detail=f"No saved Random Forest for {river_id} to update. Train it without incremental first."
+        )
+    
+    # New observations: a fresh simulation seeded by the current time
+    try:
+        rf_classifier, report = await asyncio.wrap_future(registry.submit(
+            update_rf_classifier,
+            river_id,
+            model_path,
+            num_days,
+            new_trees=new_trees,
+            max_trees=max_trees,
+            random_seed=int(datetime.now().timestamp()) % (2 ** 31)
+        ))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    # Update cache
+    registry.put(f"rf_{river_id}", rf_classifier)
+    
+    holdout = report["holdout_after"]
+    return {
+        "river_id": river_id,
+        "incremental": True,
+        "new_samples": report["new_samples"],
+        "holdout_samples": report["holdout_samples"],
+        "trees_added": report["trees_added"],
+        "trees_retired": report["trees_retired"],
+        "n_estimators": report["n_estimators"],
+        "update_seconds": round(report["update_seconds"], 3),
+        "random_forest_metrics": {
+            "accuracy": holdout.get("accuracy"),
+            "f1_score": holdout.get("f1"),
+            "precision": holdout.get("precision"),
+            "recall": holdout.get("recall"),
+        },
+        "previous_model_metrics": {
+            "accuracy": report["holdout_before"].get("accuracy"),
+            "f1_score": report["holdout_before"].get("f1"),
+        },
+        "feature_importance": rf_classifier.feature_importance,
         "model_saved": True
     }
 
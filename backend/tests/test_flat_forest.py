@@ -0,0 +1,70 @@
+"""
+Parity of the flat-array forest engine (ml/flat_forest.py) with sklearn.
+
+Run from backend/:  python -m pytest tests
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("sklearn")
+
+from ml.flat_forest import FlatForest, _split_boundary_rows, _synthetic_flood_data, check_parity
+from ml.rf_flood_classifier import RandomForestFloodClassifier
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    X, y = _synthetic_flood_data(600)
+    model = RandomForestFloodClassifier(n_estimators=15, max_depth=6, n_jobs=1)
+    model.train(X, y, cv_folds=0)
+    return model
+
+
+@pytest.fixture(scope="module")
+def rows(classifier):
+    X, _ = _synthetic_flood_data(200, seed=7)
+    # Include rows whose route depends on float32 rounding at a split
+    return np.vstack([X, _split_boundary_rows(classifier, X)])
+
+
+def sklearn_predict(classifier, X):
+    proba = classifier.model.predict_proba(classifier.scaler.transform(X))
+    return classifier.model.classes_[np.argmax(proba, axis=1)], proba
+
+
+def test_engine_matches_sklearn(classifier, rows):
+    expected_labels, expected = sklearn_predict(classifier, rows)
+    labels, proba = FlatForest.from_sklearn(classifier.model, classifier.scaler).predict(rows)
+
+    np.testing.assert_array_equal(labels, expected_labels)
+    np.testing.assert_allclose(proba, expected, rtol=0, atol=1e-12)
+
+
+def test_compact_artifact_matches_sklearn(classifier, rows, tmp_path):
+    expected_labels, expected = sklearn_predict(classifier, rows)
+    path = str(tmp_path / "rf_flood_test.forest.npz")
+    FlatForest.from_sklearn(classifier.model, classifier.scaler).compact().save(path)
+    loaded = FlatForest.load(path)
+    labels, proba = loaded.predict(rows)
+
+    assert loaded.threshold.dtype == np.float64
+    np.testing.assert_array_equal(labels, expected_labels)
+    # float32 leaf values: rounding only, no rerouted rows
+    np.testing.assert_allclose(proba, expected, rtol=0, atol=1e-6)
+
+
+def test_check_parity_report(classifier):
+    X, _ = _synthetic_flood_data(100, seed=3)
+    report = check_parity(classifier, X)
+
+    assert report["label_mismatches"] == 0
+    assert report["compact_label_mismatches"] == 0
+    assert report["max_abs_diff"] < 1e-12
+    assert report["compact_max_abs_diff"] < 1e-6
+    assert report["attribution_additivity_error"] < 1e-9
@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Parallel Multi-River Training
+=============================
+Trains the serving models (Random Forest + PyTorch LSTM) for every river in
+INDIA_RIVERS across a process pool, then prints a wall-clock / per-stage
+timing report.
+
+- One worker process per river (up to the number of cores); each runs
+  data generation -> RF fit -> LSTM training for its river.
+- Cores are split evenly between workers: each worker's sklearn n_jobs,
+  torch threads and BLAS/OpenMP pools are capped at its share, so parallel
+  rivers do not oversubscribe the CPU.
+- Artifacts are written to a temporary file and renamed into place, so a
+  running server never loads a half-written model.
+- With --shared-lstm the rivers get one shared multi-river LSTM
+  (lstm_flood_shared.pt), trained on all rivers after the per-river RF
+  stage, instead of one LSTM each.
+- With --checkpoint-dir each river's LSTM checkpoints its training every
+  few epochs; after an interruption, rerun with --resume to continue from
+  the last checkpoint instead of epoch 0.
+
+Usage:
+    python train_all_rivers.py [--rivers cauvery,yamuna] [--days 730] [--workers 4]
+                               [--lstm-epochs 50] [--skip-lstm] [--fast-rf] [--report report.json]
+                               [--checkpoint-dir checkpoints] [--resume] [--shared-lstm]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# numpy/sklearn/torch are imported inside the workers, after their thread
+# limits are set (spawned workers re-import this module first)
+
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+STAGES = ("data", "rf", "lstm")
+
+
+def available_cores() -> int:
+    """CPU cores this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def plan_workers(n_rivers: int, workers: Optional[int] = None, cores: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Split the cores between river workers.
+
+    Args:
+        n_rivers: Number of rivers to train
+        workers: Requested worker processes (default: one per river, up to the cores)
+        cores: Cores available (default: this process's CPU affinity)
+
+    Returns:
+        Tuple of (worker processes, threads per worker)
+    """
+    cores = cores or available_cores()
+    workers = workers or min(n_rivers, cores)
+    workers = max(1, min(workers, n_rivers))
+    return workers, max(1, cores // workers)
+
+
+# =============================================================================
+# Worker process
+# =============================================================================
+
+def _init_worker(threads: int) -> None:
+    """Cap every thread pool of this worker at its share of the cores."""
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=threads)
+    except ImportError:
+        pass
+    try:
+        import torch
+        torch.set_num_threads(threads)
+        torch.set_num_interop_threads(1)
+    except (ImportError, RuntimeError):
+        pass
+
+
+def train_river(
+    river_id: str,
+    num_days: int,
+    rf_path: str,
+    lstm_path: Optional[str],
+    lstm_epochs: int,
+    threads: int,
+    fast_rf: bool = False,
+    checkpoint_dir: Optional[str] = None,
+    resume: bool = False
+) -> Dict:
+    """
+    Generate data for one river and train its RF and LSTM models.
+
+    Never raises: a failing stage is recorded in the result and the
+    remaining stages are skipped.
+
+    Returns:
+        Dictionary with per-stage seconds, model summaries and any error
+    """
+    result = {"river_id": river_id, "pid": os.getpid(), "threads": threads,
+              "stages": {}, "artifacts": [], "error": None}
+    stage = "data"
+    try:
+        from data.hydrological_simulator import HydrologicalSimulator
+        from ml.model_lifecycle import train_rf_classifier, train_lstm_predictor
+
+        start = time.perf_counter()
+        dataset = HydrologicalSimulator(river_id=river_id).generate_full_dataset(num_days=num_days)
+        result["stages"]["data"] = time.perf_counter() - start
+        result["samples"] = len(dataset["X_train"])
+
+        stage = "rf"
+        start = time.perf_counter()
+        classifier = train_rf_classifier(river_id, model_path=rf_path, dataset=dataset,
+                                         n_jobs=threads, fast=fast_rf, threads=threads)
+        result["stages"]["rf"] = time.perf_counter() - start
+        result["rf_profile"] = classifier.model_metadata.get("train_profile")
+        result["rf_test_accuracy"] = classifier.model_metadata.get("test_accuracy")
+        result["artifacts"].append(rf_path)
+
+        stage = "lstm"
+        if lstm_path is None:
+            return result
+        try:
+            import torch  # noqa: F401
+        except ImportError:
+            result["lstm_skipped"] = "PyTorch not installed"
+            return result
+        start = time.perf_counter()
+        train_lstm_predictor(river_id, lstm_path, dataset=dataset, epochs=lstm_epochs,
+                             checkpoint_dir=checkpoint_dir, resume=resume)
+        result["stages"]["lstm"] = time.perf_counter() - start
+        result["artifacts"].append(lstm_path)
+    except Exception as e:
+        result["error"] = f"{stage}: {type(e).__name__}: {e}"
+    return result
+
+
+# =============================================================================
+# Orchestrator
+# =============================================================================
+
+def train_all_rivers(
+    rivers: Optional[List[str]] = None,
+    num_days: int = 730,
+    workers: Optional[int] = None,
+    lstm_epochs: int = 50,
+    train_lstm: bool = True,
+    models_dir: Optional[str] = None,
+    fast_rf: bool = False,
+    checkpoint_dir: Optional[str] = None,
+    resume: bool = False,
+    shared_lstm: bool = False
+) -> Dict:
+    """
+    Train the RF and LSTM models of several rivers in parallel.
+
+    Args:
+        rivers: River ids (default: every river in INDIA_RIVERS)
+        num_days: Days of data to simulate per river
+        workers: Worker processes (default: one per river, up to the cores)
+        lstm_epochs: LSTM training epochs
+        train_lstm: Also train the PyTorch LSTMs
+        models_dir: Artifact directory (default: backend/models, where serving loads from)
+        fast_rf: Fast RF training (no cross-validation, out-of-bag validation)
+        checkpoint_dir: Root of the per-river LSTM training checkpoints
+            (<checkpoint_dir>/<river_id>); None disables checkpointing
+        resume: Continue each river's LSTM from its checkpoint, if there is one
+        shared_lstm: Train one shared multi-river LSTM (after the pool, with
+            every core) instead of one LSTM per river; its checkpoints go
+            to <checkpoint_dir>/shared
+
+    Returns:
+        Timing report: plan, per-river results, stage totals and wall clock
+    """
+    from data.hydrological_simulator import INDIA_RIVERS
+    from ml.model_registry import ARTIFACT_PATTERNS, MODELS_DIR
+
+    rivers = rivers or list(INDIA_RIVERS)
+    unknown = [river_id for river_id in rivers if river_id not in INDIA_RIVERS]
+    if unknown:
+        raise ValueError(f"Unknown rivers: {', '.join(unknown)}")
+    models_dir = models_dir or MODELS_DIR
+    os.makedirs(models_dir, exist_ok=True)
+
+    def path(kind: str, river_id: str) -> str:
+        return os.path.join(models_dir, ARTIFACT_PATTERNS[kind].format(river_id=river_id))
+
+    n_workers, threads = plan_workers(len(rivers), workers)
+    print(f"🚀 Training {len(rivers)} rivers on {available_cores()} cores: "
+          f"{n_workers} workers × {threads} threads")
+
+    results = {}
+    start = time.perf_counter()
+    # spawn: forking a process that already runs torch/OpenMP threads can deadlock
+    with ProcessPoolExecutor(
+        max_workers=n_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(threads,)
+    ) as pool:
+        futures = {
+            pool.submit(
+                train_river, river_id, num_days, path("rf", river_id),
+                path("lstm", river_id) if train_lstm and not shared_lstm else None, lstm_epochs, threads, fast_rf,
+                os.path.join(checkpoint_dir, river_id) if checkpoint_dir else None, resume
+            ): river_id
+            for river_id in rivers
+        }
+        for future in as_completed(futures):
+            river_id = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:  # worker process died
+                result = {"river_id": river_id, "stages": {}, "artifacts": [],
+                          "error": f"worker: {type(e).__name__}: {e}"}
+            result["finished_at_s"] = time.perf_counter() - start
+            results[river_id] = result
+            status = "❌ " + result["error"] if result["error"] else "✅ done"
+            print(f"{status} - {river_id} ({result['finished_at_s']:.1f}s)")
+
+    shared = None
+    if train_lstm and shared_lstm:
+        from ml.model_lifecycle import train_multi_river_lstm
+
+        shared_start = time.perf_counter()
+        shared = {"artifact": path("lstm_shared", ""), "rivers": rivers, "error": None}
+        try:
+            train_multi_river_lstm(
+                shared["artifact"], rivers, num_days=num_days, epochs=lstm_epochs,
+                checkpoint_dir=os.path.join(checkpoint_dir, "shared") if checkpoint_dir else None,
+                resume=resume
+            )
+        except Exception as e:
+            shared["error"] = f"{type(e).__name__}: {e}"
+        shared["seconds"] = time.perf_counter() - shared_start
+        status = "❌ " + shared["error"] if shared["error"] else "✅ done"
+        print(f"{status} - shared LSTM ({shared['seconds']:.1f}s)")
+    wall = time.perf_counter() - start
+
+    stage_totals = {
+        stage: sum(r["stages"].get(stage, 0.0) for r in results.values())
+        for stage in STAGES
+    }
+    if shared is not None:
+        stage_totals["lstm"] += shared["seconds"]
+    busy = sum(stage_totals.values())
+    return {
+        "workers": n_workers,
+        "threads_per_worker": threads,
+        "num_days": num_days,
+        "fast_rf": fast_rf,
+        "rivers": {river_id: results[river_id] for river_id in rivers},
+        "shared_lstm": shared,
+        "stage_totals_s": stage_totals,
+        "wall_clock_s": wall,
+        "parallel_speedup": busy / wall if wall > 0 else 0.0,
+        "failed": [river_id for river_id in rivers if results[river_id]["error"]]
+                  + (["shared_lstm"] if shared is not None and shared["error"] else []),
+    }
+
+
+def print_timing_report(report: Dict) -> None:
+    """Print per-river stage timings, stage totals and the wall clock."""
+    print("\n" + "=" * 70)
+    print(f"  ⏱️ TRAINING REPORT ({report['workers']} workers × "
+          f"{report['threads_per_worker']} threads, {report['num_days']} days)")
+    print("=" * 70)
+    print(f"{'River':<16}" + "".join(f"{stage:>10}" for stage in STAGES) + f"{'total':>10}   status")
+    print("-" * 70)
+    for river_id, result in report["rivers"].items():
+        stages = result["stages"]
+        cells = "".join(
+            f"{stages[stage]:>9.1f}s" if stage in stages else f"{'-':>10}"
+            for stage in STAGES
+        )
+        status = "❌ " + result["error"] if result["error"] else "✅"
+        if result.get("rf_test_accuracy") is not None:
+            status += f" RF acc {result['rf_test_accuracy']:.3f}"
+        print(f"{river_id:<16}{cells}{sum(stages.values()):>9.1f}s   {status}")
+    shared = report.get("shared_lstm")
+    if shared is not None:
+        status = "❌ " + shared["error"] if shared["error"] else "✅"
+        print(f"{'shared LSTM':<16}{'-':>10}{'-':>10}{shared['seconds']:>9.1f}s{shared['seconds']:>9.1f}s   {status}")
+    print("-" * 70)
+    totals = report["stage_totals_s"]
+    print(f"{'stage total':<16}" + "".join(f"{totals[stage]:>9.1f}s" for stage in STAGES)
+          + f"{sum(totals.values()):>9.1f}s")
+    profiled = {river_id: r["rf_profile"] for river_id, r in report["rivers"].items() if r.get("rf_profile")}
+    if profiled:
+        print(f"\n   RF stages{' (fast mode)' if report['fast_rf'] else ''}:")
+        for river_id, stages in profiled.items():
+            print(f"   {river_id:<16}" + "  ".join(f"{stage} {seconds:.2f}s" for stage, seconds in stages.items()))
+    print(f"\n   Wall clock: {report['wall_clock_s']:.1f}s "
+          f"(parallel speedup {report['parallel_speedup']:.2f}x over sequential stage time)")
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Train RF + LSTM flood models for all rivers in parallel"
+    )
+    parser.add_argument(
+        "--rivers",
+        default=None,
+        help="Comma-separated river ids (default: all rivers)"
+    )
+    parser.add_argument(
+        "--days",
+        type=int,
+        default=730,
+        help="Days of data to simulate per river (default: 730 = 2 years)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes (default: one per river, up to the CPU cores)"
+    )
+    parser.add_argument(
+        "--lstm-epochs",
+        type=int,
+        default=50,
+        help="LSTM training epochs (default: 50)"
+    )
+    parser.add_argument(
+        "--skip-lstm",
+        action="store_true",
+        help="Only train the Random Forest classifiers"
+    )
+    parser.add_argument(
+        "--fast-rf",
+        action="store_true",
+        help="Skip RF cross-validation and validate on out-of-bag votes"
+    )
+    parser.add_argument(
+        "--models-dir",
+        default=None,
+        help="Artifact directory (default: backend/models)"
+    )
+    parser.add_argument(
+        "--shared-lstm",
+        action="store_true",
+        help="Train one shared multi-river LSTM instead of one LSTM per river"
+    )
+    parser.add_argument(
+        "--checkpoint-dir",
+        default=None,
+        help="Write resumable LSTM training checkpoints under this directory (one subdirectory per river)"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue LSTM training from the checkpoints in --checkpoint-dir"
+    )
+    parser.add_argument(
+        "--report",
+        default=None,
+        help="Also write the timing report as JSON to this path"
+    )
+
+    args = parser.parse_args()
+    if args.resume and not args.checkpoint_dir:
+        parser.error("--resume requires --checkpoint-dir")
+    rivers = [river_id.strip() for river_id in args.rivers.split(",")] if args.rivers else None
+
+    report = train_all_rivers(
+        rivers=rivers,
+        num_days=args.days,
+        workers=args.workers,
+        lstm_epochs=args.lstm_epochs,
+        train_lstm=not args.skip_lstm,
+        models_dir=args.models_dir,
+        fast_rf=args.fast_rf,
+        checkpoint_dir=args.checkpoint_dir,
+        resume=args.resume,
+        shared_lstm=args.shared_lstm
+    )
+    print_timing_report(report)
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"📁 Report saved to: {args.report}")
+
+    sys.exit(1 if report["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Out-of-Core Training from Gauge History
+=======================================
+Trains a river's serving models (Random Forest + PyTorch LSTM) from a gauge
+history CSV that may be far larger than memory.
+
+- The file is read in chunks (data.gauge_stream); features are computed
+  incrementally from raw timeseries, or read as-is from feature CSVs.
+- The Random Forest is fitted on a uniform reservoir sample of the stream.
+- The LSTM is fed minibatches cut directly from each chunk, one pass per epoch.
+
+Peak memory is set by --chunk-rows and --rf-sample, not by the history length.
+
+Usage:
+    python train_from_history.py --river cauvery --history gauges/cauvery_hourly.csv
+                                 [--chunk-rows 100000] [--rf-sample 200000]
+                                 [--lstm-epochs 50] [--skip-lstm] [--fast-rf]
+                                 [--checkpoint-dir checkpoints/cauvery] [--resume]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from data.hydrological_simulator import INDIA_RIVERS
+from ml.model_lifecycle import train_rf_from_history, train_lstm_from_history
+from ml.model_registry import ARTIFACT_PATTERNS, MODELS_DIR
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Train RF + LSTM flood models from a large gauge history file"
+    )
+    parser.add_argument(
+        "--river",
+        required=True,
+        choices=list(INDIA_RIVERS),
+        help="River the history belongs to (names the artifacts)"
+    )
+    parser.add_argument(
+        "--history",
+        required=True,
+        help="Gauge timeseries CSV (rainfall_mm, river_level_m, is_flood) or feature CSV"
+    )
+    parser.add_argument(
+        "--chunk-rows",
+        type=int,
+        default=100_000,
+        help="Rows read from disk at a time (default: 100000)"
+    )
+    parser.add_argument(
+        "--rf-sample",
+        type=int,
+        default=200_000,
+        help="Reservoir sample size the Random Forest is fitted on (default: 200000)"
+    )
+    parser.add_argument(
+        "--lstm-epochs",
+        type=int,
+        default=50,
+        help="LSTM training epochs (default: 50)"
+    )
+    parser.add_argument(
+        "--skip-lstm",
+        action="store_true",
+        help="Only train the Random Forest classifier"
+    )
+    parser.add_argument(
+        "--fast-rf",
+        action="store_true",
+        help="Skip RF cross-validation and validate on out-of-bag votes"
+    )
+    parser.add_argument(
+        "--checkpoint-dir",
+        default=None,
+        help="Write resumable LSTM training checkpoints to this directory"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue LSTM training from the checkpoint in --checkpoint-dir"
+    )
+    parser.add_argument(
+        "--models-dir",
+        default=MODELS_DIR,
+        help="Artifact directory (default: backend/models)"
+    )
+
+    args = parser.parse_args()
+    if args.resume and not args.checkpoint_dir:
+        parser.error("--resume requires --checkpoint-dir")
+    os.makedirs(args.models_dir, exist_ok=True)
+
+    def path(kind: str) -> str:
+        return os.path.join(args.models_dir, ARTIFACT_PATTERNS[kind].format(river_id=args.river))
+
+    start = time.perf_counter()
+    train_rf_from_history(
+        args.history,
+        model_path=path("rf"),
+        sample_size=args.rf_sample,
+        chunk_rows=args.chunk_rows,
+        fast=args.fast_rf
+    )
+    print(f"⏱️ Random Forest: {time.perf_counter() - start:.1f}s")
+
+    if not args.skip_lstm:
+        start = time.perf_counter()
+        train_lstm_from_history(
+            args.history,
+            path("lstm"),
+            chunk_rows=args.chunk_rows,
+            epochs=args.lstm_epochs,
+            checkpoint_dir=args.checkpoint_dir,
+            resume=args.resume
+        )
+        print(f"⏱️ LSTM: {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()